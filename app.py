@@ -1,13 +1,39 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import time
 import uuid
 from typing import Any, Dict
 
-from fastapi import FastAPI, Form
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 
+from config import settings
 from src.agent import SearchAgent
+from src.graph.llm_cache import get_llm_cache
+from src.graph.llm_scheduler import get_scheduler
+from src.runtime.prewarm import note_traffic, start_prewarm
+from src.runtime.profiling import maybe_profile
+from src.runtime.recording import recording, trace_path_for
+from src.runtime.resilience import breaker_stats, new_deadline
+from src.runtime.sessions import get_session_store
+from src.runtime.singleflight import flight_stats
+from src.web.extract import get_extract_pool
+from src.reports.generate_report import REPORT_CSS
+from src.reports.index import search_reports
+from src.reports.refresh import refresh_report
+from src.reports.serve import (
+    MEDIA_TYPES,
+    ensure_gzip,
+    etag_for,
+    http_date,
+    is_not_modified,
+    iter_file_range,
+    parse_range,
+    resolve_report,
+)
+from src.reports.templates import Template, html_escape
 
 
 app = FastAPI(title="Search Agent Web CLI", version="0.1")
@@ -15,29 +41,39 @@ app = FastAPI(title="Search Agent Web CLI", version="0.1")
 agent = SearchAgent()
 graph = agent.build_graph()
 
-# In-memory sessions: {session_id: {"state": AgentState, "created_at": float, "log": [str]}}
-SESSIONS: Dict[str, Dict[str, Any]] = {}
-SESSION_TTL_SECONDS = 30 * 60  # 30 minutes
 
+@app.on_event("startup")
+def _start_extract_pool() -> None:
+    # per worker (after any fork): extraction processes are up before the first search
+    get_extract_pool()
 
-def _esc(x: str) -> str:
-    return (
-        (x or "")
-        .replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-    )
+
+@app.on_event("startup")
+def _start_prewarm() -> None:
+    # one worker per host warms caches for popular questions until real traffic arrives
+    start_prewarm()
+
+# Sessions: {session_id: {"state": AgentState, "created_at": float, "log": [str]}}
+# settings.SESSIONS_BACKEND: in-process dict, or SQLite shared by gunicorn workers
+SESSIONS = get_session_store()
+SESSION_TTL_SECONDS = 30 * 60  # 30 minutes
 
 
 def _cleanup_sessions() -> None:
-    now = time.time()
-    dead = []
-    for sid, data in SESSIONS.items():
-        if now - float(data.get("created_at", now)) > SESSION_TTL_SECONDS:
-            dead.append(sid)
-    for sid in dead:
-        SESSIONS.pop(sid, None)
+    SESSIONS.cleanup(SESSION_TTL_SECONDS)
+
+
+def _invoke(request: Request, state: Dict[str, Any], data: Dict[str, Any], user_input: Dict[str, str]) -> Dict[str, Any]:
+    """
+    graph.invoke + state.update, profiled on X-Profile: 1 or by sampling
+    (settings.PROFILE_*); external calls go to the session's I/O trace if it has one.
+    """
+    with maybe_profile(request.headers.get("x-profile") == "1") as prof, recording(data.get("trace"), user_input):
+        out = graph.invoke(state)
+    state.update(out)
+    for p in prof:
+        p.save(settings.REPORTS_DIR, state.get("report_basename"))
+    return out
 
 
 def _get_interrupt_question(out: Dict[str, Any]) -> str | None:
@@ -51,6 +87,91 @@ def _get_interrupt_question(out: Dict[str, Any]) -> str | None:
     return "Input required."
 
 
+# -----------------------------
+# Page templates (compiled once) + static CSS
+# -----------------------------
+
+_PAGE = Template(
+    """<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>{title}</title>
+  <link rel="stylesheet" href="/static/app.css" />
+</head>
+<body>
+  <h1>Search Agent (Web CLI)</h1>
+  <div class="card">
+    <div class="muted">English queries only.</div>
+    <form method="post" action="/run" style="margin-top:12px">
+      <label><b>Query</b></label><br/>
+      <textarea name="query" placeholder="Find papers about rotary positional embeddings..."></textarea>
+      <div style="height:10px"></div>
+      <button type="submit">Start</button>
+    </form>
+  </div>
+  {log_html!s}
+  {question_html!s}
+  {result_html!s}
+</body>
+</html>
+""",
+    escape=html_escape,
+)
+
+_LOG = Template(
+    """<div class="card">
+    <h3>Conversation</h3>
+    <ul>{items!s}</ul>
+  </div>""",
+    escape=html_escape,
+)
+_LOG_ITEM = Template("<li>{line}</li>", escape=html_escape)
+
+_QUESTION = Template(
+    """<div class="card">
+    <h3>Agent question</h3>
+    <div class="muted">{question}</div>
+    <form method="post" action="/continue" style="margin-top:12px">
+      <input type="hidden" name="session_id" value="{session_id}"/>
+      <input name="answer" placeholder="Type y/n or a source_id (github/arxiv/...)" />
+      <div style="height:10px"></div>
+      <button type="submit">Send</button>
+    </form>
+  </div>""",
+    escape=html_escape,
+)
+
+_RESULT = Template(
+    """<div class="card">
+    <h3>Final answer</h3>
+    <pre>{final_answer}</pre>
+  </div>
+  <div class="card">
+    <h3>Reports</h3>
+    <div class="muted">HTML: {html_link!s}</div>
+    <div class="muted">MD: {md_link!s}</div>
+  </div>""",
+    escape=html_escape,
+)
+_LINK = Template('<a href="{href}" target="_blank">{label}</a>', escape=html_escape)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_MAX_AGE = 24 * 3600
+
+
+def _load_static() -> Dict[str, tuple[bytes, str]]:
+    files = {"report.css": REPORT_CSS.encode("utf-8")}
+    with open(os.path.join(STATIC_DIR, "app.css"), "rb") as f:
+        files["app.css"] = f.read()
+    return {name: (body, '"' + hashlib.sha1(body).hexdigest()[:16] + '"') for name, body in files.items()}
+
+
+# {name: (body, etag)} — read once at import, served from memory
+_STATIC = _load_static()
+
+
 def _render_page(
     *,
     title: str,
@@ -60,91 +181,39 @@ def _render_page(
     question: str | None = None,
     final_answer: str | None = None,
     report_paths: dict | None = None,
+    report_basename: str | None = None,
 ) -> HTMLResponse:
     log_lines = log_lines or []
 
     log_html = ""
     if log_lines:
-        items = "\n".join(f"<li>{_esc(x)}</li>" for x in log_lines)
-        log_html = f"""
-        <div class="card">
-          <h3>Conversation</h3>
-          <ul>{items}</ul>
-        </div>
-        """
+        items = "\n".join(_LOG_ITEM.render(line=x) for x in log_lines)
+        log_html = _LOG.render(items=items)
 
     question_html = ""
     if question and session_id:
-        question_html = f"""
-        <div class="card">
-          <h3>Agent question</h3>
-          <div class="muted">{_esc(question)}</div>
-          <form method="post" action="/continue" style="margin-top:12px">
-            <input type="hidden" name="session_id" value="{_esc(session_id)}"/>
-            <input name="answer" placeholder="Type y/n or a source_id (github/arxiv/...)" />
-            <div style="height:10px"></div>
-            <button type="submit">Send</button>
-          </form>
-        </div>
-        """
+        question_html = _QUESTION.render(question=question, session_id=session_id)
 
     result_html = ""
     if final_answer is not None:
         rp = report_paths or {}
         md_path = rp.get("md")
         html_path = rp.get("html")
-
-        result_html = f"""
-        <div class="card">
-          <h3>Final answer</h3>
-          <pre>{_esc(final_answer)}</pre>
-        </div>
-        <div class="card">
-          <h3>Reports</h3>
-          <div class="muted">HTML: {_esc(str(html_path) if html_path else "")}</div>
-          <div class="muted">MD: {_esc(str(md_path) if md_path else "")}</div>
-        </div>
-        """
-
-    base_form = """
-    <div class="card">
-      <div class="muted">English queries only.</div>
-      <form method="post" action="/run" style="margin-top:12px">
-        <label><b>Query</b></label><br/>
-        <textarea name="query" placeholder="Find papers about rotary positional embeddings..."></textarea>
-        <div style="height:10px"></div>
-        <button type="submit">Start</button>
-      </form>
-    </div>
-    """
-
-    html = f"""
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>{_esc(title)}</title>
-  <style>
-    body{{font-family:ui-sans-serif,system-ui,-apple-system,Segoe UI,Roboto,Arial;max-width:920px;margin:32px auto;padding:0 16px;line-height:1.5;color:#111}}
-    .card{{border:1px solid #e6e6e6;border-radius:14px;padding:16px;margin:14px 0}}
-    textarea,input{{width:100%;box-sizing:border-box;border:1px solid #ddd;border-radius:10px;padding:10px;font-size:14px}}
-    textarea{{min-height:120px}}
-    button{{border:0;border-radius:12px;padding:10px 14px;font-size:14px;cursor:pointer}}
-    .muted{{color:#666}}
-    pre{{white-space:pre-wrap;background:#fafafa;border:1px solid #eee;border-radius:12px;padding:12px}}
-    ul{{margin:8px 0 0 18px}}
-  </style>
-</head>
-<body>
-  <h1>Search Agent (Web CLI)</h1>
-  {base_form}
-  {log_html}
-  {question_html}
-  {result_html}
-</body>
-</html>
-"""
+        html_label = str(html_path) if html_path else ""
+        md_label = str(md_path) if md_path else ""
+        if report_basename:
+            html_link = _LINK.render(href=f"/reports/{report_basename}.html", label=html_label)
+            md_link = _LINK.render(href=f"/reports/{report_basename}.md", label=md_label)
+        else:
+            html_link, md_link = html_escape(html_label), html_escape(md_label)
+        result_html = _RESULT.render(final_answer=final_answer, html_link=html_link, md_link=md_link)
+
+    html = _PAGE.render(
+        title=title,
+        log_html=log_html,
+        question_html=question_html,
+        result_html=result_html,
+    )
     return HTMLResponse(html)
 
 
@@ -159,8 +228,115 @@ def favicon():
     return HTMLResponse("", status_code=204)
 
 
+@app.get("/static/{name}")
+def static_file(name: str, request: Request):
+    item = _STATIC.get(name)
+    if item is None:
+        return Response(status_code=404)
+
+    body, etag = item
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={STATIC_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/css", headers=headers)
+
+
+@app.get("/metrics")
+def metrics():
+    return JSONResponse({
+        "llm_cache": get_llm_cache().stats(),
+        "llm_scheduler": get_scheduler().stats(),
+        "single_flight": flight_stats(),
+        "breakers": breaker_stats(),
+    })
+
+
+@app.get("/reports")
+def reports_search(q: str = "", limit: int = 10):
+    q = (q or "").strip()
+    if not q:
+        return JSONResponse({"query": q, "results": []})
+    limit = max(1, min(limit, 100))
+    return JSONResponse({"query": q, "results": search_reports(settings.REPORTS_DIR, q, limit=limit)})
+
+
+@app.get("/reports/{name}")
+def report_file(name: str, request: Request):
+    base, _, ext = name.rpartition(".")
+    path = resolve_report(settings.REPORTS_DIR, base, ext)
+    if path is None:
+        return Response(status_code=404)
+
+    st = os.stat(path)
+    etag = etag_for(st)
+    gz_etag = etag_for(st, "gz")
+    headers = {
+        "Last-Modified": http_date(st.st_mtime),
+        "Cache-Control": "no-cache",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    media_type = MEDIA_TYPES[ext]
+
+    if is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        (etag, gz_etag),
+        st.st_mtime,
+    ):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    # Range requests are served from the identity representation
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            rng = parse_range(range_header, st.st_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "ETag": etag, "Content-Range": f"bytes */{st.st_size}"},
+            )
+        if rng is not None:
+            start, end = rng
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "ETag": etag,
+                    "Content-Range": f"bytes {start}-{end}/{st.st_size}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+
+    if "gzip" in (request.headers.get("accept-encoding") or "").lower():
+        return FileResponse(
+            ensure_gzip(path),
+            media_type=media_type,
+            headers={**headers, "ETag": gz_etag, "Content-Encoding": "gzip"},
+        )
+
+    return FileResponse(path, media_type=media_type, headers={**headers, "ETag": etag})
+
+
+@app.post("/reports/{base}/refresh")
+def report_refresh(base: str):
+    # only existing, well-formed report names
+    if resolve_report(settings.REPORTS_DIR, base, "md") is None:
+        return Response(status_code=404)
+    try:
+        result = refresh_report(base)
+    except FileNotFoundError:
+        return Response(status_code=404)
+    # search / LLM unavailable: the report was left untouched, try again later
+    return JSONResponse(result, status_code=503 if result.get("aborted") else 200)
+
+
 @app.post("/run", response_class=HTMLResponse)
-def run(query: str = Form(...)):
+def run(request: Request, query: str = Form(...)):
+    note_traffic()
     _cleanup_sessions()
 
     q = (query or "").strip()
@@ -170,42 +346,46 @@ def run(query: str = Form(...)):
     session_id = uuid.uuid4().hex
     state = agent._initial_state(q)  # uses your existing initializer in src/agent.py
 
-    SESSIONS[session_id] = {
+    data = {
         "state": state,
         "created_at": time.time(),
         "log": [f"User: {q}"],
+        "trace": trace_path_for(session_id),
     }
 
     # Run graph until interrupt or finish
-    out = graph.invoke(state)
-    state.update(out)
+    out = _invoke(request, state, data, {"query": q})
 
     question = _get_interrupt_question(out)
     if question:
-        SESSIONS[session_id]["log"].append(f"Agent: {question}")
+        data["log"].append(f"Agent: {question}")
+        SESSIONS.put(session_id, data)
         return _render_page(
             title="Search Agent",
             session_id=session_id,
             query=q,
-            log_lines=SESSIONS[session_id]["log"],
+            log_lines=data["log"],
             question=question,
         )
 
     # Finished immediately
     final_answer = state.get("final_answer") or ""
-    SESSIONS[session_id]["log"].append("Agent: (finished)")
+    data["log"].append("Agent: (finished)")
+    SESSIONS.put(session_id, data)
     return _render_page(
         title="Search Agent",
         session_id=session_id,
         query=q,
-        log_lines=SESSIONS[session_id]["log"],
+        log_lines=data["log"],
         final_answer=final_answer,
         report_paths=state.get("report_paths"),
+        report_basename=state.get("report_basename"),
     )
 
 
 @app.post("/continue", response_class=HTMLResponse)
-def cont(session_id: str = Form(...), answer: str = Form(...)):
+def cont(request: Request, session_id: str = Form(...), answer: str = Form(...)):
+    note_traffic()
     _cleanup_sessions()
 
     sid = (session_id or "").strip()
@@ -234,12 +414,13 @@ def cont(session_id: str = Form(...), answer: str = Form(...)):
     state["user_approval_raw"] = ans
     log_lines.append(f"User: {ans}")
 
-    out = graph.invoke(state)
-    state.update(out)
+    state["deadline"] = new_deadline()
+    out = _invoke(request, state, data, {"answer": ans})
 
     question = _get_interrupt_question(out)
     if question:
         log_lines.append(f"Agent: {question}")
+        SESSIONS.put(sid, data)
         return _render_page(
             title="Search Agent",
             session_id=sid,
@@ -250,6 +431,7 @@ def cont(session_id: str = Form(...), answer: str = Form(...)):
 
     final_answer = state.get("final_answer") or ""
     log_lines.append("Agent: (finished)")
+    SESSIONS.put(sid, data)
     return _render_page(
         title="Search Agent",
         session_id=sid,
@@ -257,4 +439,5 @@ def cont(session_id: str = Form(...), answer: str = Form(...)):
         log_lines=log_lines,
         final_answer=final_answer,
         report_paths=state.get("report_paths"),
+        report_basename=state.get("report_basename"),
     )
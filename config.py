@@ -1,4 +1,6 @@
 import os
+from typing import List
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -28,6 +30,35 @@ User query:
 """.strip()
 
 
+# Used with GUARD_JSON: output constrained to INTENT_GUARD_SCHEMA by Ollama
+INTENT_GUARD_JSON_PROMPT = """
+You are a gatekeeper for an information-retrieval agent.
+
+The agent is ONLY allowed to:
+- choose a source from an allowlist,
+- (after user approval) search that source on the web,
+- summarize findings,
+- generate a report (Markdown/HTML) from collected evidence.
+
+If the user request is clearly outside this scope (e.g., requests for illegal wrongdoing,
+harm, explicit hacking instructions, or unrelated tasks), refuse.
+
+Answer with JSON: {{"allow": true|false, "reason": "<short reason>"}}
+
+User query:
+{user_query}
+""".strip()
+
+INTENT_GUARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "allow": {"type": "boolean"},
+        "reason": {"type": "string", "maxLength": 120},
+    },
+    "required": ["allow", "reason"],
+}
+
+
 REPORT_ANSWER_PROMPT = """
 You are an information research assistant.
 
@@ -47,6 +78,16 @@ Evidence (search results + extracted quotes):
 """.strip()
 
 
+QUERY_REWRITE_PROMPT = """
+Rewrite the request below into {n} short web search queries for {source_domain}.
+Each query: 2–6 keywords, no site: operator, no quotes, no numbering.
+Output one query per line and nothing else.
+
+Request:
+{source_query}
+""".strip()
+
+
 FORMAT_QUESTION = "Could you clarify the format? Examples: papers / code / discussion / short summary"
 
 
@@ -58,21 +99,127 @@ class Settings(BaseSettings):
     # Ollama LLM
     OLLAMA_HOST: str = Field(default="http://localhost:11434", description="Ollama base URL")
     OLLAMA_MODEL: str = Field(default="qwen2.5:3b", description="Default Ollama model name")
+    LLM_MAX_INFLIGHT: int = Field(default=2, description="Max concurrent generations sent to Ollama")
+    LLM_QUEUE_TIMEOUT_SECONDS: float = Field(default=60.0, description="Max wait for a free generation slot")
+    LLM_REQUEST_TIMEOUT_SECONDS: float = Field(default=120.0, description="HTTP timeout of a single generation")
+
+    # Per-node generation profiles (see src/graph/profiles.py)
+    GUARD_MODEL: str = Field(default="", description="Smaller model for the intent guard (empty = OLLAMA_MODEL)")
+    GUARD_JSON: bool = Field(default=True, description="Schema-constrained JSON guard output (Ollama >= 0.5)")
+    GUARD_NUM_PREDICT: int = Field(default=64, description="Max tokens the guard may generate (room for the JSON object)")
+    GUARD_NUM_CTX: int = Field(default=1024, description="Context window for the guard prompt")
+    GUARD_TEMPERATURE: float = Field(default=0.0, description="Guard sampling temperature")
+    GUARD_STOP: List[str] = Field(default_factory=list, description="Guard stop sequences")
+    REPORT_NUM_PREDICT: int = Field(default=768, description="Max answer tokens (keep <= REPORT_ANSWER_RESERVE_TOKENS)")
+    REPORT_TEMPERATURE: float = Field(default=0.3, description="Report sampling temperature (cached calls use 0)")
+    REPORT_STOP: List[str] = Field(default_factory=list, description="Report stop sequences")
+    QUERY_PLAN_NUM_PREDICT: int = Field(default=64, description="Max tokens for LLM query rewrites")
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = Field(default=True, description="Cache LLM responses by (model, prompt, options)")
+    LLM_CACHE_NODES: str = Field(default="intent_guard,report_answer,query_plan", description="Comma-separated nodes that use the cache")
+    LLM_CACHE_MAX_ITEMS: int = Field(default=512, description="In-memory LRU size")
+    LLM_CACHE_TTL_SECONDS: int = Field(default=24 * 3600, description="Cached response lifetime")
+    LLM_CACHE_DB: str = Field(default="", description="SQLite file for the on-disk tier (empty = memory only)")
+    LLM_SEED: int = Field(default=42, description="Sampling seed used when caching is on")
 
     # Qdrant (RAG for source selection)
     QDRANT_URL: str = Field(default="http://localhost:6333", description="Qdrant URL")
     QDRANT_SOURCES_COLLECTION: str = Field(default="sources", description="Qdrant collection for sources")
+    QDRANT_TIMEOUT_SECONDS: int = Field(default=5, description="Qdrant request timeout")
+    SOURCES_SNAPSHOT_PATH: str = Field(default=".cache/sources.snap", description="Local sources snapshot written by init_sources (empty = always use Qdrant)")
     EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", description="SentenceTransformer model")
+    EMBEDDING_BACKEND: str = Field(default="sentence-transformers", description="Embedding backend: sentence-transformers | onnx")
+    EMBEDDING_ONNX_FILE: str = Field(default="onnx/model_quint8_avx2.onnx", description="ONNX file (local path or file in the EMBEDDING_MODEL hub repo)")
+    EMBEDDING_MAX_SEQ_LEN: int = Field(default=256, description="Max tokens per text for the ONNX backend")
+    EMBEDDING_THREADS: int = Field(default=0, description="ONNX Runtime intra-op threads (0 = runtime default)")
 
     # Web search / enrichment
-    WEB_MAX_RESULTS: int = Field(default=5, description="DDG max search results")
+    WEB_MAX_RESULTS: int = Field(default=5, description="DDG max search results (per sub-query)")
+    QUERY_PLAN_MAX_QUERIES: int = Field(default=3, description="Sub-queries searched in parallel (1 = the query as given)")
+    QUERY_REWRITE_LLM: bool = Field(default=False, description="Also ask the LLM for sub-queries (adds one short generation)")
+    SEARCH_MAX_PARALLEL: int = Field(default=3, description="Concurrent search backend calls per request")
+    SEARCH_RATE_PER_SECOND: float = Field(default=1.0, gt=0, description="Sustained DDG requests/second (all workers on this host)")
+    SEARCH_BURST: float = Field(default=3.0, description="DDG token bucket size; extra sub-queries are dropped when it is empty")
+    RRF_K: int = Field(default=60, description="Reciprocal-rank fusion constant")
+    DDG_TIMEOUT_SECONDS: int = Field(default=10, description="DDG search timeout")
+    FETCH_TIMEOUT_SECONDS: float = Field(default=10.0, description="Per-page fetch timeout")
+    SOURCE_ADAPTERS_ENABLED: bool = Field(default=True, description="Query wikipedia/arxiv/github/reddit via their APIs instead of search + scraping")
+    GITHUB_TOKEN: str = Field(default="", description="Optional GitHub token for the search API rate limit")
+
+    # Polite crawling for page enrichment
+    CRAWL_USER_AGENT: str = Field(default="Mozilla/5.0 (compatible; SearchAgent/0.1)", description="User-Agent for page fetches")
+    CRAWL_RATE_PER_SECOND: float = Field(default=1.0, gt=0, description="Sustained requests/second per domain (all workers)")
+    CRAWL_BURST: float = Field(default=2.0, description="Token bucket size per domain")
+    CRAWL_STATE_DB: str = Field(default=".cache/crawl_state.sqlite", description="SQLite file shared by workers for rate limits")
+    CRAWL_CONCURRENCY: int = Field(default=4, description="Concurrent page fetches per request")
+    CRAWL_RESPECT_ROBOTS: bool = Field(default=True, description="Obey robots.txt")
+    CRAWL_ROBOTS_TTL_SECONDS: int = Field(default=3600, description="robots.txt cache lifetime")
+    CRAWL_MAX_RETRY_AFTER_SECONDS: float = Field(default=5.0, description="Retry once after 429/503 if Retry-After is at most this")
+    CRAWL_DEFAULT_BACKOFF_SECONDS: float = Field(default=30.0, description="Domain back-off on 429/503 without Retry-After, and while its robots.txt can't be read")
     ENRICH_TOP_K: int = Field(default=2, description="How many top results to fetch and quote")
     MAX_PAGE_CHARS: int = Field(default=6000, description="Max chars to keep from fetched page")
     MAX_QUOTES: int = Field(default=2, description="Quotes per fetched page")
     MAX_QUOTE_LEN: int = Field(default=220, description="Max length of each quote")
+    EXTRACT_POOL_SIZE: int = Field(default=2, description="HTML extraction worker processes (0 = parse in the request thread)")
+    EXTRACT_MAX_PENDING: int = Field(default=16, description="Pages queued or parsing at once before callers wait")
+    EXTRACT_TIMEOUT_SECONDS: float = Field(default=10.0, description="Max wait for a queue slot plus parsing of one page")
+
+    # Evidence packing for the report prompt
+    LLM_CONTEXT_TOKENS: int = Field(default=4096, description="Context window of the report model (num_ctx)")
+    REPORT_ANSWER_RESERVE_TOKENS: int = Field(default=768, description="Context tokens kept free for the generated answer")
+    EVIDENCE_TOKENIZER: str = Field(default="", description="HF tokenizer for exact token counts (empty = ~4 chars/token)")
+    EVIDENCE_DEDUP_THRESHOLD: float = Field(default=0.8, description="MinHash similarity above which snippets/quotes are duplicates")
 
     # Reports
     REPORTS_DIR: str = Field(default="reports/reports", description="Directory for generated reports")
+    REPORTS_SHARD_SIZE: int = Field(default=0, description="Reports per subdirectory (0 = flat directory)")
+    REPORT_CSS_HREF: str = Field(default="", description="Stylesheet URL linked from HTML reports, e.g. /static/report.css when they are only viewed through the app (empty = inline the CSS, so reports opened from disk keep their styling)")
+    REPORT_REUSE_ENABLED: bool = Field(default=True, description="Reuse a recent report for a near-identical query")
+    REPORT_REUSE_MIN_SIM: float = Field(default=0.92, description="Min cosine similarity of queries for report reuse")
+    REPORT_REUSE_MAX_AGE_SECONDS: int = Field(default=24 * 3600, description="Max report age for reuse")
+
+    # Approval history: a learned prior for source selection
+    APPROVALS_DB: str = Field(default=".cache/approvals.sqlite", description="SQLite file with past (query, proposed, approved) choices")
+    APPROVALS_MAX_ROWS: int = Field(default=2000, description="Most recent approvals kept")
+    APPROVAL_PRIOR_ENABLED: bool = Field(default=True, description="Rank sources by what users approved for similar questions")
+    APPROVAL_PRIOR_WEIGHT: float = Field(default=0.35, description="Share of the fused source score taken by the prior")
+    APPROVAL_PRIOR_K: int = Field(default=20, description="Similar past questions consulted")
+    APPROVAL_PRIOR_MIN_SIM: float = Field(default=0.75, description="Min cosine similarity of a past question to count")
+    APPROVAL_PRIOR_REJECT_WEIGHT: float = Field(default=1.0, description="How much a rejected proposal counts against that source (0 = ignore rejections)")
+    APPROVAL_AUTO_APPROVE: bool = Field(default=False, description="Skip the confirmation when the prior is confident (trusted single-user setups)")
+    APPROVAL_AUTO_MIN_CONFIDENCE: float = Field(default=0.9, description="Min prior share of the proposed source to auto-approve")
+    APPROVAL_AUTO_MIN_VOTES: int = Field(default=5, description="Min similar past questions to auto-approve")
+
+    # Deadlines / circuit breakers
+    REQUEST_DEADLINE_SECONDS: float = Field(default=180.0, description="Time budget for one graph invocation")
+    BREAKER_FAILURE_THRESHOLD: int = Field(default=3, description="Consecutive failures that open a circuit")
+    BREAKER_RESET_SECONDS: float = Field(default=30.0, description="Open-circuit cool-down before a trial call")
+
+    # Web sessions ("sqlite" when running several worker processes)
+    SESSIONS_BACKEND: str = Field(default="memory", description="memory | sqlite")
+    SESSIONS_DB: str = Field(default=".cache/sessions.sqlite", description="SQLite file shared by workers for web sessions")
+
+    # On-demand profiling of graph runs (speedscope JSON next to the report)
+    PROFILE_ENABLED: bool = Field(default=False, description="Allow profiling at all")
+    PROFILE_HEADER_ENABLED: bool = Field(default=True, description="Profile requests sent with an X-Profile: 1 header")
+    PROFILE_SAMPLE_RATE: float = Field(default=0.0, description="Fraction of runs profiled without the header")
+    PROFILE_MAX_PER_MINUTE: int = Field(default=2, description="Profiles per minute per process, header or sampled")
+    PROFILE_INTERVAL_MS: float = Field(default=5.0, description="Stack sampling interval")
+
+    # Cache pre-warming after a deploy (src/runtime/prewarm.py)
+    PREWARM_ENABLED: bool = Field(default=False, description="Pre-warm caches in the background at startup")
+    PREWARM_QUERIES_FILE: str = Field(default="", description="Queries to pre-warm, one per line")
+    PREWARM_FROM_REPORTS: bool = Field(default=True, description="Also pre-warm the most frequent questions in the reports index")
+    PREWARM_MAX_QUERIES: int = Field(default=20, description="Queries per pre-warm pass")
+    PREWARM_BUDGET_SECONDS: float = Field(default=300.0, description="Wall-time budget of a pre-warm pass")
+    PREWARM_LLM: bool = Field(default=False, description="Run the full graph (LLM answers + reports), not just selection/search/fetch")
+    PREWARM_STATE_DIR: str = Field(default=".cache", description="Lock and traffic-marker files shared by workers")
+
+    # I/O traces (record external calls per session for scripts/replay.py)
+    IO_TRACE_ENABLED: bool = Field(default=False, description="Record Ollama / search / fetch / API / Qdrant calls of web sessions")
+    IO_TRACE_SAMPLE_RATE: float = Field(default=1.0, description="Fraction of new sessions recorded when enabled")
+    IO_TRACE_DIR: str = Field(default=".cache/traces", description="One <session_id>.trace file per recorded session")
 
     # Misc
     EXPECT_ENGLISH: bool = Field(default=True, description="Project is designed for English queries")
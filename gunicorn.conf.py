@@ -0,0 +1,33 @@
+# Production mode: several uvicorn workers forked from one preloaded master.
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The master loads the embedding model and the mmap'd sources snapshot once
+# (src/runtime/preload.py); workers share those pages copy-on-write. Sessions
+# move to SQLite so /continue works whichever worker serves it.
+import os
+
+os.environ.setdefault("SESSIONS_BACKEND", "sqlite")
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Report generation waits on the LLM; keep this above REQUEST_DEADLINE_SECONDS
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "240"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    from src.runtime.preload import preload
+
+    preload()
+
+
+def when_ready(server):
+    # after app import, before the first fork
+    from src.runtime.preload import freeze
+
+    freeze()
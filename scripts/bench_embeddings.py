@@ -0,0 +1,111 @@
+"""
+Embedding backends compared: load time, memory and query latency.
+
+    python scripts/bench_embeddings.py
+    python scripts/bench_embeddings.py --backends onnx --queries 500 --batch 64
+
+Each backend is measured in a fresh process, so its RSS is what a worker
+pays for that backend alone (Python + numpy baseline included, shown
+separately). Latency is for single-query encodes, which is what source
+selection does per request; throughput is for `--batch`-sized encodes
+(indexing).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    "How do transformers work?",
+    "Find papers about rotary positional embeddings",
+    "best python library for parsing PDF tables",
+    "What did people on reddit say about the new GPU prices?",
+    "kubernetes operator for postgres backups",
+    "history of the printing press",
+]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def measure(backend: str, queries: int, batch: int) -> Dict[str, Any]:
+    from config import settings
+
+    settings.EMBEDDING_BACKEND = backend
+    from src.rag import embeddings
+
+    base_rss = _rss_mb()
+    start = time.perf_counter()
+    emb = embeddings.get_embedder()
+    emb.encode(["warm up"])
+    load_s = time.perf_counter() - start
+
+    lat = []
+    for i in range(queries):
+        t = time.perf_counter()
+        emb.encode([QUERIES[i % len(QUERIES)]])
+        lat.append(time.perf_counter() - t)
+    lat.sort()
+
+    texts = [QUERIES[i % len(QUERIES)] for i in range(batch)]
+    start = time.perf_counter()
+    rounds = max(1, queries // batch)
+    for _ in range(rounds):
+        emb.encode(texts)
+    per_s = rounds * batch / (time.perf_counter() - start)
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "base_rss_mb": base_rss,
+        "rss_mb": _rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": lat[len(lat) // 2] * 1000,
+        "p95_ms": lat[int(len(lat) * 0.95)] * 1000,
+        "batch_per_s": per_s,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", nargs="+", default=["sentence-transformers", "onnx"])
+    ap.add_argument("--queries", type=int, default=200, help="single-query encodes per backend")
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.queries, args.batch)))
+        return
+
+    print(f"{'backend':<22} {'load':>7} {'rss':>8} {'peak':>8} {'p50':>8} {'p95':>8} {'batch':>10}")
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", backend,
+             "--queries", str(args.queries), "--batch", str(args.batch)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            err = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            print(f"{backend:<22} failed: {err}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"{backend:<22} {r['load_s']:6.1f}s {r['rss_mb'] - r['base_rss_mb']:6.0f}MB {r['peak_rss_mb']:6.0f}MB "
+            f"{r['p50_ms']:6.1f}ms {r['p95_ms']:6.1f}ms {r['batch_per_s']:7.0f}/s"
+        )
+    print("rss = growth over the interpreter baseline; peak = whole process")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+HTML extraction throughput: inline (one thread, GIL-bound) vs the process pool.
+
+    python scripts/bench_extract.py --sizes 1 2 4 8 --pages 400
+    python scripts/bench_extract.py --html saved_page.html
+
+Pages are parsed by `--threads` concurrent callers, the way fetch_pages drives
+extraction. Inline parsing doesn't scale with threads; the pool should scale
+with worker processes up to the number of cores.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.web.extract import ExtractPool, extract  # noqa: E402
+
+
+def synthetic_page(paragraphs: int = 400) -> bytes:
+    body = "\n".join(
+        f"<div class='c{i % 7}'><h2>Section {i}</h2><p>Paragraph {i} explains the topic in "
+        f"enough words to look like real content, with <a href='/x/{i}'>a link</a> and "
+        f"<b>some</b> <i>inline</i> markup.</p><script>var x{i} = {i};</script></div>"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><style>p{{margin:0}}</style></head><body>{body}</body></html>".encode()
+
+
+def bench(parse, page: bytes, pages: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(lambda _: parse(page), range(pages)))
+    return pages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--html", help="parse this file instead of a synthetic page")
+    args = ap.parse_args()
+
+    if args.html:
+        with open(args.html, "rb") as f:
+            page = f.read()
+    else:
+        page = synthetic_page()
+    max_chars = 6000
+
+    print(f"page: {len(page) / 1024:.0f} KB, {args.pages} pages, {args.threads} caller threads, {os.cpu_count()} cores")
+    rate = bench(lambda p: extract(p, None, max_chars), page, args.pages, args.threads)
+    print(f"{'inline':>8} {rate:8.1f} pages/s")
+
+    for size in sorted(set(args.sizes)):
+        pool = ExtractPool(size, max_pending=args.threads)
+        pool.warm()
+        try:
+            rate = bench(lambda p: pool.extract(p, None, max_chars, timeout=None), page, args.pages, args.threads)
+        finally:
+            pool.shutdown()
+        print(f"{'pool=' + str(size):>8} {rate:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
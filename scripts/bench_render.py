@@ -0,0 +1,78 @@
+"""
+Report rendering cost on large evidence sets.
+
+    python scripts/bench_render.py --results 100 300 1000 --repeat 20
+
+For each size: one pass producing both formats (render_reports), the same
+output as two separate passes (render_markdown + render_html), and
+save_reports streaming both files plus the manifest to a temporary directory.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.graph.results import WebResult  # noqa: E402
+from src.reports.generate_report import (  # noqa: E402
+    render_html,
+    render_markdown,
+    render_reports,
+    save_reports,
+)
+
+
+def synthetic_state(n: int) -> Dict[str, Any]:
+    results = tuple(
+        WebResult.make(
+            f"Result <{i}> & a title long enough to look real",
+            f"https://example.org/articles/{i}?q=a&b=<c>",
+            f"Snippet {i}: " + "search engines return about this much text per hit. " * 3,
+            [f"Quote {i}.{k}: \"a sentence quoted from the page\" with <markup> & entities." for k in range(2)],
+        )
+        for i in range(n)
+    )
+    return {
+        "user_query": "how do transformers work?",
+        "source_id": "wikipedia",
+        "source_domain": "wikipedia.org",
+        "candidate_source_reason": "encyclopedic overview",
+        "evidence_tokens": 1800,
+        "report_answer": "Transformers use self-attention. " * 40,
+        "web_results": results,
+    }
+
+
+def bench(fn: Callable[[], Any], repeat: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--results", type=int, nargs="+", default=[100, 300, 1000])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'results':>8} {'one pass':>10} {'two passes':>11} {'save':>10} {'html size':>10}")
+    with tempfile.TemporaryDirectory(prefix="bench-render-") as tmp:
+        for n in args.results:
+            state = synthetic_state(n)
+            chunks: list = []
+            one = bench(lambda: render_reports(state, chunks.append, chunks.append) or chunks.clear(), args.repeat)
+            two = bench(lambda: (render_markdown(state), render_html(state)), args.repeat)
+            save = bench(lambda: save_reports(state, out_dir=tmp, base="bench"), args.repeat)
+            size = len(render_html(state).encode("utf-8"))
+            print(f"{n:>8} {one:8.2f}ms {two:9.2f}ms {save:8.2f}ms {size / 1024:8.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Session state cost: how web results are carried and stored.
+
+    python scripts/bench_state.py --results 100 500 2000 --quotes 300 --sessions 20
+
+For each size: deepcopy of the state's results as dicts vs WebResult records,
+the stored session row as plain pickle vs the SqliteSessionStore form (web
+results packed), the time to write and read it, and the memory held by
+`--sessions` loaded copies of the session (packed rows intern their strings,
+so quotes shared by several sessions are held once).
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.graph.results import WebResult  # noqa: E402
+from src.runtime.sessions import _dumps, _loads  # noqa: E402
+
+
+def synthetic_session(n: int, n_quotes: int) -> Dict[str, Any]:
+    # quotes drawn from a smaller pool: the same passage quoted by several results
+    pool = [f"Quote {k}: \"a sentence quoted from the page, long enough to look like one\"." for k in range(n_quotes)]
+    results = tuple(
+        WebResult.make(
+            f"Result {i}: a title long enough to look real",
+            f"https://example.org/articles/{i % (n // 2 or 1)}",
+            f"Snippet {i}: " + "search engines return about this much text per hit. " * 3,
+            [pool[(i * 7 + k) % n_quotes] for k in range(3)],
+        )
+        for i in range(n)
+    )
+    state = {
+        "user_query": "how do transformers work?",
+        "source_id": "wikipedia",
+        "report_answer": "Transformers use self-attention. " * 40,
+        "web_results": results,
+    }
+    return {"created_at": time.time(), "state": state, "log": ["User: how do transformers work?"] * 10}
+
+
+def bench(fn: Callable[[], Any], repeat: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def held_kb(load: Callable[[], Any], sessions: int) -> float:
+    tracemalloc.start()
+    kept = [load() for _ in range(sessions)]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return held / 1024
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--results", type=int, nargs="+", default=[100, 500, 2000])
+    ap.add_argument("--quotes", type=int, default=300, help="distinct quotes shared by the results")
+    ap.add_argument("--sessions", type=int, default=20, help="loaded copies kept for the memory column")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    print(
+        f"{'results':>8} {'copy dicts':>11} {'copy recs':>10} {'pickle':>9} {'packed':>9} "
+        f"{'write':>9} {'read':>9} {'held pickle':>12} {'held packed':>12}"
+    )
+    for n in args.results:
+        data = synthetic_session(n, args.quotes)
+        as_dicts = [
+            {"title": r.title, "url": r.url, "snippet": r.snippet, "quotes": list(r.quotes)}
+            for r in data["state"]["web_results"]
+        ]
+        copy_dicts = bench(lambda: copy.deepcopy(as_dicts), args.repeat)
+        copy_recs = bench(lambda: copy.deepcopy(data["state"]["web_results"]), args.repeat)
+
+        plain = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        packed = _dumps(data)
+        assert _loads(packed)["state"]["web_results"] == data["state"]["web_results"]
+        write = bench(lambda: _dumps(data), args.repeat)
+        read = bench(lambda: _loads(packed), args.repeat)
+        held_plain = held_kb(lambda: pickle.loads(plain), args.sessions)
+        held_packed = held_kb(lambda: _loads(packed), args.sessions)
+        print(
+            f"{n:>8} {copy_dicts:9.2f}ms {copy_recs:8.2f}ms {len(plain) / 1024:7.0f}KB {len(packed) / 1024:7.0f}KB "
+            f"{write:7.2f}ms {read:7.2f}ms {held_plain:10.0f}KB {held_packed:10.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
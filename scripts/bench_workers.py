@@ -0,0 +1,128 @@
+"""
+Memory and throughput of the gunicorn deployment as workers scale.
+
+    python scripts/bench_workers.py --workers 1 2 4 8 --seconds 15
+
+For each worker count: start `gunicorn -c gunicorn.conf.py app:app`, warm every
+worker up, drive `--path` with `--clients` concurrent keep-alive clients, then
+read RSS and PSS of each worker from /proc (Linux). PSS divides shared pages
+between the processes mapping them, so it shows what preloading saves; RSS
+counts shared pages in full for every worker.
+
+The default path, /reports?q=..., embeds the query whenever the report index
+has entries, so it exercises the shared embedding model without calling the LLM.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _children(pid: int) -> List[int]:
+    out = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            out += [int(p) for p in f.read().split()]
+    return out
+
+
+def _mem_kb(pid: int) -> Dict[str, int]:
+    mem = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                mem[key] = int(rest.split()[0])
+    return mem
+
+
+def _wait_ready(base: str, timeout: float = 120.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(base + "/", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not come up")
+
+
+def _drive(url: str, clients: int, seconds: float) -> float:
+    done = [0] * clients
+    stop = time.monotonic() + seconds
+
+    def client(i: int) -> None:
+        s = requests.Session()
+        while time.monotonic() < stop:
+            if s.get(url, timeout=30).ok:
+                done[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done) / seconds
+
+
+def run(workers: int, args: argparse.Namespace) -> Dict[str, float]:
+    base = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{args.port}"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base)
+        # warm-up reaches every worker (lazy per-worker state, first-call costs)
+        _drive(base + args.path, clients=workers * 2, seconds=min(5.0, args.seconds))
+        rps = _drive(base + args.path, clients=args.clients, seconds=args.seconds)
+
+        mems = [_mem_kb(p) for p in _children(proc.pid)]
+        master = _mem_kb(proc.pid)
+        return {
+            "workers": workers,
+            "rps": rps,
+            "rss_mb": sum(m["Rss"] for m in mems) / len(mems) / 1024,
+            "pss_mb": sum(m["Pss"] for m in mems) / len(mems) / 1024,
+            "total_pss_mb": (sum(m["Pss"] for m in mems) + master["Pss"]) / 1024,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=15.0)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--path", default="/reports?q=python+asyncio+tutorial")
+    args = ap.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>9} {'RSS/worker':>11} {'PSS/worker':>11} {'total PSS':>10}")
+    for n in args.workers:
+        r = run(n, args)
+        print(
+            f"{r['workers']:>7} {r['rps']:>9.1f} {r['rss_mb']:>9.0f}MB "
+            f"{r['pss_mb']:>9.0f}MB {r['total_pss_mb']:>8.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
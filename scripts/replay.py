@@ -0,0 +1,117 @@
+"""
+Replay recorded sessions (IO_TRACE_ENABLED=true, .cache/traces/*.trace)
+through the real graph, with every Ollama / search / fetch / API / Qdrant
+call served from the trace.
+
+    python scripts/replay.py .cache/traces                  # as fast as possible
+    python scripts/replay.py .cache/traces --realtime       # with recorded latencies
+    python scripts/replay.py s1.trace s2.trace --repeat 5 --json before.json
+
+"fast" timings are pure pipeline cost (our CPU + local models): compare them
+between two checkouts to catch regressions. "realtime" re-creates the recorded
+waits, so wall time approximates the original session. Reports are written to
+a temporary directory, so report reuse never short-circuits a replay.
+Calls missing from a trace fail like an unreachable backend and are counted.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings  # noqa: E402
+from src.agent import SearchAgent  # noqa: E402
+from src.runtime.recording import Replayer, read_trace, replaying  # noqa: E402
+from src.runtime.resilience import new_deadline  # noqa: E402
+
+
+def trace_files(paths: List[str]) -> List[str]:
+    out: List[str] = []
+    for p in paths:
+        out.extend(sorted(glob.glob(os.path.join(p, "*.trace"))) if os.path.isdir(p) else [p])
+    return out
+
+
+def replay_session(graph, agent: SearchAgent, segments: List[Dict[str, Any]], realtime: bool) -> Dict[str, Any]:
+    state = None
+    misses = 0
+    recorded_io = 0.0
+    wall = cpu = 0.0
+    for seg in segments:
+        user_input = seg["input"]
+        if state is None:
+            state = agent._initial_state(user_input.get("query") or "")
+        elif "answer" in user_input:
+            state["user_approval_raw"] = user_input["answer"]
+        state["deadline"] = new_deadline()
+
+        replayer = Replayer(seg["events"], realtime=realtime)
+        w0, c0 = time.perf_counter(), time.process_time()
+        with replaying(replayer):
+            out = graph.invoke(state)
+        wall += time.perf_counter() - w0
+        cpu += time.process_time() - c0
+        state.update(out)
+        misses += replayer.misses
+        recorded_io += sum(ev[2] for ev in seg["events"])
+    return {
+        "segments": len(segments),
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "recorded_io_s": recorded_io,
+        "misses": misses,
+        "finished": bool(state and state.get("final_answer")),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", help="trace files or directories of *.trace")
+    ap.add_argument("--realtime", action="store_true", help="sleep the recorded latency of each call")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--json", help="also write per-session results here")
+    args = ap.parse_args()
+
+    files = trace_files(args.paths)
+    if not files:
+        sys.exit("no traces found")
+
+    settings.IO_TRACE_ENABLED = False
+    agent = SearchAgent()
+    graph = agent.build_graph()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="replay-reports-") as tmp:
+        for run in range(args.repeat):
+            for path in files:
+                settings.REPORTS_DIR = os.path.join(tmp, f"{run}-{len(results)}")
+                r = replay_session(graph, agent, read_trace(path), args.realtime)
+                r.update(trace=os.path.basename(path), run=run)
+                results.append(r)
+                print(
+                    f"{r['trace']:<40} run {run}  wall {r['wall_s']:7.3f}s  cpu {r['cpu_s']:7.3f}s  "
+                    f"recorded io {r['recorded_io_s']:7.3f}s  misses {r['misses']}"
+                    + ("" if r["finished"] else "  (not finished)")
+                )
+
+    wall = sum(r["wall_s"] for r in results)
+    cpu = sum(r["cpu_s"] for r in results)
+    misses = sum(r["misses"] for r in results)
+    mode = "realtime" if args.realtime else "fast"
+    print(f"\n{len(results)} sessions ({mode}): wall {wall:.3f}s, cpu {cpu:.3f}s, "
+          f"mean wall {wall / len(results):.3f}s, misses {misses}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "sessions": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,25 @@ from langgraph.graph import StateGraph, START, END
 
 from config import settings  # central config (model, paths, limits, etc.)
 from src.graph.state import AgentState
-from src.graph.router import route_after_handle_approval, route_after_guard
+from src.graph.router import (
+    route_after_guard,
+    route_after_handle_approval,
+    route_after_handle_reuse,
+    route_after_reuse,
+    route_start,
+)
 from src.rag.qdrant_sources import get_sources
+from src.runtime.profiling import maybe_profile
+from src.runtime.resilience import new_deadline
 
 from src.graph.nodes import (
     node_intent_guard,
     node_select_source,
     node_approval_interrupt,
     node_handle_approval,
+    node_reuse_report,
+    node_reuse_interrupt,
+    node_handle_reuse,
     node_web_search,
     node_generate_report_answer,
     node_save_report,           
@@ -31,12 +42,21 @@ class SearchAgent:
         g.add_node("approval", node_approval_interrupt)
         g.add_node("handle_approval", node_handle_approval)
 
+        g.add_node("reuse_report", node_reuse_report)
+        g.add_node("reuse_offer", node_reuse_interrupt)
+        g.add_node("handle_reuse", node_handle_reuse)
         g.add_node("web_search", node_web_search)
         g.add_node("generate_report_answer", node_generate_report_answer)
         g.add_node("save_report", node_save_report)
         g.add_node("compose_answer", node_compose_answer)
 
-        g.add_edge(START, "intent_guard")
+        # No checkpointer: every invoke starts here. An answer to the reuse offer
+        # skips straight back to it instead of re-running guard and approval.
+        g.add_conditional_edges(
+            START,
+            route_start,
+            {"resume_reuse": "reuse_offer", "new": "intent_guard"},
+        )
 
         g.add_conditional_edges(
             "intent_guard",
@@ -51,7 +71,19 @@ class SearchAgent:
         g.add_conditional_edges(
             "handle_approval",
             route_after_handle_approval,
-            {"approved": "web_search", "revise": "select_source"},
+            {"approved": "reuse_report", "revise": "select_source"},
+        )
+
+        g.add_conditional_edges(
+            "reuse_report",
+            route_after_reuse,
+            {"offer": "reuse_offer", "search": "web_search"},
+        )
+        g.add_edge("reuse_offer", "handle_reuse")
+        g.add_conditional_edges(
+            "handle_reuse",
+            route_after_handle_reuse,
+            {"reuse": "compose_answer", "search": "web_search"},
         )
 
         g.add_edge("web_search", "generate_report_answer")
@@ -66,6 +98,8 @@ class SearchAgent:
         # Keep this aligned with src/graph/state.py fields
         return {
             "user_query": user_query,
+            "deadline": new_deadline(),
+            "background": None,
 
             "candidate_source_id": None,
             "candidate_source_reason": None,
@@ -73,6 +107,7 @@ class SearchAgent:
 
             "user_approval_raw": None,
             "approved": None,
+            "auto_approved": None,
             "source_id": None,
 
             "user_format_pref": None,
@@ -83,11 +118,18 @@ class SearchAgent:
             "source_domain": None,
 
             "web_results": None,
+            "page_meta": None,
             "guard_blocked": None,
 
             "report_answer": None,
+            "report_error": None,
+            "evidence_tokens": None,
             "report_paths": None,
             "report_basename": None,
+            "report_version": None,
+            "reused_report": None,
+            "reuse_offer": None,
+            "reuse_answer": None,
 
             "final_answer": None,
         }
@@ -100,6 +142,8 @@ class SearchAgent:
         state = self._initial_state(user_query)
 
         while True:
+            # fresh budget per invocation: time spent waiting for the user doesn't count
+            state["deadline"] = new_deadline()
             out = app.invoke(state)
             state.update(out)
 
@@ -132,6 +176,8 @@ class SearchAgent:
         user_query: str,
         approval: Optional[str] = "y",
         format_pref: Optional[str] = None,
+        profile: bool = False,
+        reuse: Optional[str] = "y",
     ) -> AgentState:
         """
         Non-interactive mode: provides inputs up-front so the graph doesn't interrupt.
@@ -139,6 +185,8 @@ class SearchAgent:
 
         - approval: "y" / "n" / "github" / "arxiv" ...
         - format_pref: optional string that will be appended to source_query (via handle_format)
+        - profile: request a profile of this run (still subject to settings.PROFILE_*)
+        - reuse: answer to a recent-report offer: "y" reuses it, "n" searches again
         """
         app = self.build_graph()
         state = self._initial_state(user_query)
@@ -149,8 +197,13 @@ class SearchAgent:
 
         if approval:
             state["user_approval_raw"] = approval
+        if reuse:
+            state["reuse_answer"] = reuse
 
-        out = app.invoke(state)
+        with maybe_profile(profile) as prof:
+            out = app.invoke(state)
         state.update(out)
+        for p in prof:
+            p.save(settings.REPORTS_DIR, state.get("report_basename"))
 
         return state
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import random
+import re
+import zlib
+from typing import Any, List, Optional, Sequence, Tuple
+
+from config import settings
+from src.graph.results import WebResult
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is",
+    "it", "me", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where",
+    "which", "who", "why", "with", "find", "about", "show", "give", "some",
+}
+
+# -----------------------------
+# Token counting
+# -----------------------------
+
+_tokenizer: Any = None
+_tokenizer_loaded = False
+
+
+def _get_tokenizer():
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+        if settings.EVIDENCE_TOKENIZER:
+            try:
+                from tokenizers import Tokenizer
+
+                _tokenizer = Tokenizer.from_pretrained(settings.EVIDENCE_TOKENIZER)
+            except Exception:
+                _tokenizer = None
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Exact count with the configured HF tokenizer, else ~4 chars/token (BPE average for English)."""
+    tok = _get_tokenizer()
+    if tok is not None:
+        return len(tok.encode(text, add_special_tokens=False).ids)
+    return math.ceil(len(text) / 4)
+
+
+# -----------------------------
+# Near-duplicate detection (MinHash over word 3-shingles)
+# -----------------------------
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(64)]
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def content_terms(text: str) -> List[str]:
+    """Lower-cased words of `text` without stop words or repeats, in order."""
+    return list(dict.fromkeys(t for t in _words(text) if t not in _STOPWORDS))
+
+
+def _minhash(text: str) -> Tuple[int, ...]:
+    w = _words(text)
+    shingles = {" ".join(w[i:i + 3]) for i in range(max(1, len(w) - 2))}
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def _similar(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class _Dedup:
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.seen: List[Tuple[int, ...]] = []
+
+    def is_new(self, text: str) -> bool:
+        if not _words(text):
+            return False
+        sig = _minhash(text)
+        if any(_similar(sig, s) >= self.threshold for s in self.seen):
+            return False
+        self.seen.append(sig)
+        return True
+
+
+# -----------------------------
+# Packing
+# -----------------------------
+
+def _relevance(query_terms: set, text: str) -> float:
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(_words(text))) / len(query_terms)
+
+
+def evidence_budget(prompt_overhead_tokens: int) -> int:
+    return max(
+        0,
+        settings.LLM_CONTEXT_TOKENS - settings.REPORT_ANSWER_RESERVE_TOKENS - prompt_overhead_tokens,
+    )
+
+
+def pack_evidence(
+    query: str,
+    web_results: Sequence[WebResult],
+    budget_tokens: int,
+    threshold: Optional[float] = None,
+) -> Tuple[str, int]:
+    """
+    Build the evidence block for the report prompt within `budget_tokens`:
+    near-duplicate snippets/quotes are dropped, results are ordered by lexical
+    relevance to `query` (search rank breaks ties), and quotes are packed
+    most-relevant first until the budget runs out. Returns (text, tokens).
+    """
+    threshold = settings.EVIDENCE_DEDUP_THRESHOLD if threshold is None else threshold
+    terms = set(content_terms(query))
+    dedup = _Dedup(threshold)
+
+    ranked = []
+    for rank, r in enumerate(web_results):
+        snippet = r.snippet
+        quotes = [q for q in r.quotes if dedup.is_new(q)]
+        if snippet and not dedup.is_new(snippet):
+            snippet = ""
+        text = " ".join([r.title, snippet, *quotes])
+        ranked.append((-_relevance(terms, text), rank, r, snippet, quotes))
+    ranked.sort(key=lambda x: (x[0], x[1]))
+
+    parts: List[str] = []
+    used = 0
+    n = 0
+    for _neg, _rank, r, snippet, quotes in ranked:
+        header = (
+            f"\nResult {n + 1}:\n"
+            f"Title: {r.title}\n"
+            f"URL: {r.url}\n"
+            f"Snippet: {snippet}\n"
+            f"Quotes:\n"
+        )
+        cost = count_tokens(header)
+        if used + cost > budget_tokens:
+            break
+        parts.append(header)
+        used += cost
+        n += 1
+
+        for q in sorted(quotes, key=lambda q: -_relevance(terms, q)):
+            line = f"- \"{q}\"\n"
+            cost = count_tokens(line)
+            if used + cost > budget_tokens:
+                continue
+            parts.append(line)
+            used += cost
+
+    text = "".join(parts)
+    return text, count_tokens(text) if _get_tokenizer() is not None else used
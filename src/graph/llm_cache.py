@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+
+def cache_key(model: str, prompt: str, options: Optional[Dict[str, Any]]) -> str:
+    raw = json.dumps([model, prompt, options or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM completions: in-memory LRU in front of an optional
+    SQLite file (shared by all workers on the host). Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_items: int, ttl: float, db_path: str = ""):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._mem[key] = (created_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                if now - item[0] <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self.hits_mem += 1
+                    return item[1]
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created_at, response FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[0] <= self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.hits_disk += 1
+                    return row[1]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, created_at, response) VALUES (?, ?, ?)",
+                    (key, now, value),
+                )
+                self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits_mem + self.hits_disk + self.misses
+            return {
+                "hits_mem": self.hits_mem,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_ratio": (self.hits_mem + self.hits_disk) / lookups if lookups else 0.0,
+                "size_mem": len(self._mem),
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    max_items=settings.LLM_CACHE_MAX_ITEMS,
+                    ttl=settings.LLM_CACHE_TTL_SECONDS,
+                    db_path=settings.LLM_CACHE_DB,
+                )
+    return _cache
+
+
+def cache_enabled_for(node: Optional[str]) -> bool:
+    if not settings.LLM_CACHE_ENABLED or not node:
+        return False
+    nodes = {n.strip() for n in settings.LLM_CACHE_NODES.split(",") if n.strip()}
+    return node in nodes
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+# Lower value = served first
+PRIORITY_GUARD = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_REPORT = 10
+PRIORITY_BACKGROUND = 100
+
+
+# How often a waiter with a cancel event looks at it
+CANCEL_POLL_SECONDS = 0.05
+
+
+class LLMQueueTimeout(TimeoutError):
+    pass
+
+
+class LLMQueueCancelled(RuntimeError):
+    pass
+
+
+# Cancel event for the generations queued from this context (see cancel_scope)
+_cancel: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("llm_cancel", default=None)
+
+
+@contextlib.contextmanager
+def cancel_scope(event: threading.Event) -> Iterator[None]:
+    """Generations queued inside this block give up their place once `event` is set."""
+    token = _cancel.set(event)
+    try:
+        yield
+    finally:
+        _cancel.reset(token)
+
+
+class LLMScheduler:
+    """
+    Bounds concurrent generations against the local Ollama and admits waiters
+    in priority order (FIFO within a priority), so short interactive prompts
+    are not stuck behind long report generations.
+    """
+
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max(1, max_inflight)
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._inflight = 0
+
+        self.admitted = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _leave(self, entry: Tuple[int, int]) -> None:
+        self._heap.remove(entry)
+        heapq.heapify(self._heap)
+        # the waiter behind us may be first now
+        self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(
+        self,
+        priority: int = PRIORITY_DEFAULT,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[None]:
+        """
+        Hold one of the generation slots. Raises LLMQueueTimeout after waiting
+        `timeout` seconds, or LLMQueueCancelled once `cancel` (default: the
+        cancel_scope event) is set; either way the waiter leaves the queue.
+        A generation already admitted is not interrupted.
+        """
+        cancel = cancel or _cancel.get()
+        entry = (priority, next(self._seq))
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    self._leave(entry)
+                    self.cancelled += 1
+                    raise LLMQueueCancelled("LLM queue wait cancelled")
+                if self._inflight < self.max_inflight and self._heap[0] == entry:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._leave(entry)
+                    self.timeouts += 1
+                    raise LLMQueueTimeout(f"LLM queue wait exceeded {timeout:.1f}s")
+                if cancel is not None:
+                    remaining = CANCEL_POLL_SECONDS if remaining is None else min(remaining, CANCEL_POLL_SECONDS)
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._heap)
+            self._inflight += 1
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            # the next waiter may fit too
+            self._cond.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_inflight": self.max_inflight,
+                "in_flight": self._inflight,
+                "queue_depth": len(self._heap),
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "wait_avg_s": self.wait_total / self.admitted if self.admitted else 0.0,
+                "wait_max_s": self.wait_max,
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(settings.LLM_MAX_INFLIGHT)
+    return _scheduler
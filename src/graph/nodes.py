@@ -1,32 +1,81 @@
-from typing import Dict, Any
+import json
+import time
+from typing import Dict, Any, Tuple
 from langgraph.types import interrupt
 
 from src.graph.state import AgentState
 from src.rag.qdrant_sources import pick_source, get_sources
 from src.graph.ollama import call_ollama
+from src.graph.llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_GUARD, PRIORITY_REPORT
+from src.graph.evidence import count_tokens, evidence_budget, pack_evidence
+from src.graph.profiles import profile_for
+from src.graph.query_plan import plan_queries, preference_key
+from src.graph.results import WebResult, result_digest
+from src.rag.approvals import approval_prior, auto_approvable, record_approval
+from src.rag.embeddings import encode
 
 from src.reports.generate_report import save_reports
+from src.reports.index import add_report, find_reusable
+from src.reports.store import report_id_from_base
 
-from src.web.tools import web_search_allowed, fetch_page_text, pick_short_quotes
+from src.web.adapters import adapter_search
+from src.web.tools import Page, web_search_multi, fetch_pages
+from src.web.urls import dedup_results
 
-from config import settings, INTENT_GUARD_PROMPT, REPORT_ANSWER_PROMPT, FORMAT_QUESTION
+from config import settings, INTENT_GUARD_PROMPT, INTENT_GUARD_JSON_PROMPT, REPORT_ANSWER_PROMPT, FORMAT_QUESTION
 
 
-def node_intent_guard(state: AgentState) -> Dict[str, Any]:
-    prompt = INTENT_GUARD_PROMPT.format(user_query=state["user_query"])
+def _priority(state: AgentState, default: int) -> int:
+    # pre-warm runs (state["background"]) queue behind every interactive request
+    return PRIORITY_BACKGROUND if state.get("background") else default
+
 
-    text = call_ollama(prompt, model=settings.OLLAMA_MODEL)
+def _parse_guard(text: str) -> Tuple[bool, str]:
+    """(allow, reason) from JSON guard output, or from ALLOW:/REASON: lines."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and "allow" in data:
+        allow = data["allow"]
+        if isinstance(allow, str):
+            allow = allow.strip().lower() in {"yes", "true"}
+        return bool(allow), str(data.get("reason") or "OK").strip()
 
     allow = "yes"
     reason = "OK"
-
     for line in text.splitlines():
         if line.startswith("ALLOW:"):
             allow = line.replace("ALLOW:", "").strip().lower()
         if line.startswith("REASON:"):
             reason = line.replace("REASON:", "").strip()
+    return allow == "yes", reason
 
-    if allow != "yes":
+
+def node_intent_guard(state: AgentState) -> Dict[str, Any]:
+    profile = profile_for("intent_guard")
+    template = INTENT_GUARD_JSON_PROMPT if profile.format is not None else INTENT_GUARD_PROMPT
+    prompt = template.format(user_query=state["user_query"])
+
+    try:
+        text = call_ollama(
+            prompt,
+            model=profile.model,
+            options=profile.options,
+            fmt=profile.format,
+            node="intent_guard",
+            priority=_priority(state, PRIORITY_GUARD),
+            deadline=state.get("deadline"),
+        )
+    except Exception:
+        # LLM down / overloaded / out of time: fail fast instead of holding the worker
+        return {
+            "guard_blocked": True,
+            "final_answer": "Sorry — the language model is unavailable right now. Please try again shortly.",
+        }
+
+    allow, reason = _parse_guard(text)
+    if not allow:
         return {
             "guard_blocked": True,
             "final_answer": f"Sorry — I can’t help with that request. {reason}",
@@ -39,14 +88,34 @@ def node_select_source(state: AgentState) -> Dict[str, Any]:
     q = (state.get("source_query") or state["user_query"]).strip()
     excluded = state.get("rejected_source_ids") or []
 
-    source_id, reason = pick_source(q, alpha=0.65, exclude=excluded)
+    # One embedding of the question for both the prior and dense retrieval
+    try:
+        qvec = encode([state["user_query"]])[0]
+    except Exception:
+        qvec = None
+
+    # What users approved for similar questions; the history is only a hint
+    try:
+        prior, votes = approval_prior(state["user_query"], qvec=qvec)
+    except Exception:
+        prior, votes = {}, 0
+
+    source_id, reason = pick_source(
+        q,
+        alpha=0.65,
+        exclude=excluded,
+        prior=prior,
+        prior_weight=settings.APPROVAL_PRIOR_WEIGHT,
+        # a stated preference changes the retrieval text: encoded by pick_source then
+        qvec=qvec if q == state["user_query"].strip() else None,
+    )
 
     sources = get_sources()
     domain = sources[source_id]["domain"]
 
     confirmation = f"Use {source_id} ({domain})? (y/n or type another source_id)"
 
-    return {
+    out = {
         "candidate_source_id": source_id,
         "candidate_source_reason": reason,
         "approval_question": confirmation,
@@ -55,8 +124,17 @@ def node_select_source(state: AgentState) -> Dict[str, Any]:
         "source_domain": domain,
         "final_answer": None,
         "need_format": None,
+        "auto_approved": False,
     }
 
+    # Only the first proposal, and never over an answer the caller already gave
+    conf = None if excluded else auto_approvable(prior, votes, source_id)
+    if conf is not None and not (state.get("user_approval_raw") or "").strip():
+        out["user_approval_raw"] = "y"
+        out["auto_approved"] = True
+        out["candidate_source_reason"] = f"{reason}; auto-approved ({conf:.0%} of {votes} similar questions)"
+    return out
+
 
 def node_approval_interrupt(state: AgentState) -> Any:
     if (state.get("user_approval_raw") or "").strip():
@@ -95,6 +173,19 @@ def node_handle_format(state: AgentState) -> Dict[str, Any]:
     }
 
 
+def _remember_approval(state: AgentState, approved: str) -> None:
+    # (first proposal, final choice); auto-approvals would only echo the prior back,
+    # and pre-warm runs approve whatever was proposed
+    if state.get("auto_approved") or state.get("background"):
+        return
+    rejected = state.get("rejected_source_ids") or []
+    proposed = rejected[0] if rejected else (state.get("candidate_source_id") or approved)
+    try:
+        record_approval(state["user_query"], proposed, approved)
+    except Exception:
+        pass
+
+
 def node_handle_approval(state: AgentState) -> Dict[str, Any]:
     raw = (state.get("user_approval_raw") or "").strip()
     if not raw:
@@ -105,9 +196,11 @@ def node_handle_approval(state: AgentState) -> Dict[str, Any]:
     low = raw.lower()
 
     if low in {"y", "yes", "да", "ok", "ага"}:
+        _remember_approval(state, candidate)
         return {"approved": True, "source_id": candidate, "user_approval_raw": None}
 
     if low in sources:
+        _remember_approval(state, low)
         return {"approved": True, "source_id": low, "user_approval_raw": None}
 
     rejected = list(state.get("rejected_source_ids") or [])
@@ -131,26 +224,103 @@ def node_handle_approval(state: AgentState) -> Dict[str, Any]:
     }
 
 
+def _age(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))} min"
+    return f"{int(seconds // 3600)} h"
+
+
+def node_reuse_report(state: AgentState) -> Dict[str, Any]:
+    if not settings.REPORT_REUSE_ENABLED:
+        return {"reused_report": False, "reuse_offer": None}
+
+    sid = state.get("source_id") or state.get("candidate_source_id") or "wikipedia"
+    pref = preference_key(state.get("source_query"))
+    hit = find_reusable(settings.REPORTS_DIR, state["user_query"], sid, pref)
+    if not hit:
+        return {"reused_report": False, "reuse_offer": None}
+
+    question = (
+        f"A report from {_age(time.time() - hit['created_at'])} ago answers a near-identical question: "
+        f"\"{hit['user_query']}\". Use it instead of searching again? (y/n)"
+    )
+    return {
+        "reuse_offer": {"base": hit["base"], "md": hit["md"], "html": hit["html"], "question": question},
+    }
+
+
+def node_reuse_interrupt(state: AgentState) -> Any:
+    # answered up front (run_once, pre-warm) or by the user on the previous invoke
+    if (state.get("reuse_answer") or state.get("user_approval_raw") or "").strip():
+        return {}
+    return interrupt({"question": (state.get("reuse_offer") or {}).get("question") or "Use the earlier report? (y/n)"})
+
+
+def node_handle_reuse(state: AgentState) -> Dict[str, Any]:
+    raw = (state.get("reuse_answer") or state.get("user_approval_raw") or "").strip().lower()
+    offer = state.get("reuse_offer") or {}
+    out: Dict[str, Any] = {"reuse_offer": None, "user_approval_raw": None, "reused_report": False}
+    if raw in {"y", "yes", "да", "ok", "ага"} and offer:
+        out.update(
+            reused_report=True,
+            report_paths={"md": offer["md"], "html": offer["html"]},
+            report_basename=offer["base"],
+        )
+    return out
+
+
 def node_web_search(state: AgentState) -> Dict[str, Any]:
     sid = state.get("source_id") or state.get("candidate_source_id") or "wikipedia"
     sources = get_sources()
     domain = sources.get(sid, {}).get("domain", "")
     query = (state.get("source_query") or state["user_query"])
 
-    results = web_search_allowed(query, domain, max_results=settings.WEB_MAX_RESULTS)
+    deadline = state.get("deadline")
+
+    # Structured API for known sources: one or two JSON/Atom calls, no HTML to scrape
+    structured = adapter_search(sid, query, limit=settings.ENRICH_TOP_K, deadline=deadline)
+    if structured:
+        structured = structured[:settings.ENRICH_TOP_K]
+        # No pages to revalidate: the API call is the check, each record compared by content digest
+        page_meta = {
+            r.url: {"etag": "", "last_modified": "", "digest": result_digest(r), "quotes": list(r.quotes)}
+            for r in structured
+        }
+        return {"web_results": structured, "page_meta": page_meta}
+
+    # A few focused sub-queries searched concurrently, fused by reciprocal rank
+    queries = plan_queries(query, domain, deadline=deadline, priority=_priority(state, PRIORITY_GUARD))
+    results = web_search_multi(queries, domain, max_results=settings.WEB_MAX_RESULTS, deadline=deadline)
+
+    # Same page under several URLs (mobile host, pdf vs abs, tracking params) is fetched once;
+    # dropping duplicates before the cut lets the next distinct hits take their slots
+    top = dedup_results(results)[:settings.ENRICH_TOP_K]
+    # Pages seen by an earlier run of this report (refresh): revalidated, not re-parsed
+    cached = {
+        url: Page("", list(m.get("quotes") or ()), m.get("etag", ""), m.get("last_modified", ""), m.get("digest", ""))
+        for url, m in (state.get("page_meta") or {}).items()
+    }
+    # degrade to snippet-only results for pages that can't be fetched in time
+    pages = fetch_pages(
+        [r["url"] for r in top],
+        timeout=settings.FETCH_TIMEOUT_SECONDS,
+        max_chars=settings.MAX_PAGE_CHARS,
+        deadline=deadline,
+        cached=cached,
+    )
 
-    enriched = []
-    for r in results[:settings.ENRICH_TOP_K]:
-        text = fetch_page_text(r["url"], max_chars=settings.MAX_PAGE_CHARS)
-        quotes = pick_short_quotes(text, max_quotes=2)
-        enriched.append({
-            "title": r["title"],
-            "url": r["url"],
-            "snippet": r["snippet"],
-            "quotes": quotes,
-        })
+    enriched = [
+        WebResult.make(r["title"], r["url"], r["snippet"], p.quotes)
+        for r, p in zip(top, pages)
+    ]
+    page_meta = {
+        r["url"]: {"etag": p.etag, "last_modified": p.last_modified, "digest": p.digest, "quotes": list(p.quotes)}
+        for r, p in zip(top, pages)
+        if p.digest
+    }
 
-    return {"web_results": enriched}
+    # delta: merge_web_results appends these to the state's results
+    return {"web_results": enriched, "page_meta": page_meta}
 
 
 def node_generate_report_answer(state: AgentState) -> Dict[str, Any]:
@@ -160,17 +330,17 @@ def node_generate_report_answer(state: AgentState) -> Dict[str, Any]:
 
     web_results = state.get("web_results") or []
 
-    evidence = ""
-    for i, r in enumerate(web_results, 1):
-        evidence += (
-            f"\nResult {i}:\n"
-            f"Title: {r.get('title')}\n"
-            f"URL: {r.get('url')}\n"
-            f"Snippet: {r.get('snippet')}\n"
-            f"Quotes:\n"
-        )
-        for q in (r.get("quotes") or []):
-            evidence += f"- \"{q}\"\n"
+    overhead = count_tokens(REPORT_ANSWER_PROMPT.format(
+        user_query=state["user_query"],
+        source_id=sid,
+        source_domain=domain,
+        evidence="",
+    ))
+    evidence, evidence_tokens = pack_evidence(
+        state["user_query"],
+        web_results,
+        budget_tokens=evidence_budget(overhead),
+    )
 
     prompt = REPORT_ANSWER_PROMPT.format(
         user_query=state["user_query"],
@@ -179,12 +349,36 @@ def node_generate_report_answer(state: AgentState) -> Dict[str, Any]:
         evidence=evidence,
     )
 
-    text = call_ollama(prompt, model=settings.OLLAMA_MODEL)
-    return {"report_answer": text}
+    profile = profile_for("report_answer")
+    try:
+        text = call_ollama(
+            prompt,
+            model=profile.model,
+            options=profile.options,
+            node="report_answer",
+            priority=_priority(state, PRIORITY_REPORT),
+            deadline=state.get("deadline"),
+        )
+    except Exception as e:
+        # still write the report: evidence without the synthesized answer
+        text = f"(No answer generated: the language model was unavailable — {type(e).__name__}.)"
+        return {"report_answer": text, "report_error": type(e).__name__, "evidence_tokens": evidence_tokens}
+    return {"report_answer": text, "report_error": None, "evidence_tokens": evidence_tokens}
 
 
 def node_save_report(state: AgentState) -> Dict[str, Any]:
     paths = save_reports(state, out_dir=settings.REPORTS_DIR)
+    add_report(
+        settings.REPORTS_DIR,
+        rid=report_id_from_base(paths["base"]),
+        base=paths["base"],
+        user_query=state["user_query"],
+        source_id=state.get("source_id") or state.get("candidate_source_id"),
+        md_path=paths["md"],
+        html_path=paths["html"],
+        pref=preference_key(state.get("source_query")),
+        background=bool(state.get("background")),
+    )
     return {
         "report_paths": {"md": paths["md"], "html": paths["html"]},
         "report_basename": paths["base"],
@@ -196,7 +390,10 @@ def node_compose_answer(state: AgentState) -> Dict[str, Any]:
     md_path = paths.get("md")
     html_path = paths.get("html")
 
-    msg = "I wrote a report for your question."
+    if state.get("reused_report"):
+        msg = "I found a recent report for a near-identical question."
+    else:
+        msg = "I wrote a report for your question."
     if html_path:
         msg += f"\nHTML: {html_path}"
     if md_path:
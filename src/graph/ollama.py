@@ -1,7 +1,98 @@
-import subprocess
+from typing import Any, Dict, Optional
 
+import requests
 
-def call_ollama(prompt: str, model: str = "qwen2.5:3b") -> str:
-    r = subprocess.run(["ollama", "run", model, prompt], capture_output=True, text=True)
-    return (r.stdout or "").strip()
-    
\ No newline at end of file
+from config import settings
+from src.graph.llm_cache import cache_enabled_for, cache_key, get_llm_cache
+from src.graph.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_DEFAULT,
+    LLMQueueCancelled,
+    LLMQueueTimeout,
+    get_scheduler,
+)
+from src.runtime.recording import capturing, external
+from src.runtime.resilience import CircuitOpen, DeadlineExceeded, breaker, time_left
+from src.runtime.singleflight import flight
+
+
+def _post_generate(
+    prompt: str,
+    model: str,
+    options: Dict[str, Any],
+    fmt: Optional[Any],
+    timeout: Optional[float],
+) -> str:
+    body = {"model": model, "prompt": prompt, "stream": False, "options": options}
+    if fmt is not None:
+        body["format"] = fmt  # "json" or a JSON schema
+    r = requests.post(f"{settings.OLLAMA_HOST.rstrip('/')}/api/generate", json=body, timeout=timeout)
+    r.raise_for_status()
+    return (r.json().get("response") or "").strip()
+
+
+def _generate(
+    prompt: str,
+    model: str,
+    options: Dict[str, Any],
+    fmt: Optional[Any],
+    priority: int,
+    deadline: Optional[float],
+) -> str:
+    ollama = breaker("ollama")
+    if ollama.state == "open":
+        # fail fast without queueing behind a dead backend
+        raise CircuitOpen("circuit 'ollama' is open")
+
+    # Waiting for a slot counts against the queue timeout; the HTTP call has its own
+    with get_scheduler().slot(priority, timeout=time_left(deadline, settings.LLM_QUEUE_TIMEOUT_SECONDS)):
+        timeout = time_left(deadline, settings.LLM_REQUEST_TIMEOUT_SECONDS)
+        return ollama.call(_post_generate, prompt, model, options, fmt, timeout)
+
+
+def call_ollama(
+    prompt: str,
+    model: str = "qwen2.5:3b",
+    options: Optional[Dict[str, Any]] = None,
+    node: Optional[str] = None,
+    priority: int = PRIORITY_DEFAULT,
+    deadline: Optional[float] = None,
+    fmt: Optional[Any] = None,
+) -> str:
+    """
+    Generate a completion via the Ollama HTTP API.
+    `node` names the calling graph node; it decides whether the response cache is used
+    (settings.LLM_CACHE_NODES). Cached calls are pinned to temperature=0 and a fixed seed.
+    `priority` orders admission to the LLM scheduler (lower = sooner); `deadline`
+    (epoch seconds) caps both the queue wait and the HTTP timeout. `fmt` is Ollama's
+    structured-output `format` ("json" or a JSON schema).
+    """
+    options = dict(options or {})
+    cached = cache_enabled_for(node)
+    if cached:
+        options["temperature"] = 0
+        options["seed"] = settings.LLM_SEED
+
+    key = cache_key(model, prompt, options if fmt is None else {**options, "format": fmt})
+    # While recording/replaying an I/O trace every generation goes to "Ollama",
+    # so a trace doesn't depend on what the response cache held at the time
+    use_cache = cached and not capturing()
+    if use_cache:
+        hit = get_llm_cache().get(key)
+        if hit is not None:
+            return hit
+
+    # Identical in-flight generations share one request to Ollama. Background work
+    # (pre-warm) has flights of its own: an interactive caller never queues behind it.
+    # A follower waits only as long as its own deadline allows, and a leader that ran
+    # out of *its* time (deadline / queue wait) or was cancelled makes the follower try again itself.
+    flight_key = (key, priority >= PRIORITY_BACKGROUND)
+    wait = time_left(deadline, settings.LLM_QUEUE_TIMEOUT_SECONDS + settings.LLM_REQUEST_TIMEOUT_SECONDS)
+    text = external(
+        "llm", key,
+        flight("llm").do_bounded, flight_key, wait, (DeadlineExceeded, LLMQueueTimeout, LLMQueueCancelled),
+        _generate, prompt, model, options, fmt, priority, deadline,
+    )
+    if use_cache and text:
+        get_llm_cache().put(key, text)
+    return text
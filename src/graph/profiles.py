@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from config import settings, INTENT_GUARD_SCHEMA
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Model + Ollama options (+ optional output format) for one graph node."""
+
+    model: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    format: Optional[Any] = None
+
+
+def _options(num_predict: int, temperature: float, num_ctx: int = 0, stop=None) -> Dict[str, Any]:
+    opts: Dict[str, Any] = {"temperature": temperature}
+    if num_predict > 0:
+        opts["num_predict"] = num_predict
+    if num_ctx > 0:
+        opts["num_ctx"] = num_ctx
+    if stop:
+        opts["stop"] = list(stop)
+    return opts
+
+
+def profile_for(node: str) -> GenerationProfile:
+    if node == "intent_guard":
+        return GenerationProfile(
+            model=settings.GUARD_MODEL or settings.OLLAMA_MODEL,
+            options=_options(
+                settings.GUARD_NUM_PREDICT,
+                settings.GUARD_TEMPERATURE,
+                settings.GUARD_NUM_CTX,
+                settings.GUARD_STOP,
+            ),
+            format=INTENT_GUARD_SCHEMA if settings.GUARD_JSON else None,
+        )
+    if node == "report_answer":
+        return GenerationProfile(
+            model=settings.OLLAMA_MODEL,
+            options=_options(
+                settings.REPORT_NUM_PREDICT,
+                settings.REPORT_TEMPERATURE,
+                settings.LLM_CONTEXT_TOKENS,
+                settings.REPORT_STOP,
+            ),
+        )
+    if node == "query_plan":
+        return GenerationProfile(
+            model=settings.OLLAMA_MODEL,
+            options=_options(settings.QUERY_PLAN_NUM_PREDICT, 0.0),
+        )
+    return GenerationProfile(model=settings.OLLAMA_MODEL)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from config import settings, QUERY_REWRITE_PROMPT
+from src.graph.evidence import content_terms
+from src.graph.ollama import call_ollama
+from src.graph.llm_scheduler import PRIORITY_GUARD
+from src.graph.profiles import profile_for
+
+# Lines the approval / format steps append to source_query
+_HINT_RE = re.compile(r"^\s*(?:User preference|Preferred format)\s*:\s*(.*)$", re.I)
+_LIST_PREFIX_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_MAX_TERMS = 8
+
+# Question scaffolding that adds nothing to a keyword query (on top of evidence's stop words)
+_FILLER = {
+    "do", "does", "did", "can", "could", "should", "would", "will", "my", "your", "you", "we",
+    "our", "please", "tell", "explain", "need", "want", "get", "there", "any", "best", "way", "ways",
+}
+
+
+def split_source_query(source_query: str) -> Tuple[str, List[str]]:
+    """(the user's question, preference hints) from a source_query built by the approval nodes."""
+    question: List[str] = []
+    hints: List[str] = []
+    for line in (source_query or "").splitlines():
+        m = _HINT_RE.match(line)
+        if m:
+            if m.group(1).strip():
+                hints.append(m.group(1).strip())
+        elif line.strip():
+            question.append(line.strip())
+    return " ".join(question), hints
+
+
+def preference_key(source_query: Optional[str]) -> str:
+    """The user's stated preferences, normalized: "" when there are none. Reports are reused only on a match."""
+    _, hints = split_source_query(source_query or "")
+    return "; ".join(" ".join(h.lower().split()) for h in hints)
+
+
+def _keyword_queries(question: str, hints: List[str]) -> List[str]:
+    terms = [t for t in content_terms(question) if t not in _FILLER][:_MAX_TERMS]
+    hint_terms = [t for t in content_terms(" ".join(hints)) if t not in _FILLER and t not in terms]
+
+    queries = [question]
+    if terms:
+        queries.append(" ".join(terms))
+    if hint_terms:
+        queries.append(" ".join(terms[:5] + hint_terms[:3]))
+    if len(terms) > 3:
+        # the leading content words usually carry the topic
+        queries.append(" ".join(terms[:3]))
+    return queries
+
+
+def _llm_queries(source_query: str, domain: str, n: int, deadline: Optional[float], priority: int) -> List[str]:
+    prompt = QUERY_REWRITE_PROMPT.format(n=n, source_domain=domain, source_query=source_query)
+    profile = profile_for("query_plan")
+    try:
+        text = call_ollama(
+            prompt,
+            model=profile.model,
+            options=profile.options,
+            node="query_plan",
+            priority=priority,
+            deadline=deadline,
+        )
+    except Exception:
+        return []
+    out = []
+    for line in text.splitlines():
+        q = _LIST_PREFIX_RE.sub("", line).strip().strip('"')
+        if q and not q.lower().startswith("site:"):
+            out.append(q)
+    return out[:n]
+
+
+def plan_queries(
+    source_query: str,
+    domain: str = "",
+    max_queries: Optional[int] = None,
+    deadline: Optional[float] = None,
+    priority: int = PRIORITY_GUARD,
+) -> List[str]:
+    """
+    A few focused search queries for one request: the question itself, its
+    keywords, keywords + the user's stated preference, and (optionally) LLM
+    rewrites. Case-insensitive duplicates are dropped; the first query is
+    always the question without the appended preference lines.
+    """
+    n = max(1, settings.QUERY_PLAN_MAX_QUERIES if max_queries is None else max_queries)
+    question, hints = split_source_query(source_query)
+    if not question:
+        return []
+
+    queries = _keyword_queries(question, hints)
+    if settings.QUERY_REWRITE_LLM and n > 1:
+        # right after the question: rewrites tend to beat bare keyword lists
+        queries[1:1] = _llm_queries(source_query, domain, n - 1, deadline, priority)
+
+    seen = set()
+    plan = []
+    for q in queries:
+        key = " ".join(q.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            plan.append(q)
+    return plan[:n]
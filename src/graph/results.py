@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.web.urls import canonical_url
+
+
+@dataclass(frozen=True, slots=True)
+class WebResult:
+    """One piece of evidence. Immutable, so graph state can share it instead of copying."""
+
+    title: str
+    url: str
+    snippet: str = ""
+    quotes: Tuple[str, ...] = ()
+
+    @classmethod
+    def make(
+        cls,
+        title: Optional[str],
+        url: Optional[str],
+        snippet: Optional[str] = "",
+        quotes: Iterable[str] = (),
+    ) -> "WebResult":
+        # Interned: the same URL / quote seen by several results or sessions is stored once
+        return cls(
+            title=sys.intern((title or "").strip()),
+            url=sys.intern((url or "").strip()),
+            snippet=(snippet or "").strip(),
+            quotes=tuple(sys.intern(q.strip()) for q in quotes if q and q.strip()),
+        )
+
+    # Immutable: copies are the record itself; pickle via the constructor, not slot state
+    def __copy__(self) -> "WebResult":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "WebResult":
+        return self
+
+    def __reduce__(self):
+        return (WebResult, (self.title, self.url, self.snippet, self.quotes))
+
+
+def merge_web_results(
+    left: Optional[Sequence[WebResult]],
+    right: Optional[Sequence[WebResult]],
+) -> Tuple[WebResult, ...]:
+    """
+    AgentState reducer for `web_results`: nodes return only the results they add
+    (a delta) and they are appended; returning None clears the list.
+    """
+    if right is None:
+        return ()
+    if not left:
+        return tuple(right)
+    return (*left, *right)
+
+
+def result_digest(r: WebResult) -> str:
+    """
+    Content digest of a result that came with its evidence (a structured API
+    record, nothing fetched): its title and quotes. The snippet is left out;
+    for those sources it holds counters (stars, score, comments) that move
+    without the content changing.
+    """
+    return hashlib.sha1("\x1f".join((r.title, *r.quotes)).encode("utf-8")).hexdigest()
+
+
+def evidence_digest(results: Sequence[WebResult], page_meta: Optional[Dict[str, Dict]] = None) -> str:
+    """
+    Fingerprint of the evidence a report answer is generated from: the set of
+    pages (by canonical URL), each by its body digest (from `page_meta`) or else
+    its quotes. Rank order, search-engine titles/snippets and which of a page's
+    URLs the search returned vary between identical searches, so they are left out.
+    """
+    page_meta = page_meta or {}
+    items = sorted({
+        (canonical_url(r.url), (page_meta.get(r.url) or {}).get("digest") or "\x1f".join(r.quotes))
+        for r in results
+    })
+    h = hashlib.sha1()
+    for url, content in items:
+        h.update(f"{url}\x1f{content}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+
+# -----------------------------
+# Compact binary form: a deduplicated string table + u32 indices
+#   magic | n_strings | char lengths[n] | utf-8 blob | n_results | records
+#   record = title, url, snippet, n_quotes, quote...
+# -----------------------------
+
+_MAGIC = b"WR\x01"
+_U32 = struct.Struct("<I")
+
+
+def pack_results(results: Sequence[WebResult]) -> bytes:
+    strings: Dict[str, int] = {}
+
+    def ref(s: str) -> int:
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    recs: List[int] = []
+    for r in results:
+        recs += (ref(r.title), ref(r.url), ref(r.snippet), len(r.quotes))
+        recs += [ref(q) for q in r.quotes]
+
+    blob = "".join(strings).encode("utf-8")
+    return b"".join((
+        _MAGIC,
+        _U32.pack(len(strings)),
+        struct.pack(f"<{len(strings)}I", *map(len, strings)),
+        _U32.pack(len(blob)),
+        blob,
+        _U32.pack(len(results)),
+        struct.pack(f"<{len(recs)}I", *recs),
+    ))
+
+
+def unpack_results(data: bytes) -> List[WebResult]:
+    if data[:3] != _MAGIC:
+        raise ValueError("not a packed web results blob")
+    pos = 3
+    (n_strings,) = _U32.unpack_from(data, pos)
+    pos += 4
+    lengths = struct.unpack_from(f"<{n_strings}I", data, pos)
+    pos += 4 * n_strings
+    (n_blob,) = _U32.unpack_from(data, pos)
+    pos += 4
+    text = data[pos:pos + n_blob].decode("utf-8")
+    pos += n_blob
+
+    strings: List[str] = []
+    off = 0
+    for n in lengths:
+        strings.append(sys.intern(text[off:off + n]))
+        off += n
+
+    (n_results,) = _U32.unpack_from(data, pos)
+    pos += 4
+    idx = struct.unpack_from(f"<{(len(data) - pos) // 4}I", data, pos)
+
+    results: List[WebResult] = []
+    k = 0
+    for _ in range(n_results):
+        title, url, snippet, nq = idx[k:k + 4]
+        k += 4
+        quotes = tuple([strings[j] for j in idx[k:k + nq]])
+        k += nq
+        results.append(WebResult(strings[title], strings[url], strings[snippet], quotes))
+    return results
@@ -10,3 +10,16 @@ def route_after_handle_approval(state: AgentState) -> str:
     if state.get("approved") is True:
         return "approved"
     return "revise"
+
+
+def route_start(state: AgentState) -> Literal["resume_reuse", "new"]:
+    # the user is answering a reuse offer: guard and approval are already done
+    return "resume_reuse" if state.get("approved") and state.get("reuse_offer") else "new"
+
+
+def route_after_reuse(state: AgentState) -> Literal["offer", "search"]:
+    return "offer" if state.get("reuse_offer") else "search"
+
+
+def route_after_handle_reuse(state: AgentState) -> Literal["reuse", "search"]:
+    return "reuse" if state.get("reused_report") else "search"
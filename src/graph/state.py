@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import TypedDict, Optional
+from typing import Annotated, TypedDict, Optional
+
+from src.graph.results import WebResult, merge_web_results
 
 
 class AgentState(TypedDict):
     user_query: str
+    deadline: Optional[float]
+    background: Optional[bool]
     guard_blocked: Optional[bool]
 
     candidate_source_id: Optional[str]
@@ -12,6 +16,7 @@ class AgentState(TypedDict):
 
     user_approval_raw: Optional[str]
     approved: Optional[bool]
+    auto_approved: Optional[bool]
     source_id: Optional[str]
 
     user_format_pref: Optional[str]
@@ -20,11 +25,18 @@ class AgentState(TypedDict):
     rejected_source_ids: Optional[list[str]]
     need_format: Optional[bool]
 
-    web_results: Optional[list]
+    web_results: Annotated[Optional[tuple[WebResult, ...]], merge_web_results]
+    page_meta: Optional[dict]
     final_answer: Optional[str]
     
     source_domain: Optional[str]
 
     report_answer: Optional[str]
+    report_error: Optional[str]
+    evidence_tokens: Optional[int]
     report_paths: Optional[dict]
     report_basename: Optional[str]
+    report_version: Optional[int]
+    reused_report: Optional[bool]
+    reuse_offer: Optional[dict]
+    reuse_answer: Optional[str]
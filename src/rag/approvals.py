@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from src.rag.embeddings import encode
+
+# One row per completed approval: what was proposed first vs what the user settled on
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS approvals (
+    id          INTEGER PRIMARY KEY,
+    created_at  REAL NOT NULL,
+    user_query  TEXT NOT NULL,
+    proposed    TEXT NOT NULL,
+    approved    TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    embedding   BLOB NOT NULL
+);
+"""
+
+
+# Database files already set up by this process (WAL mode persists in the file)
+_ready: set = set()
+_ready_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """A connection for one operation: committed (or rolled back) and closed on exit."""
+    path = os.path.abspath(settings.APPROVALS_DB)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.row_factory = sqlite3.Row
+        if path not in _ready:
+            with _ready_lock:
+                if path not in _ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    _ready.add(path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def record_approval(user_query: str, proposed: str, approved: str) -> None:
+    """Remember which source the user ended up approving for this question (oldest rows pruned)."""
+    vec = encode([user_query])[0].astype(np.float32)
+    with _connect() as conn:
+        cur = conn.execute(
+            "INSERT INTO approvals (created_at, user_query, proposed, approved, model, embedding) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time(), user_query, proposed, approved, settings.EMBEDDING_MODEL, vec.tobytes()),
+        )
+        conn.execute("DELETE FROM approvals WHERE id <= ?", (cur.lastrowid - settings.APPROVALS_MAX_ROWS,))
+
+
+# Rows of the approvals table seen so far (oldest first), topped up with newer rows on each read
+_rows_lock = threading.Lock()
+_rows: Dict[str, Any] = {"key": None, "last_id": 0, "ids": [], "proposed": [], "approved": [], "mat": None}
+
+
+def _reset_rows(key: Any) -> None:
+    _rows.update(key=key, last_id=0, ids=[], proposed=[], approved=[], mat=None)
+
+
+def _load_rows() -> Tuple[List[str], List[str], Optional[np.ndarray]]:
+    """(proposed, approved, embeddings) of the kept approvals; only rows added since the last call are read."""
+    key = (os.path.abspath(settings.APPROVALS_DB), settings.EMBEDDING_MODEL)
+    with _rows_lock:
+        if _rows["key"] != key:
+            _reset_rows(key)
+        with _connect() as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM approvals").fetchone()[0]
+            if max_id < _rows["last_id"]:
+                _reset_rows(key)  # the file was replaced: start over
+            new = conn.execute(
+                "SELECT id, proposed, approved, embedding FROM approvals WHERE model = ? AND id > ? ORDER BY id",
+                (settings.EMBEDDING_MODEL, _rows["last_id"]),
+            ).fetchall()
+        if new:
+            _rows["ids"] += [r["id"] for r in new]
+            _rows["proposed"] += [r["proposed"] for r in new]
+            _rows["approved"] += [r["approved"] for r in new]
+            vecs = np.stack([np.frombuffer(r["embedding"], dtype=np.float32) for r in new])
+            _rows["mat"] = vecs if _rows["mat"] is None else np.vstack([_rows["mat"], vecs])
+        _rows["last_id"] = max(_rows["last_id"], max_id)
+
+        # record_approval prunes everything more than APPROVALS_MAX_ROWS ids back
+        cut = bisect.bisect_right(_rows["ids"], max_id - settings.APPROVALS_MAX_ROWS)
+        if cut:
+            for k in ("ids", "proposed", "approved"):
+                del _rows[k][:cut]
+            _rows["mat"] = _rows["mat"][cut:]
+        return list(_rows["proposed"]), list(_rows["approved"]), _rows["mat"]
+
+
+def approval_prior(user_query: str, qvec: Optional[np.ndarray] = None) -> Tuple[Dict[str, float], int]:
+    """
+    ({source_id: prior score}, number of similar past questions). Neighbours are
+    the APPROVAL_PRIOR_K most similar past queries above APPROVAL_PRIOR_MIN_SIM,
+    weighted by similarity: a source's score is its share of the approvals, minus
+    APPROVAL_PRIOR_REJECT_WEIGHT × its share of the proposals users turned down.
+    `qvec` is the query's embedding if the caller already has it.
+    """
+    if not settings.APPROVAL_PRIOR_ENABLED or not os.path.exists(settings.APPROVALS_DB):
+        return {}, 0
+
+    proposed, approved, mat = _load_rows()
+    if mat is None or not len(approved):
+        return {}, 0
+
+    if qvec is None:
+        qvec = encode([user_query])[0]
+    sims = mat @ np.asarray(qvec, dtype=np.float32)
+
+    order = np.argsort(-sims)[: settings.APPROVAL_PRIOR_K]
+    votes: Dict[str, float] = {}
+    total = 0.0
+    n = 0
+    for i in order:
+        s = float(sims[i])
+        if s < settings.APPROVAL_PRIOR_MIN_SIM:
+            break
+        i = int(i)
+        votes[approved[i]] = votes.get(approved[i], 0.0) + s
+        if proposed[i] != approved[i]:
+            votes[proposed[i]] = votes.get(proposed[i], 0.0) - settings.APPROVAL_PRIOR_REJECT_WEIGHT * s
+        total += s
+        n += 1
+    if not n:
+        return {}, 0
+    return {sid: v / total for sid, v in votes.items()}, n
+
+
+def auto_approvable(prior: Dict[str, float], votes: int, source_id: str) -> Optional[float]:
+    """Prior confidence for `source_id` if it clears the auto-approve bar, else None."""
+    if not settings.APPROVAL_AUTO_APPROVE or votes < settings.APPROVAL_AUTO_MIN_VOTES:
+        return None
+    conf = prior.get(source_id, 0.0)
+    return conf if conf >= settings.APPROVAL_AUTO_MIN_CONFIDENCE else None
@@ -0,0 +1,112 @@
+# src/rag/embeddings.py
+
+from __future__ import annotations
+
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+
+from config import settings
+
+
+class SentenceTransformerEmbedder:
+    """Reference backend: full torch + sentence-transformers."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+
+    def dim(self) -> int:
+        return int(self._model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+class OnnxEmbedder:
+    """
+    CPU-only backend: ONNX Runtime + HF tokenizers, no torch.
+
+    Reproduces the sentence-transformers pipeline for MiniLM-style models
+    (mean pooling over the attention mask + L2 normalization), so vectors are
+    compatible with a collection built by the reference backend.
+    """
+
+    def __init__(self, model_name: str, onnx_file: str, max_seq_len: int, threads: int):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        if os.path.isfile(onnx_file):
+            model_path = onnx_file
+            tok_path = os.path.join(os.path.dirname(os.path.abspath(onnx_file)), "tokenizer.json")
+            if not os.path.isfile(tok_path):
+                tok_path = hf_hub_download(model_name, "tokenizer.json")
+        else:
+            model_path = hf_hub_download(model_name, onnx_file)
+            tok_path = hf_hub_download(model_name, "tokenizer.json")
+
+        self._tok = Tokenizer.from_file(tok_path)
+        self._tok.enable_truncation(max_length=max_seq_len)
+        self._tok.enable_padding()
+
+        opts = ort.SessionOptions()
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._dim: Optional[int] = None
+
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = int(self.encode(["dim"]).shape[1])
+        return self._dim
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        enc = self._tok.encode_batch(list(texts))
+        ids = np.array([e.ids for e in enc], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self._session.run(None, feeds)[0]  # (batch, seq, dim)
+
+        m = mask[..., None].astype(np.float32)
+        pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+_embedder = None
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        backend = settings.EMBEDDING_BACKEND.strip().lower()
+        if backend == "onnx":
+            _embedder = OnnxEmbedder(
+                settings.EMBEDDING_MODEL,
+                settings.EMBEDDING_ONNX_FILE,
+                max_seq_len=settings.EMBEDDING_MAX_SEQ_LEN,
+                threads=settings.EMBEDDING_THREADS,
+            )
+        elif backend in {"sentence-transformers", "st"}:
+            _embedder = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL)
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND!r}")
+    return _embedder
+
+
+def encode(texts: Sequence[str]) -> np.ndarray:
+    """Normalized float32 embeddings, shape (len(texts), dim)."""
+    return get_embedder().encode(texts)
+
+
+def embedding_dim() -> int:
+    return get_embedder().dim()
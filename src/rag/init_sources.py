@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct
-from sentence_transformers import SentenceTransformer
 
 from config import settings
+from src.rag.embeddings import encode, embedding_dim
+from src.rag.snapshot import write_snapshot
 
 
 SEED_SOURCES = {
@@ -33,9 +34,8 @@ SEED_SOURCES = {
 
 def main() -> None:
     client = QdrantClient(url=settings.QDRANT_URL)
-    model = SentenceTransformer(settings.EMBEDDING_MODEL)
 
-    dim = model.get_sentence_embedding_dimension()
+    dim = embedding_dim()
     collection = settings.QDRANT_SOURCES_COLLECTION
 
     client.recreate_collection(
@@ -43,24 +43,33 @@ def main() -> None:
         vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
     )
 
-    points = []
-    for i, (source_id, meta) in enumerate(SEED_SOURCES.items(), start=1):
-        text = f"{source_id} {meta['title']} {meta['domain']} {meta['desc']}"
-        vec = model.encode(text, normalize_embeddings=True).tolist()
+    texts = [
+        f"{source_id} {meta['title']} {meta['domain']} {meta['desc']}"
+        for source_id, meta in SEED_SOURCES.items()
+    ]
+    vectors = encode(texts)
 
+    points = []
+    sources = {}
+    for i, ((source_id, meta), text) in enumerate(zip(SEED_SOURCES.items(), texts), start=1):
         payload = {
             "source_id": source_id,
             "title": meta["title"],
             "domain": meta["domain"],
             "desc": meta["desc"],
-            "text": text, 
+            "text": text,
         }
+        sources[source_id] = {k: payload[k] for k in ("title", "domain", "desc", "text")}
 
-        points.append(PointStruct(id=i, vector=vec, payload=payload))
+        points.append(PointStruct(id=i, vector=vectors[i - 1].tolist(), payload=payload))
 
     client.upsert(collection_name=collection, points=points)
     print(f"OK: initialized {collection} with {len(points)} sources")
 
+    if settings.SOURCES_SNAPSHOT_PATH:
+        write_snapshot(settings.SOURCES_SNAPSHOT_PATH, sources, vectors, settings.EMBEDDING_MODEL)
+        print(f"OK: wrote sources snapshot {settings.SOURCES_SNAPSHOT_PATH}")
+
 
 if __name__ == "__main__":
     main()
@@ -4,15 +4,18 @@ from __future__ import annotations
 
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
 from rank_bm25 import BM25Okapi
 
 from config import settings
+from src.rag.embeddings import encode
+from src.rag.snapshot import SourcesSnapshot, load_snapshot, tokenize as _tokenize
+from src.runtime.recording import external
+from src.runtime.resilience import breaker
 
 
 _client: Optional[QdrantClient] = None
-_model: Optional[SentenceTransformer] = None
 
 # кеш источников из Qdrant (payload)
 _SOURCES: Optional[Dict[str, Dict[str, str]]] = None
@@ -20,24 +23,24 @@ _BM25: Optional[BM25Okapi] = None
 _BM25_DOC_IDS: List[str] = []
 _BM25_DOCS: List[List[str]] = []
 
+# Local snapshot (init_sources): payloads + embeddings + BM25 stats, no Qdrant round-trips
+_SNAPSHOT: Optional[SourcesSnapshot] = None
+_SNAPSHOT_CHECKED = False
+
 
 def _get_client() -> QdrantClient:
     global _client
     if _client is None:
-        _client = QdrantClient(url=settings.QDRANT_URL)
+        _client = QdrantClient(url=settings.QDRANT_URL, timeout=settings.QDRANT_TIMEOUT_SECONDS)
     return _client
 
 
-def _get_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(settings.EMBEDDING_MODEL)
-    return _model
-
-
-def _tokenize(s: str) -> List[str]:
-    s = "".join(ch.lower() if ch.isalnum() else " " for ch in (s or ""))
-    return [t for t in s.split() if t]
+def get_snapshot() -> Optional[SourcesSnapshot]:
+    global _SNAPSHOT, _SNAPSHOT_CHECKED
+    if not _SNAPSHOT_CHECKED:
+        _SNAPSHOT = load_snapshot(settings.SOURCES_SNAPSHOT_PATH, embedding_model=settings.EMBEDDING_MODEL)
+        _SNAPSHOT_CHECKED = True
+    return _SNAPSHOT
 
 
 def _load_sources_from_qdrant() -> Dict[str, Dict[str, str]]:
@@ -67,10 +70,36 @@ def _load_sources_from_qdrant() -> Dict[str, Dict[str, str]]:
     return out
 
 
+def _seed_sources() -> Dict[str, Dict[str, str]]:
+    # Та же форма payload, что пишет init_sources — используется, пока Qdrant недоступен
+    from src.rag.init_sources import SEED_SOURCES
+
+    return {
+        sid: {
+            "title": meta["title"],
+            "domain": meta["domain"],
+            "desc": meta["desc"],
+            "text": f"{sid} {meta['title']} {meta['domain']} {meta['desc']}",
+        }
+        for sid, meta in SEED_SOURCES.items()
+    }
+
+
 def get_sources() -> Dict[str, Dict[str, str]]:
     global _SOURCES
     if _SOURCES is None:
-        _SOURCES = _load_sources_from_qdrant()
+        snap = get_snapshot()
+        if snap is not None:
+            _SOURCES = snap.sources
+            return _SOURCES
+        try:
+            _SOURCES = external(
+                "qdrant.scroll", settings.QDRANT_SOURCES_COLLECTION,
+                breaker("qdrant").call, _load_sources_from_qdrant,
+            )
+        except Exception:
+            # degrade: seed list, not cached, so Qdrant is retried once the breaker allows it
+            return _seed_sources()
     return _SOURCES
 
 
@@ -86,11 +115,19 @@ def _ensure_bm25() -> None:
     _BM25 = BM25Okapi(_BM25_DOCS)
 
 
-def _dense_search_scores(query: str) -> Dict[str, float]:
-    client = _get_client()
-    model = _get_model()
+def _dense_search_scores(query: str, qvec: Optional[np.ndarray] = None) -> Dict[str, float]:
+    if qvec is None:
+        qvec = encode([query])[0]
+    snap = get_snapshot()
+    if snap is not None:
+        return snap.dense_scores(qvec)
+
+    # keyed by the query text: a trace stays usable across embedding tweaks
+    return external("qdrant.query", query, _qdrant_query, qvec.tolist())
 
-    qvec = model.encode([query], normalize_embeddings=True)[0].tolist()
+
+def _qdrant_query(qvec: List[float]) -> Dict[str, float]:
+    client = _get_client()
     hits = client.query_points(
         collection_name=settings.QDRANT_SOURCES_COLLECTION,
         query=qvec,
@@ -108,6 +145,10 @@ def _dense_search_scores(query: str) -> Dict[str, float]:
 
 
 def _bm25_scores(query: str) -> Dict[str, float]:
+    snap = get_snapshot()
+    if snap is not None:
+        return snap.bm25_scores(_tokenize(query))
+
     _ensure_bm25()
     assert _BM25 is not None
 
@@ -124,7 +165,16 @@ def pick_source(
     query: str,
     alpha: float = 0.65,
     exclude: Optional[List[str]] = None,
+    prior: Optional[Dict[str, float]] = None,
+    prior_weight: float = 0.0,
+    qvec: Optional[np.ndarray] = None,
 ) -> Tuple[str, str]:
+    """
+    Best source for `query`: an explicit mention wins, otherwise dense + BM25
+    fused by `alpha`, blended with `prior` (share of similar past approvals,
+    see src.rag.approvals) by `prior_weight`. `qvec`: the query's embedding,
+    if the caller already computed it.
+    """
     sources = get_sources()
     ql = query.lower()
 
@@ -133,7 +183,15 @@ def pick_source(
         if sid in ql and not (exclude and sid in exclude):
             return sid, f"rule: query mentions '{sid}'"
 
-    dense = _dense_search_scores(query)
+    try:
+        if get_snapshot() is not None:
+            dense = _dense_search_scores(query, qvec)
+        else:
+            dense = breaker("qdrant").call(_dense_search_scores, query, qvec)
+    except Exception:
+        # Qdrant down / breaker open: BM25-only selection
+        dense = {}
+        alpha = 0.0
     bm25 = _bm25_scores(query)
 
     for sid in sources.keys():
@@ -159,8 +217,11 @@ def pick_source(
         b_norm = bm_norm(b)
 
         f = alpha * d_norm + (1.0 - alpha) * b_norm
+        p = prior.get(sid, 0.0) if prior else 0.0
+        if prior:
+            f = (1.0 - prior_weight) * f + prior_weight * p
         fused[sid] = f
-        debug[sid] = {"dense": d, "bm25": b, "fused": f}
+        debug[sid] = {"dense": d, "bm25": b, "prior": p, "fused": f}
 
     candidates = fused.copy()
     if exclude:
@@ -173,6 +234,8 @@ def pick_source(
     info = debug[best]
     reason = (
         f"hybrid: {best} fused={info['fused']:.4f} "
-        f"(dense={info['dense']:.4f}, bm25={info['bm25']:.4f}, alpha={alpha})"
+        f"(dense={info['dense']:.4f}, bm25={info['bm25']:.4f}, alpha={alpha}"
+        + (f", prior={info['prior']:.2f}" if prior else "")
+        + ")"
     )
     return best, reason
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.reports.store import atomic_open
+
+# File layout (little-endian):
+#   magic "SRCSNAP\0" | u32 format version | u32 header length | JSON header
+#   | zero padding to 64 bytes | float32 embedding matrix [n_sources x dim]
+# The header holds source payloads (in matrix row order), BM25 statistics and
+# the embedding model; the matrix is read straight from the mmap'd file, so
+# every worker process shares the same page-cache pages.
+MAGIC = b"SRCSNAP\0"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def tokenize(s: str) -> List[str]:
+    s = "".join(ch.lower() if ch.isalnum() else " " for ch in (s or ""))
+    return [t for t in s.split() if t]
+
+
+def _bm25_stats(docs: List[List[str]]) -> Dict[str, Any]:
+    from rank_bm25 import BM25Okapi
+
+    bm25 = BM25Okapi(docs)
+    return {
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "avgdl": float(bm25.avgdl),
+        "doc_len": [int(n) for n in bm25.doc_len],
+        "doc_freqs": bm25.doc_freqs,
+        "idf": {t: float(v) for t, v in bm25.idf.items()},
+    }
+
+
+def write_snapshot(
+    path: str,
+    sources: Dict[str, Dict[str, str]],
+    vectors: np.ndarray,
+    embedding_model: str,
+) -> None:
+    """`vectors[i]` is the L2-normalized embedding of the i-th source in `sources`."""
+    ids = list(sources)
+    matrix = np.ascontiguousarray(vectors, dtype="<f4")
+    if matrix.shape[0] != len(ids):
+        raise ValueError(f"{len(ids)} sources but {matrix.shape[0]} vectors")
+
+    header = json.dumps({
+        "created_at": time.time(),
+        "embedding_model": embedding_model,
+        "dim": int(matrix.shape[1]),
+        "ids": ids,
+        "sources": sources,
+        "bm25": _bm25_stats([tokenize(sources[sid]["text"]) for sid in ids]),
+    }, ensure_ascii=False).encode("utf-8")
+
+    head = _PREFIX.size + len(header)
+    pad = -head % _ALIGN
+    with atomic_open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * pad)
+        f.write(matrix.tobytes())
+
+
+class SourcesSnapshot:
+    """Read-only view of a snapshot file: payloads, dense scores and BM25 scores without Qdrant."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a sources snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: snapshot format v{version}, expected v{FORMAT_VERSION}")
+
+        meta = json.loads(self._mm[_PREFIX.size:_PREFIX.size + n].decode("utf-8"))
+        offset = _PREFIX.size + n
+        offset += -offset % _ALIGN
+
+        self.path = path
+        self.created_at: float = meta["created_at"]
+        self.embedding_model: str = meta["embedding_model"]
+        self.ids: List[str] = meta["ids"]
+        self.sources: Dict[str, Dict[str, str]] = meta["sources"]
+        self.matrix = np.frombuffer(
+            self._mm, dtype="<f4", count=len(self.ids) * meta["dim"], offset=offset
+        ).reshape(len(self.ids), meta["dim"])
+
+        bm = meta["bm25"]
+        self._k1: float = bm["k1"]
+        self._b: float = bm["b"]
+        self._idf: Dict[str, float] = bm["idf"]
+        self._doc_freqs: List[Dict[str, int]] = bm["doc_freqs"]
+        dl = np.asarray(bm["doc_len"], dtype=np.float64)
+        # per-document length normalization, precomputed once
+        self._norm = self._k1 * (1.0 - self._b + self._b * dl / (bm["avgdl"] or 1.0))
+
+    def dense_scores(self, qvec: np.ndarray) -> Dict[str, float]:
+        """Cosine similarity (vectors are normalized) of every source to `qvec`."""
+        scores = self.matrix @ np.asarray(qvec, dtype=np.float32)
+        return {sid: float(s) for sid, s in zip(self.ids, scores)}
+
+    def bm25_scores(self, q_tokens: Sequence[str]) -> Dict[str, float]:
+        """Okapi BM25, same formula and idf as rank_bm25.BM25Okapi.get_scores."""
+        scores = np.zeros(len(self.ids))
+        for q in q_tokens:
+            idf = self._idf.get(q) or 0.0
+            if not idf:
+                continue
+            tf = np.array([d.get(q) or 0 for d in self._doc_freqs], dtype=np.float64)
+            scores += idf * (tf * (self._k1 + 1.0)) / (tf + self._norm)
+        return {sid: float(s) for sid, s in zip(self.ids, scores)}
+
+
+def load_snapshot(path: str, embedding_model: Optional[str] = None) -> Optional[SourcesSnapshot]:
+    """The snapshot at `path`, or None if it is missing, unreadable, or built with another model."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snap = SourcesSnapshot(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    if embedding_model and snap.embedding_model != embedding_model:
+        return None
+    return snap
@@ -1,12 +1,56 @@
 from __future__ import annotations
 
+import html
+import io
+import json
 import os
 import re
-from typing import Dict, Any, List
+import time
+from typing import Any, Callable, Dict, Sequence
 
 from config import settings
+from src.graph.results import WebResult, evidence_digest
+from src.reports.store import allocate_report_id, atomic_open, atomic_write_text, report_path
+from src.reports.templates import Template, html_escape
 
 DEFAULT_REPORTS_DIR = settings.REPORTS_DIR
+MANIFEST_EXT = "manifest.json"
+
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report.css")
+with open(CSS_PATH, "r", encoding="utf-8") as _f:
+    REPORT_CSS = _f.read()
+
+
+# -----------------------------
+# Templates (compiled once)
+# -----------------------------
+
+_MD_HEAD = Template("# Search Agent Report{version}\n\n- **Query:** {query}\n- **Source:** {sid} ({domain})\n")
+_MD_REASON = Template("- **Why this source:** {reason}\n")
+_MD_TOKENS = Template("- **Evidence tokens (packed):** {tokens}\n")
+_MD_EVIDENCE = "\n## Evidence\n\n"
+_MD_NO_RESULTS = "_No web results._\n\n"
+_MD_ANSWER = Template("## Answer\n\n{answer}\n")
+
+_HTML_HEAD = Template(
+    "<!doctype html>\n<html lang='en'>\n<head>\n<meta charset='utf-8'/>\n"
+    "<meta name='viewport' content='width=device-width, initial-scale=1'/>\n"
+    "<title>Search Agent Report{version}</title>\n{style!s}\n</head>\n<body>\n"
+    "<h1>Search Agent Report{version}</h1>\n<div class='card'>\n"
+    "<div><b>Query:</b> {query}</div>\n"
+    "<div><b>Source:</b> {sid} ({domain})</div>\n",
+    escape=html_escape,
+)
+_HTML_REASON = Template("<div class='muted'><b>Why:</b> {reason}</div>\n", escape=html_escape)
+_HTML_TOKENS = Template("<div class='muted'><b>Evidence tokens (packed):</b> {tokens}</div>\n", escape=html_escape)
+_HTML_EVIDENCE = "</div>\n<h2>Evidence</h2>\n"
+_HTML_NO_RESULTS = "<div class='card'><div class='muted'>No web results.</div></div>\n"
+_HTML_ANSWER = Template(
+    "<h2>Answer</h2>\n<div class='card'>\n<pre>{answer}</pre>\n</div>\n</body></html>",
+    escape=html_escape,
+)
+
+_CSS_LINK = Template("<link rel='stylesheet' href='{href}'/>", escape=html_escape)
 
 
 def _slugify(s: str, max_len: int = 60) -> str:
@@ -18,165 +62,146 @@ def _slugify(s: str, max_len: int = 60) -> str:
     return s[:max_len].rstrip("-")
 
 
-def _next_report_id(out_dir: str) -> int:
-    os.makedirs(out_dir, exist_ok=True)
+def _style_tag() -> str:
+    href = settings.REPORT_CSS_HREF
+    if href:
+        return _CSS_LINK.render(href=href)
+    return f"<style>{REPORT_CSS}</style>"
 
-    best = 0
-    for name in os.listdir(out_dir):
-        m = re.match(r"^(\d{4})__", name)
-        if not m:
-            continue
-        n = int(m.group(1))
-        if n > best:
-            best = n
-    return best + 1
 
-
-def render_markdown(state: Dict[str, Any]) -> str:
-    user_query = state.get("user_query") or ""
+def render_reports(
+    state: Dict[str, Any],
+    md_write: Callable[[str], Any],
+    html_write: Callable[[str], Any],
+) -> None:
+    """Render Markdown and HTML in one pass over `web_results`, streaming chunks to both writers."""
     sid = state.get("source_id") or state.get("candidate_source_id") or ""
-    domain = state.get("source_domain") or ""
-    reason = state.get("candidate_source_reason") or ""
-    report_answer = state.get("report_answer") or ""
-    web_results: List[Dict[str, Any]] = state.get("web_results") or []
-
-    lines: List[str] = []
-    lines.append("# Search Agent Report\n")
-    lines.append(f"- **Query:** {user_query}")
-    lines.append(f"- **Source:** {sid} ({domain})")
-    if reason:
-        lines.append(f"- **Why this source:** {reason}")
-    lines.append("")
+    version = int(state.get("report_version") or 1)
+    head = {
+        "query": (state.get("user_query") or "").strip(),
+        "sid": sid.strip(),
+        "domain": (state.get("source_domain") or "").strip(),
+        "style": _style_tag(),
+        # refreshed reports are rewritten in place as "(v2)", "(v3)", ...
+        "version": f" (v{version})" if version > 1 else "",
+    }
+    reason = (state.get("candidate_source_reason") or "").strip()
+    answer = (state.get("report_answer") or "").strip()
+    web_results: Sequence[WebResult] = state.get("web_results") or ()
 
-    lines.append("## Evidence\n")
+    _MD_HEAD.render_to(md_write, head)
+    _HTML_HEAD.render_to(html_write, head)
+    if reason:
+        _MD_REASON.render_to(md_write, {"reason": reason})
+        _HTML_REASON.render_to(html_write, {"reason": reason})
+    tokens = state.get("evidence_tokens")
+    if tokens is not None:
+        _MD_TOKENS.render_to(md_write, {"tokens": tokens})
+        _HTML_TOKENS.render_to(html_write, {"tokens": tokens})
+
+    md_write(_MD_EVIDENCE)
+    html_write(_HTML_EVIDENCE)
     if not web_results:
-        lines.append("_No web results._\n")
+        md_write(_MD_NO_RESULTS)
+        html_write(_HTML_NO_RESULTS)
+
+    # Hot loop: inline f-strings (same shape as the templates above), one pass for both formats.
+    esc = html.escape
+    for i, r in enumerate(web_results, 1):
+        # WebResult fields are stripped at construction
+        title, url, snippet, quotes = r.title, r.url, r.snippet, r.quotes
+
+        md = [f"### Result {i}: {title}\n"]
+        h = [f"<div class='card'>\n<h3>Result {i}: {esc(title)}</h3>\n"]
+        if url:
+            e_url = esc(url)
+            md.append(f"- URL: {url}\n")
+            h.append(f"<div><b>URL:</b> <a href='{e_url}' target='_blank' rel='noreferrer'>{e_url}</a></div>\n")
+        if snippet:
+            md.append(f"- Snippet: {snippet}\n")
+            h.append(f"<div class='muted' style='margin-top:6px'>{esc(snippet)}</div>\n")
+        if quotes:
+            md.append("- Quotes:\n")
+            h.append("<div style='margin-top:10px'><b>Quotes:</b></div>\n<ul>\n")
+            for q in quotes:
+                md.append(f'  - "{q}"\n')
+                h.append(f"<li>{esc(q)}</li>\n")
+            h.append("</ul>\n")
+        md.append("\n")
+        h.append("</div>\n")
+
+        md_write("".join(md))
+        html_write("".join(h))
+
+    if answer:
+        _MD_ANSWER.render_to(md_write, {"answer": answer})
     else:
-        for i, r in enumerate(web_results, 1):
-            title = r.get("title") or ""
-            url = r.get("url") or ""
-            snippet = r.get("snippet") or ""
-            quotes = r.get("quotes") or []
-
-            lines.append(f"### Result {i}: {title}")
-            if url:
-                lines.append(f"- URL: {url}")
-            if snippet:
-                lines.append(f"- Snippet: {snippet}")
-            if quotes:
-                lines.append("- Quotes:")
-                for q in quotes:
-                    lines.append(f'  - "{q}"')
-            lines.append("")
+        md_write("## Answer\n")
+    _HTML_ANSWER.render_to(html_write, {"answer": answer})
 
-    lines.append("## Answer\n")
-    lines.append(report_answer.strip() + "\n")
 
-    return "\n".join(lines).strip() + "\n"
+def render_markdown(state: Dict[str, Any]) -> str:
+    buf = io.StringIO()
+    render_reports(state, buf.write, lambda _s: None)
+    return buf.getvalue()
 
 
 def render_html(state: Dict[str, Any]) -> str:
-    user_query = (state.get("user_query") or "").strip()
-    sid = (state.get("source_id") or state.get("candidate_source_id") or "").strip()
-    domain = (state.get("source_domain") or "").strip()
-    reason = (state.get("candidate_source_reason") or "").strip()
-    report_answer = (state.get("report_answer") or "").strip()
-    web_results: List[Dict[str, Any]] = state.get("web_results") or []
-
-    def esc(x: str) -> str:
-        return (
-            x.replace("&", "&amp;")
-             .replace("<", "&lt;")
-             .replace(">", "&gt;")
-             .replace('"', "&quot;")
-        )
-
-    parts: List[str] = []
-    parts.append("<!doctype html>")
-    parts.append("<html lang='en'>")
-    parts.append("<head>")
-    parts.append("<meta charset='utf-8'/>")
-    parts.append("<meta name='viewport' content='width=device-width, initial-scale=1'/>")
-    parts.append("<title>Search Agent Report</title>")
-    parts.append(
-        "<style>"
-        "body{font-family:ui-sans-serif,system-ui,-apple-system,Segoe UI,Roboto,Arial;"
-        "max-width:920px;margin:32px auto;padding:0 16px;line-height:1.5;color:#111}"
-        ".muted{color:#666}"
-        ".card{border:1px solid #e6e6e6;border-radius:14px;padding:16px;margin:14px 0}"
-        "h1{font-size:28px;margin:0 0 8px}"
-        "h2{font-size:18px;margin:24px 0 10px}"
-        "h3{font-size:15px;margin:0 0 8px}"
-        "pre{white-space:pre-wrap;background:#fafafa;border:1px solid #eee;border-radius:12px;padding:12px}"
-        "a{color:#0b57d0;text-decoration:none}"
-        "a:hover{text-decoration:underline}"
-        "ul{margin:8px 0 0 18px}"
-        "</style>"
-    )
-    parts.append("</head>")
-    parts.append("<body>")
-
-    parts.append("<h1>Search Agent Report</h1>")
-    parts.append("<div class='card'>")
-    parts.append(f"<div><b>Query:</b> {esc(user_query)}</div>")
-    parts.append(f"<div><b>Source:</b> {esc(sid)} ({esc(domain)})</div>")
-    if reason:
-        parts.append(f"<div class='muted'><b>Why:</b> {esc(reason)}</div>")
-    parts.append("</div>")
-
-    parts.append("<h2>Evidence</h2>")
-    if not web_results:
-        parts.append("<div class='card'><div class='muted'>No web results.</div></div>")
-    else:
-        for i, r in enumerate(web_results, 1):
-            title = (r.get("title") or "").strip()
-            url = (r.get("url") or "").strip()
-            snippet = (r.get("snippet") or "").strip()
-            quotes = r.get("quotes") or []
-
-            parts.append("<div class='card'>")
-            parts.append(f"<h3>Result {i}: {esc(title)}</h3>")
-            if url:
-                parts.append(
-                    f"<div><b>URL:</b> <a href='{esc(url)}' target='_blank' rel='noreferrer'>{esc(url)}</a></div>"
-                )
-            if snippet:
-                parts.append(f"<div class='muted' style='margin-top:6px'>{esc(snippet)}</div>")
-            if quotes:
-                parts.append("<div style='margin-top:10px'><b>Quotes:</b></div>")
-                parts.append("<ul>")
-                for q in quotes:
-                    parts.append(f"<li>{esc(str(q))}</li>")
-                parts.append("</ul>")
-            parts.append("</div>")
-
-    parts.append("<h2>Answer</h2>")
-    parts.append("<div class='card'>")
-    parts.append(f"<pre>{esc(report_answer)}</pre>")
-    parts.append("</div>")
-
-    parts.append("</body></html>")
-    return "\n".join(parts)
-
-
-def save_reports(state: Dict[str, Any], out_dir: str | None = None) -> Dict[str, str]:
+    buf = io.StringIO()
+    render_reports(state, lambda _s: None, buf.write)
+    return buf.getvalue()
+
+
+def report_manifest(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What a refresh needs to redo the report cheaply: the query and source, the
+    evidence with each page's validators (ETag / Last-Modified / body digest), and
+    the answer generated from it.
+    """
+    page_meta = state.get("page_meta") or {}
+    web_results: Sequence[WebResult] = state.get("web_results") or ()
+    results = []
+    for r in web_results:
+        meta = page_meta.get(r.url) or {}
+        results.append({
+            "title": r.title,
+            "url": r.url,
+            "snippet": r.snippet,
+            "quotes": list(r.quotes),
+            "etag": meta.get("etag", ""),
+            "last_modified": meta.get("last_modified", ""),
+            "digest": meta.get("digest", ""),
+        })
+    return {
+        "version": int(state.get("report_version") or 1),
+        "updated_at": time.time(),
+        "user_query": state.get("user_query") or "",
+        "source_query": state.get("source_query") or "",
+        "source_id": state.get("source_id") or state.get("candidate_source_id") or "",
+        "source_domain": state.get("source_domain") or "",
+        "reason": state.get("candidate_source_reason") or "",
+        "report_answer": state.get("report_answer") or "",
+        "evidence_tokens": state.get("evidence_tokens"),
+        "evidence_digest": evidence_digest(web_results, page_meta),
+        "results": results,
+    }
+
+
+def save_reports(state: Dict[str, Any], out_dir: str | None = None, base: str | None = None) -> Dict[str, str]:
+    """Write <base>.md, .html and .manifest.json; `base` rewrites an existing report in place."""
     out_dir = out_dir or DEFAULT_REPORTS_DIR
 
-    user_query = state.get("user_query") or ""
-    rid = _next_report_id(out_dir)
-    slug = _slugify(user_query)
-    base = f"{rid:04d}__{slug}"
-
-    md_path = os.path.join(out_dir, base + ".md")
-    html_path = os.path.join(out_dir, base + ".html")
-
-    md = render_markdown(state)
-    html = render_html(state)
+    if base is None:
+        user_query = state.get("user_query") or ""
+        rid = allocate_report_id(out_dir)
+        slug = _slugify(user_query)
+        base = f"{rid:04d}__{slug}"
 
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(md)
+    md_path = report_path(out_dir, base, "md")
+    html_path = report_path(out_dir, base, "html")
 
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    with atomic_open(md_path) as md_f, atomic_open(html_path) as html_f:
+        render_reports(state, md_f.write, html_f.write)
+    atomic_write_text(report_path(out_dir, base, MANIFEST_EXT), json.dumps(report_manifest(state), ensure_ascii=False))
 
     return {"md": md_path, "html": html_path, "base": base}
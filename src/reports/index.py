@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import settings
+from src.rag.embeddings import encode
+
+INDEX_FILE = "index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id          INTEGER PRIMARY KEY,
+    base        TEXT NOT NULL UNIQUE,
+    user_query  TEXT NOT NULL,
+    source_id   TEXT,
+    created_at  REAL NOT NULL,
+    md_path     TEXT,
+    html_path   TEXT,
+    embedding   BLOB NOT NULL,
+    pref        TEXT NOT NULL DEFAULT '',
+    background  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS reports_source_created ON reports (source_id, created_at);
+"""
+
+# Columns added after the first release: {name: definition}, added to older index files on open
+_COLUMNS = {
+    "pref": "TEXT NOT NULL DEFAULT ''",
+    "background": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# Index files already set up by this process (WAL mode persists in the file)
+_ready: set = set()
+_ready_lock = threading.Lock()
+
+
+def _setup(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    have = {r[1] for r in conn.execute("PRAGMA table_info(reports)")}
+    for name, ddl in _COLUMNS.items():
+        if name not in have:
+            conn.execute(f"ALTER TABLE reports ADD COLUMN {name} {ddl}")
+
+
+@contextlib.contextmanager
+def _connect(out_dir: str) -> Iterator[sqlite3.Connection]:
+    """A connection for one operation: committed (or rolled back) and closed on exit."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.abspath(os.path.join(out_dir, INDEX_FILE))
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.row_factory = sqlite3.Row
+        if path not in _ready:
+            with _ready_lock:
+                if path not in _ready:
+                    _setup(conn)
+                    _ready.add(path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def add_report(
+    out_dir: str,
+    *,
+    rid: int,
+    base: str,
+    user_query: str,
+    source_id: Optional[str],
+    md_path: str,
+    html_path: str,
+    pref: str = "",
+    background: bool = False,
+) -> None:
+    """
+    `pref` is the user's stated preference (see preference_key): reuse only matches
+    the same one. `background` marks reports written by pre-warming, which are not
+    user demand and don't count in popular_queries.
+    """
+    vec = encode([user_query])[0].astype(np.float32)
+    with _connect(out_dir) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO reports "
+            "(id, base, user_query, source_id, created_at, md_path, html_path, embedding, pref, background) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rid, base, user_query, source_id, time.time(), md_path, html_path, vec.tobytes(), pref, int(background)),
+        )
+
+
+def search_reports(
+    out_dir: str,
+    query: str,
+    limit: int = 10,
+    source_id: Optional[str] = None,
+    max_age_seconds: Optional[float] = None,
+    pref: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Reports ranked by cosine similarity of their `user_query` to `query`."""
+    if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        return []
+
+    sql = "SELECT * FROM reports WHERE 1=1"
+    args: List[Any] = []
+    if source_id:
+        sql += " AND source_id = ?"
+        args.append(source_id)
+    if max_age_seconds is not None:
+        sql += " AND created_at >= ?"
+        args.append(time.time() - max_age_seconds)
+    if pref is not None:
+        sql += " AND pref = ?"
+        args.append(pref)
+
+    with _connect(out_dir) as conn:
+        rows = conn.execute(sql, args).fetchall()
+    if not rows:
+        return []
+
+    qvec = encode([query])[0].astype(np.float32)
+    mat = np.stack([np.frombuffer(r["embedding"], dtype=np.float32) for r in rows])
+    scores = mat @ qvec
+
+    order = np.argsort(-scores)[:limit]
+    out: List[Dict[str, Any]] = []
+    for i in order:
+        r = rows[int(i)]
+        out.append({
+            "base": r["base"],
+            "user_query": r["user_query"],
+            "source_id": r["source_id"],
+            "created_at": r["created_at"],
+            "md": r["md_path"],
+            "html": r["html_path"],
+            "pref": r["pref"],
+            "score": float(scores[i]),
+        })
+    return out
+
+
+def find_reusable(out_dir: str, query: str, source_id: Optional[str], pref: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Best fresh report for (query, source, preference) above REPORT_REUSE_MIN_SIM
+    whose files still exist.
+    """
+    hits = search_reports(
+        out_dir,
+        query,
+        limit=3,
+        source_id=source_id,
+        max_age_seconds=settings.REPORT_REUSE_MAX_AGE_SECONDS,
+        pref=pref,
+    )
+    for h in hits:
+        if h["score"] < settings.REPORT_REUSE_MIN_SIM:
+            break
+        if h["md"] and h["html"] and os.path.exists(h["md"]) and os.path.exists(h["html"]):
+            return h
+    return None
+
+
+def get_report(out_dir: str, base: str) -> Optional[Dict[str, Any]]:
+    """Index row of report `base` (query, source, paths), or None."""
+    if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        return None
+    with _connect(out_dir) as conn:
+        r = conn.execute("SELECT * FROM reports WHERE base = ?", (base,)).fetchone()
+    if r is None:
+        return None
+    return {
+        "base": r["base"],
+        "user_query": r["user_query"],
+        "source_id": r["source_id"],
+        "created_at": r["created_at"],
+        "md": r["md_path"],
+        "html": r["html_path"],
+        "background": bool(r["background"]),
+    }
+
+
+def all_reports(out_dir: str) -> List[str]:
+    """Basenames of all indexed reports, oldest first."""
+    if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        return []
+    with _connect(out_dir) as conn:
+        return [r["base"] for r in conn.execute("SELECT base FROM reports ORDER BY id")]
+
+
+def popular_queries(out_dir: str, limit: int) -> List[str]:
+    """Most frequently asked questions (case-insensitive), most recent first on ties; pre-warm runs excluded."""
+    if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        return []
+    with _connect(out_dir) as conn:
+        rows = conn.execute(
+            "SELECT user_query, COUNT(*) AS n, MAX(created_at) AS last FROM reports WHERE background = 0 "
+            "GROUP BY lower(trim(user_query)) ORDER BY n DESC, last DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [r["user_query"].strip() for r in rows if r["user_query"].strip()]
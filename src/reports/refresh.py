@@ -0,0 +1,163 @@
+"""
+Refresh a saved report without redoing all of its work.
+
+The search is re-run for the report's query and source. Pages already in
+its manifest are revalidated (conditional GET with ETag / Last-Modified,
+then a body digest), and unchanged pages keep their cached quotes without
+being parsed again. Sources with a structured API (Wikipedia, arXiv,
+GitHub, Reddit) have no pages to fetch: their API is queried again and
+each record is compared by a digest of its content. The report answer is regenerated only if the
+evidence set changed: the set of pages and their content, regardless of
+rank order or search snippets. In that case the report is rewritten under the same
+name as the next version: "(v2)", "(v3)", ...
+
+    python -m src.reports.refresh 0042__how-do-transformers-work
+    python -m src.reports.refresh --all
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+from src.graph.nodes import node_generate_report_answer, node_web_search
+from src.graph.query_plan import preference_key
+from src.graph.results import evidence_digest
+from src.rag.qdrant_sources import get_sources
+from src.reports.generate_report import MANIFEST_EXT, save_reports
+from src.reports.index import add_report, all_reports, get_report
+from src.reports.store import atomic_write_text, report_id_from_base, report_path
+from src.runtime.resilience import new_deadline
+from src.runtime.singleflight import flight
+
+
+def load_manifest(out_dir: str, base: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(report_path(out_dir, base, MANIFEST_EXT), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def refresh_report(base: str, out_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Refresh report `base` in place. Returns its version, whether the evidence
+    changed, and how many pages were unchanged. If the search comes back empty or
+    the answer can't be generated, nothing is written and "aborted" says why.
+    Raises FileNotFoundError for an unknown report.
+    """
+    out_dir = out_dir or settings.REPORTS_DIR
+    # Concurrent refreshes of one report share a single run
+    return flight("refresh").do((out_dir, base), _refresh, base, out_dir)
+
+
+def _refresh(base: str, out_dir: str) -> Dict[str, Any]:
+    manifest = load_manifest(out_dir, base)
+    if manifest is None:
+        row = get_report(out_dir, base)
+        if row is None:
+            raise FileNotFoundError(f"unknown report: {base}")
+        # written before manifests existed: query and source from the index, nothing cached
+        manifest = {"version": 1, "user_query": row["user_query"], "source_id": row["source_id"], "results": []}
+
+    sid = manifest.get("source_id") or "wikipedia"
+    old_meta = {
+        r["url"]: {k: r.get(k) or "" for k in ("etag", "last_modified", "digest")} | {"quotes": r.get("quotes") or []}
+        for r in manifest.get("results") or []
+        if r.get("digest")
+    }
+    state: Dict[str, Any] = {
+        "user_query": manifest["user_query"],
+        "source_query": manifest.get("source_query") or None,
+        "source_id": sid,
+        "source_domain": manifest.get("source_domain") or get_sources().get(sid, {}).get("domain", ""),
+        "candidate_source_reason": manifest.get("reason") or None,
+        "deadline": new_deadline(),
+        "web_results": None,
+        "page_meta": old_meta,
+    }
+
+    found = node_web_search(state)
+    results = tuple(found["web_results"])
+    if not results:
+        # search outage / open breaker looks like "no evidence": keep the report as it is
+        return {"base": base, "changed": False, "aborted": "no search results",
+                "version": int(manifest.get("version") or 1)}
+    new_meta = found.get("page_meta") or {}
+    stats = {
+        "base": base,
+        "results": len(results),
+        "pages": len(new_meta),
+        "unchanged_pages": sum(
+            1 for url, m in new_meta.items() if url in old_meta and m["digest"] == old_meta[url]["digest"]
+        ),
+    }
+
+    if evidence_digest(results, new_meta) == manifest.get("evidence_digest"):
+        # Same evidence, same answer: keep the report, remember the new validators
+        for r in manifest["results"]:
+            m = new_meta.get(r["url"])
+            if m:
+                r["etag"], r["last_modified"] = m["etag"], m["last_modified"]
+        manifest["checked_at"] = time.time()
+        atomic_write_text(report_path(out_dir, base, MANIFEST_EXT), json.dumps(manifest, ensure_ascii=False))
+        return {**stats, "changed": False, "version": int(manifest.get("version") or 1)}
+
+    state["web_results"] = results
+    state["page_meta"] = new_meta
+    state.update(node_generate_report_answer(state))
+    if state.get("report_error"):
+        # never replace a good answer with the "no answer generated" placeholder
+        return {**stats, "changed": False, "aborted": f"LLM unavailable ({state['report_error']})",
+                "version": int(manifest.get("version") or 1)}
+    state["report_version"] = int(manifest.get("version") or 1) + 1
+
+    paths = save_reports(state, out_dir=out_dir, base=base)
+    row = get_report(out_dir, base)
+    add_report(
+        out_dir,
+        rid=report_id_from_base(base),
+        base=base,
+        user_query=state["user_query"],
+        source_id=sid,
+        md_path=paths["md"],
+        html_path=paths["html"],
+        pref=preference_key(state.get("source_query")),
+        # a refreshed pre-warm report is still not user demand
+        background=bool(row and row["background"]),
+    )
+    return {**stats, "changed": True, "version": state["report_version"]}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("bases", nargs="*", help="report basenames (e.g. 0042__my-question)")
+    ap.add_argument("--all", action="store_true", help="refresh every indexed report")
+    args = ap.parse_args()
+
+    bases = all_reports(settings.REPORTS_DIR) if args.all else [os.path.basename(b) for b in args.bases]
+    if not bases:
+        ap.error("give report basenames or --all")
+
+    for base in bases:
+        start = time.perf_counter()
+        try:
+            r = refresh_report(base)
+        except Exception as e:
+            print(f"{base}: failed ({type(e).__name__}: {e})")
+            continue
+        if r.get("aborted"):
+            print(f"{base}: kept v{r['version']}, refresh aborted ({r['aborted']})")
+            continue
+        what = f"updated to v{r['version']}" if r["changed"] else f"unchanged (v{r['version']})"
+        print(
+            f"{base}: {what}, {r['unchanged_pages']}/{r['pages']} pages unchanged, "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import gzip
+import os
+import re
+import shutil
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from src.reports.store import atomic_open, report_path
+
+# Report basenames as produced by save_reports: "0001__some-slug"
+_BASE_RE = re.compile(r"^\d{4,}__[a-z0-9-]*$")
+
+MEDIA_TYPES = {
+    "md": "text/markdown; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
+
+def resolve_report(out_dir: str, base: str, ext: str) -> Optional[str]:
+    """
+    Map an untrusted (basename, extension) pair to a report file inside `out_dir`.
+    Only well-formed report names are accepted, and the resolved path must stay
+    under `out_dir` (no traversal, no symlinks pointing outside).
+    """
+    if ext not in MEDIA_TYPES or not _BASE_RE.match(base or ""):
+        return None
+
+    root = os.path.realpath(out_dir)
+    path = os.path.realpath(report_path(out_dir, base, ext))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def etag_for(st: os.stat_result, variant: str = "") -> str:
+    tag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    if variant:
+        tag += f"-{variant}"
+    return f'"{tag}"'
+
+
+def http_date(ts: float) -> str:
+    return formatdate(ts, usegmt=True)
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etags: Tuple[str, ...],
+    mtime: float,
+) -> bool:
+    if if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in candidates or any(e in candidates for e in etags)
+
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= int(since)
+
+    return False
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+    Returns None when the header is absent or should be ignored (multi-range,
+    other units); raises ValueError when the range is unsatisfiable.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if not start_s:
+            n = int(end_s)
+            if n <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - n), size - 1
+
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(f"bad range: {header!r}")
+
+    if start >= size or end < start:
+        raise ValueError(f"unsatisfiable range: {header!r}")
+    return start, min(end, size - 1)
+
+
+def ensure_gzip(path: str) -> str:
+    """
+    Pre-compressed sibling `<path>.gz`, (re)built only when missing or older
+    than the report, so repeated downloads cost a sendfile instead of a compress.
+    """
+    gz_path = path + ".gz"
+    try:
+        if os.stat(gz_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            return gz_path
+    except FileNotFoundError:
+        pass
+
+    with open(path, "rb") as src, atomic_open(gz_path, "wb") as dst:
+        with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=9, mtime=0) as gz:
+            shutil.copyfileobj(src, gz)
+    return gz_path
+
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import os
+import re
+import tempfile
+from typing import IO, Iterator
+
+from config import settings
+
+_ID_RE = re.compile(r"^(\d{4,})__")
+
+COUNTER_FILE = ".report_id"
+LOCK_FILE = ".report_id.lock"
+
+
+@contextlib.contextmanager
+def _locked(out_dir: str) -> Iterator[None]:
+    """Exclusive cross-process lock on the reports directory (flock on a lock file)."""
+    os.makedirs(out_dir, exist_ok=True)
+    fd = os.open(os.path.join(out_dir, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str = "utf-8") -> Iterator[IO]:
+    """
+    Open `path` for writing through a temp file in the same directory.
+    The file appears under its final name only after a successful close (os.replace),
+    so readers never see a half-written report.
+    """
+    d = os.path.dirname(path) or "."
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp-", suffix="-" + os.path.basename(path))
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    with atomic_open(path) as f:
+        f.write(text)
+
+
+def _scan_max_id(out_dir: str) -> int:
+    # Только для директорий, созданных до появления счётчика (одноразовая миграция).
+    best = 0
+    for root, dirs, files in os.walk(out_dir):
+        for name in files:
+            m = _ID_RE.match(name)
+            if m:
+                best = max(best, int(m.group(1)))
+    return best
+
+
+def allocate_report_id(out_dir: str) -> int:
+    """
+    O(1) and race-free: the last issued ID lives in a counter file that is
+    read and bumped under an exclusive lock, so concurrent workers never share an ID.
+    """
+    counter = os.path.join(out_dir, COUNTER_FILE)
+    with _locked(out_dir):
+        try:
+            with open(counter, "r", encoding="utf-8") as f:
+                last = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            last = _scan_max_id(out_dir)
+
+        rid = last + 1
+        atomic_write_text(counter, str(rid))
+    return rid
+
+
+def report_id_from_base(base: str) -> int | None:
+    m = _ID_RE.match(base or "")
+    return int(m.group(1)) if m else None
+
+
+def shard_dir(out_dir: str, rid: int) -> str:
+    """Directory holding report `rid`: flat, or `NNNN/` buckets of REPORTS_SHARD_SIZE reports."""
+    size = settings.REPORTS_SHARD_SIZE
+    if size <= 0:
+        return out_dir
+    return os.path.join(out_dir, f"{rid // size:04d}")
+
+
+def report_path(out_dir: str, base: str, ext: str) -> str:
+    rid = report_id_from_base(base)
+    d = shard_dir(out_dir, rid) if rid is not None else out_dir
+    return os.path.join(d, f"{base}.{ext}")
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import html
+from string import Formatter
+from typing import Any, Callable, Optional
+
+
+def html_escape(x: Any) -> str:
+    return html.escape("" if x is None else str(x), quote=True)
+
+
+class Template:
+    """
+    Minimal compiled template: a str.format-style source is turned once into a
+    Python function returning a single f-string of literals and (escaped) context values.
+
+    Every `{field}` goes through `escape` (if given); `{field!s}` is inserted raw,
+    for pre-rendered fragments. Values are formatted with f-string semantics.
+    """
+
+    __slots__ = ("_fn", "_escape")
+
+    def __init__(self, source: str, escape: Optional[Callable[[Any], str]] = None):
+        parts: list[str] = []
+        for literal, field, _spec, conv in Formatter().parse(source):
+            if literal:
+                parts.append("f" + repr(literal.replace("{", "{{").replace("}", "}}")))
+            if field is not None:
+                value = f"ctx[{field!r}]"
+                if escape is not None and conv != "s":
+                    value = f"_esc({value})"
+                parts.append('f"{' + value + '}"')
+
+        # Adjacent f-string literals are joined at compile time into one expression.
+        code = "def _render(ctx, _esc):\n    return " + (" ".join(parts) or "''") + "\n"
+        ns: dict = {}
+        exec(compile(code, "<template>", "exec"), ns)
+        self._fn = ns["_render"]
+        self._escape = escape
+
+    def render(self, **ctx: Any) -> str:
+        return self._fn(ctx, self._escape)
+
+    def render_to(self, write: Callable[[str], Any], ctx: dict) -> None:
+        write(self._fn(ctx, self._escape))
+
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import gc
+
+from config import settings
+
+
+def preload() -> None:
+    """
+    Load read-only state in the gunicorn master (preload_app) so forked workers
+    share it copy-on-write instead of each loading its own copy.
+
+    Only fork-safe things belong here: model weights and the mmap'd sources
+    snapshot. SQLite connections, HTTP clients and thread pools are created
+    lazily in each worker.
+    """
+    # ONNX Runtime starts its intra-op thread pool when the session is built,
+    # and those threads don't survive fork: ONNX workers load their own (small) model.
+    if settings.EMBEDDING_BACKEND.strip().lower() in {"sentence-transformers", "st"}:
+        from src.rag.embeddings import get_embedder
+
+        get_embedder()
+
+    # Without a snapshot get_sources() would open a Qdrant client here; leave that to workers
+    from src.rag.qdrant_sources import get_snapshot, get_sources
+
+    if get_snapshot() is not None:
+        get_sources()
+
+    gc.collect()
+
+
+def freeze() -> None:
+    """Move everything allocated so far out of the GC's reach: collections in workers
+    then don't touch (and un-share) the preloaded objects' pages."""
+    gc.freeze()
@@ -0,0 +1,204 @@
+"""
+Cache pre-warming after a deploy. This is a background pass over the
+popular questions, run before users ask them.
+
+Queries come from PREWARM_QUERIES_FILE (one per line) and/or the most
+frequent questions in the reports index. Each query goes through source
+selection, search and page fetching. That loads the embedding model and
+BM25, fills the robots.txt cache and starts the extraction pool. With
+PREWARM_LLM, each query instead runs the whole graph, which fills the LLM
+cache and writes a report that report reuse can serve. Those reports are
+marked as background in the index, so they never count as popular
+questions themselves. Every LLM call is made at PRIORITY_BACKGROUND.
+
+One process per host does the work (a file lock). The pass stops at the
+first sign of real traffic in any worker, or when PREWARM_BUDGET_SECONDS
+run out. Traffic in the pre-warming worker itself also cancels a
+generation still queued for the LLM.
+
+    python -m src.runtime.prewarm --llm --budget 600
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import fcntl
+import os
+import threading
+import time
+from typing import List, Optional
+
+from config import settings
+from src.graph.llm_scheduler import cancel_scope
+
+LOCK_FILE = "prewarm.lock"
+TRAFFIC_FILE = "prewarm.traffic"
+
+_last_touch = 0.0
+_running: Optional["Prewarmer"] = None
+
+
+def note_traffic() -> None:
+    """Called on every interactive request: tells a running pre-warm (in any worker) to stop."""
+    global _last_touch
+    if _running is not None:
+        _running.stop()
+    now = time.monotonic()
+    if now - _last_touch < 5.0:
+        return
+    _last_touch = now
+    path = os.path.join(settings.PREWARM_STATE_DIR, TRAFFIC_FILE)
+    with contextlib.suppress(OSError):
+        os.makedirs(settings.PREWARM_STATE_DIR, exist_ok=True)
+        with open(path, "a"):
+            os.utime(path)
+
+
+def _traffic_since(ts: float) -> bool:
+    try:
+        return os.stat(os.path.join(settings.PREWARM_STATE_DIR, TRAFFIC_FILE)).st_mtime >= ts
+    except OSError:
+        return False
+
+
+def prewarm_queries(limit: Optional[int] = None) -> List[str]:
+    """Configured queries first, then popular ones from the reports index; case-insensitive unique."""
+    from src.reports.index import popular_queries
+
+    limit = settings.PREWARM_MAX_QUERIES if limit is None else limit
+    queries: List[str] = []
+    if settings.PREWARM_QUERIES_FILE:
+        with contextlib.suppress(FileNotFoundError):
+            with open(settings.PREWARM_QUERIES_FILE, "r", encoding="utf-8") as f:
+                queries += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if settings.PREWARM_FROM_REPORTS:
+        queries += popular_queries(settings.REPORTS_DIR, limit)
+
+    seen = set()
+    out = []
+    for q in queries:
+        key = " ".join(q.lower().split())
+        if key not in seen:
+            seen.add(key)
+            out.append(q)
+    return out[:limit]
+
+
+class Prewarmer:
+    """Runs `queries` one at a time on a daemon thread until done, out of budget, or traffic."""
+
+    def __init__(self, queries: List[str], budget_seconds: float, llm: bool):
+        self.queries = queries
+        self.budget_seconds = budget_seconds
+        self.llm = llm
+        self.warmed = 0
+        self.stopped_by = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Prewarmer":
+        self._thread = threading.Thread(target=self.run, name="prewarm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _why_stop(self, started: float, started_wall: float) -> str:
+        if self._stop.is_set():
+            return "stopped"
+        if _traffic_since(started_wall):
+            return "traffic"
+        if time.monotonic() - started >= self.budget_seconds:
+            return "budget"
+        return ""
+
+    def run(self) -> None:
+        # Imported here: this module is loaded by app.py before the graph modules are needed
+        from src.agent import SearchAgent
+        from src.graph.nodes import node_select_source, node_web_search
+
+        started, started_wall = time.monotonic(), time.time()
+        agent = SearchAgent()
+        graph = agent.build_graph() if self.llm else None
+
+        # stop() also takes a generation still waiting for the LLM out of the queue
+        with cancel_scope(self._stop):
+            for q in self.queries:
+                self.stopped_by = self._why_stop(started, started_wall)
+                if self.stopped_by:
+                    return
+                # never past the budget, even for one slow query
+                deadline = time.time() + min(
+                    settings.REQUEST_DEADLINE_SECONDS,
+                    max(1.0, self.budget_seconds - (time.monotonic() - started)),
+                )
+                state = agent._initial_state(q)
+                state.update(background=True, deadline=deadline)
+                try:
+                    if graph is not None:
+                        state["user_approval_raw"] = "y"
+                        # a fresh report for this question already exists: nothing to warm
+                        state["reuse_answer"] = "y"
+                        graph.invoke(state)
+                    else:
+                        state.update(node_select_source(state))
+                        node_web_search(state)
+                except Exception:
+                    # warming is best-effort; the next query may fare better
+                    continue
+                self.warmed += 1
+        self.stopped_by = "done"
+
+
+_lock_fd: Optional[int] = None
+
+
+def _acquire_lock() -> bool:
+    global _lock_fd
+    os.makedirs(settings.PREWARM_STATE_DIR, exist_ok=True)
+    fd = os.open(os.path.join(settings.PREWARM_STATE_DIR, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    # held for the life of this process: other workers (and restarts of them) skip pre-warming
+    _lock_fd = fd
+    return True
+
+
+def start_prewarm() -> Optional[Prewarmer]:
+    """Start the background pre-warm if enabled and no other process on this host runs it."""
+    global _running
+    if not settings.PREWARM_ENABLED or _lock_fd is not None or not _acquire_lock():
+        return None
+    queries = prewarm_queries()
+    if not queries:
+        return None
+    _running = Prewarmer(queries, settings.PREWARM_BUDGET_SECONDS, settings.PREWARM_LLM).start()
+    return _running
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--llm", action="store_true", default=settings.PREWARM_LLM, help="run the full graph (LLM + report)")
+    ap.add_argument("--budget", type=float, default=settings.PREWARM_BUDGET_SECONDS, help="seconds")
+    ap.add_argument("--limit", type=int, default=settings.PREWARM_MAX_QUERIES, help="max queries")
+    args = ap.parse_args()
+
+    queries = prewarm_queries(args.limit)
+    if not queries:
+        ap.exit(message="no queries: set PREWARM_QUERIES_FILE or generate some reports first\n")
+    start = time.perf_counter()
+    w = Prewarmer(queries, args.budget, args.llm).start()
+    w.join()
+    print(f"warmed {w.warmed}/{len(queries)} queries in {time.perf_counter() - start:.1f}s ({w.stopped_by})")
+
+
+if __name__ == "__main__":
+    main()
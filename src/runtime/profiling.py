@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from src.reports.store import atomic_write_text, report_path
+
+_FrameKey = Tuple[str, str, int]  # (function, file, first line)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler. Samples the thread that started it plus any
+    thread created while it runs (search / fetch pools serving the same
+    request); threads that already existed belong to other requests and are
+    skipped. Output is speedscope's "sampled" format, one profile per thread.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = max(0.001, interval)
+        self._frames: Dict[_FrameKey, int] = {}
+        self._samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self._names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target = threading.get_ident()
+        self._ignore: set = set()
+        self._start = self._end = 0.0
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        i = self._frames.get(key)
+        if i is None:
+            i = self._frames[key] = len(self._frames)
+        return i
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            dt, last = now - last, now
+            for tid, frame in sys._current_frames().items():
+                if tid == me or tid in self._ignore:
+                    continue
+                stack: List[int] = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.setdefault(tid, []).append((stack, dt))
+            for t in threading.enumerate():
+                if t.ident in self._samples and t.ident not in self._names:
+                    self._names[t.ident] = t.name
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._ignore = {t.ident for t in threading.enumerate() if t.ident != self._target}
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._end = time.perf_counter()
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames = [{"name": fn, "file": file, "line": line} for (fn, file, line) in self._frames]
+        profiles = []
+        # the request thread first, then pool threads in creation order
+        for tid in sorted(self._samples, key=lambda t: t != self._target):
+            samples = self._samples[tid]
+            total = sum(w for _, w in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": self._names.get(tid, str(tid)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [s for s, _ in samples],
+                "weights": [w for _, w in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "search-agent",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class Profile:
+    """A finished profile waiting to be saved (once the report basename is known)."""
+
+    def __init__(self, profiler: SamplingProfiler):
+        self.profiler = profiler
+
+    @property
+    def seconds(self) -> float:
+        return self.profiler._end - self.profiler._start
+
+    def save(self, out_dir: str, report_basename: Optional[str] = None) -> str:
+        """Next to the report (<base>.speedscope.json), or under profiles/ if none was written."""
+        if report_basename:
+            path = report_path(out_dir, report_basename, "speedscope.json")
+        else:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(out_dir, "profiles", f"{stamp}-{uuid.uuid4().hex[:8]}.speedscope.json")
+        name = report_basename or os.path.basename(path)
+        atomic_write_text(path, json.dumps(self.profiler.speedscope(name), separators=(",", ":")))
+        return path
+
+
+# -----------------------------
+# Admission: opt-in, sampled, rate-limited, one at a time per process
+# -----------------------------
+
+_lock = threading.Lock()
+_active = threading.Lock()
+_recent: List[float] = []
+
+
+def _admit(requested: bool) -> bool:
+    if not settings.PROFILE_ENABLED:
+        return False
+    wanted = (requested and settings.PROFILE_HEADER_ENABLED) or random.random() < settings.PROFILE_SAMPLE_RATE
+    if not wanted:
+        return False
+    now = time.monotonic()
+    with _lock:
+        _recent[:] = [t for t in _recent if now - t < 60.0]
+        if len(_recent) >= settings.PROFILE_MAX_PER_MINUTE:
+            return False
+        _recent.append(now)
+    return True
+
+
+@contextlib.contextmanager
+def maybe_profile(requested: bool = False) -> Iterator[List[Profile]]:
+    """
+    Profile the block if profiling is enabled and either `requested` (the
+    X-Profile request header) or the PROFILE_SAMPLE_RATE coin flip says so,
+    within PROFILE_MAX_PER_MINUTE. Yields a list that holds the Profile after
+    the block (empty when not profiled); call .save() on it.
+    """
+    out: List[Profile] = []
+    if not _admit(requested) or not _active.acquire(blocking=False):
+        yield out
+        return
+    prof = SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000.0)
+    try:
+        prof.start()
+        try:
+            yield out
+        finally:
+            prof.stop()
+            out.append(Profile(prof))
+    finally:
+        _active.release()
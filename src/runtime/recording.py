@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import pickle
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+# Trace file: appended segments, one per graph invocation of a session.
+#   segment = u32 length | zlib(pickle({"input": {...}, "started_at": float, "events": [...]}))
+#   event   = (kind, key, latency_s, ok, value_or_error_text)
+_LEN = struct.Struct("<I")
+
+Event = Tuple[str, str, float, bool, Any]
+
+
+class ReplayMiss(ConnectionError):
+    """Replay asked for an interaction the trace doesn't have; treated like a network failure."""
+
+
+class RecordedFailure(RuntimeError):
+    """A call that failed while recording fails the same way on replay."""
+
+
+def _key(obj: Any) -> str:
+    raw = json.dumps(obj, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+        self._lock = threading.Lock()
+
+    def add(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+
+
+class Replayer:
+    """
+    Serves recorded results by (kind, key), in recorded order for repeated
+    calls. `realtime` re-creates the recorded latency; otherwise results return at once.
+    """
+
+    def __init__(self, events: List[Event], realtime: bool = False):
+        self.realtime = realtime
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._queues: Dict[Tuple[str, str], Deque[Event]] = defaultdict(deque)
+        for ev in events:
+            self._queues[(ev[0], ev[1])].append(ev)
+
+    def take(self, kind: str, key: str) -> Event:
+        with self._lock:
+            q = self._queues.get((kind, key))
+            if not q:
+                self.misses += 1
+                raise ReplayMiss(f"no recorded {kind} call for key {key[:12]}")
+            # the last recording of a key keeps serving later repeats
+            return q.popleft() if len(q) > 1 else q[0]
+
+
+_active: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("io_trace", default=None)
+
+
+def capturing() -> bool:
+    """True while recording or replaying (callers bypass local caches so traces line up)."""
+    return _active.get() is not None
+
+
+def external(kind: str, key_obj: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Call `fn` — an interaction with an external service — through the active
+    recorder/replayer, if any. `key_obj` identifies the request (JSON-able).
+    """
+    mode = _active.get()
+    if mode is None:
+        return fn(*args, **kwargs)
+
+    key = _key(key_obj)
+    if isinstance(mode, Replayer):
+        _kind, _key_, latency, ok, value = mode.take(kind, key)
+        if mode.realtime:
+            time.sleep(latency)
+        if not ok:
+            raise RecordedFailure(value)
+        return value
+
+    start = time.perf_counter()
+    try:
+        value = fn(*args, **kwargs)
+    except Exception as e:
+        mode.add((kind, key, time.perf_counter() - start, False, f"{type(e).__name__}: {e}"))
+        raise
+    mode.add((kind, key, time.perf_counter() - start, True, value))
+    return value
+
+
+# -----------------------------
+# Trace files
+# -----------------------------
+
+def append_segment(path: str, segment: Dict[str, Any]) -> None:
+    blob = zlib.compress(pickle.dumps(segment, pickle.HIGHEST_PROTOCOL), 6)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(_LEN.pack(len(blob)) + blob)
+
+
+def read_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        data = f.read()
+    out, pos = [], 0
+    while pos + _LEN.size <= len(data):
+        (n,) = _LEN.unpack_from(data, pos)
+        pos += _LEN.size
+        out.append(pickle.loads(zlib.decompress(data[pos:pos + n])))
+        pos += n
+    return out
+
+
+def trace_path_for(session_id: str) -> Optional[str]:
+    """Where to record a new session (None: not recorded), per settings.IO_TRACE_*."""
+    if not settings.IO_TRACE_ENABLED or random.random() >= settings.IO_TRACE_SAMPLE_RATE:
+        return None
+    return os.path.join(settings.IO_TRACE_DIR, f"{session_id}.trace")
+
+
+@contextlib.contextmanager
+def recording(path: Optional[str], user_input: Dict[str, Any]) -> Iterator[None]:
+    """Record the block's external calls as one segment of the trace at `path` (no-op if None)."""
+    if not path:
+        yield
+        return
+    rec = Recorder()
+    started = time.time()
+    token = _active.set(rec)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+        append_segment(path, {"input": user_input, "started_at": started, "events": rec.events})
+
+
+@contextlib.contextmanager
+def replaying(replayer: Replayer) -> Iterator[Replayer]:
+    token = _active.set(replayer)
+    try:
+        yield replayer
+    finally:
+        _active.reset(token)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+# -----------------------------
+# Deadlines (absolute epoch seconds, carried in AgentState["deadline"])
+# -----------------------------
+
+def new_deadline(seconds: Optional[float] = None) -> float:
+    return time.time() + (settings.REQUEST_DEADLINE_SECONDS if seconds is None else seconds)
+
+
+def time_left(deadline: Optional[float], cap: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds available for the next call: min(cap, time until deadline).
+    Raises DeadlineExceeded once the deadline has passed.
+    """
+    if deadline is None:
+        return cap
+    left = deadline - time.time()
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if cap is None else min(cap, left)
+
+
+# -----------------------------
+# Circuit breakers
+# -----------------------------
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; while open,
+    calls fail immediately with CircuitOpen. After `reset_seconds` one trial call
+    is let through (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            st = self._state()
+            if st == "closed":
+                return True
+            if st == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self.allow():
+            raise CircuitOpen(f"circuit '{self.name}' is open")
+        try:
+            res = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return res
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state(), "failures": self._failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker by name: "ollama", "ddg", "qdrant", "fetch:<host>"."""
+    with _breakers_lock:
+        b = _breakers.get(name)
+        if b is None:
+            b = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=settings.BREAKER_RESET_SECONDS,
+            )
+        return b
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        items = list(_breakers.values())
+    return {b.name: b.stats() for b in items}
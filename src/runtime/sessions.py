@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+from src.graph.results import pack_results, unpack_results
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id         TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    data       BLOB NOT NULL
+)
+"""
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    # web results in the packed form: each string stored once, interned again on load
+    state = data.get("state")
+    if isinstance(state, dict) and state.get("web_results"):
+        data = {**data, "state": {**state, "web_results": pack_results(state["web_results"])}}
+    return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(blob: bytes) -> Dict[str, Any]:
+    data = pickle.loads(blob)
+    state = data.get("state")
+    if isinstance(state, dict) and isinstance(state.get("web_results"), bytes):
+        state["web_results"] = tuple(unpack_results(state["web_results"]))
+    return data
+
+
+class MemorySessionStore:
+    """Single-process store: `get` returns the live dict, `put` is a no-op for it."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._data.get(sid)
+
+    def put(self, sid: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[sid] = data
+
+    def cleanup(self, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            dead = [k for k, v in self._data.items() if now - float(v.get("created_at", now)) > ttl_seconds]
+            for k in dead:
+                self._data.pop(k, None)
+
+
+class SqliteSessionStore:
+    """
+    Shared by all worker processes: a session started in one worker can be
+    continued in another. Sessions are pickled, their web results in the
+    packed form (pack_results); `put` after every change.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # created at import time (possibly in the gunicorn master): don't keep this connection
+        with contextlib.closing(sqlite3.connect(db_path, timeout=30, isolation_level=None)) as conn:
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM sessions WHERE id = ?", (sid,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    def put(self, sid: str, data: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, created_at, data) VALUES (?, ?, ?)",
+            (sid, float(data.get("created_at", time.time())), _dumps(data)),
+        )
+
+    def cleanup(self, ttl_seconds: float) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE created_at < ?", (time.time() - ttl_seconds,))
+
+
+_store: Any = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Per-process store chosen by settings.SESSIONS_BACKEND ("memory" or "sqlite")."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = settings.SESSIONS_BACKEND.strip().lower()
+                if backend == "sqlite":
+                    _store = SqliteSessionStore(settings.SESSIONS_DB)
+                elif backend == "memory":
+                    _store = MemorySessionStore()
+                else:
+                    raise ValueError(f"Unknown SESSIONS_BACKEND: {settings.SESSIONS_BACKEND!r}")
+    return _store
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import wait as futures_wait
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (leader) runs
+    the function, everyone arriving while it is in flight waits on the same
+    Future and gets the same result (or exception). Nothing is cached afterwards.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.shared = 0
+        self.retries = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self.do_bounded(key, None, (), fn, *args, **kwargs)
+
+    def do_bounded(
+        self,
+        key: Hashable,
+        wait: Optional[float],
+        retry_on: Tuple[Type[BaseException], ...],
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        `do` for callers with their own budget. A follower waits at most `wait`
+        seconds (then TimeoutError), and a leader failure in `retry_on` (the
+        leader's own deadline or queue timeout) is not handed on: the follower
+        runs the call again, as leader or follower of the next flight.
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                fut = self._inflight.get(key)
+                leader = fut is None
+                if leader:
+                    fut = Future()
+                    self._inflight[key] = fut
+                    self.leaders += 1
+                else:
+                    self.shared += 1
+
+            if leader:
+                return self._lead(key, fut, fn, *args, **kwargs)
+
+            left = None if wait is None else max(0.0, wait - (time.monotonic() - start))
+            # wait() rather than result(timeout): a leader's own TimeoutError must not look like ours
+            if not futures_wait([fut], timeout=left).done:
+                raise TimeoutError(f"flight '{self.name}': out of time waiting for the leader")
+            exc = fut.exception()
+            if exc is None:
+                return fut.result()
+            if not isinstance(exc, retry_on):
+                raise exc
+            with self._lock:
+                self.retries += 1
+
+    def _lead(self, key: Hashable, fut: Future, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            res = fn(*args, **kwargs)
+        except BaseException as e:
+            # out of the table before followers wake, so a retrying follower starts a new flight
+            self._forget(key, fut)
+            fut.set_exception(e)
+            raise
+        self._forget(key, fut)
+        fut.set_result(res)
+        return res
+
+    def _forget(self, key: Hashable, fut: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "retries": self.retries,
+                "in_flight": len(self._inflight),
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def flight(name: str) -> SingleFlight:
+    """Named, process-wide single-flight group (e.g. "llm", "search", "fetch")."""
+    with _groups_lock:
+        g = _groups.get(name)
+        if g is None:
+            g = _groups[name] = SingleFlight(name)
+        return g
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from config import settings
+from src.graph.results import WebResult
+from src.runtime.recording import external
+from src.runtime.resilience import DeadlineExceeded, breaker, time_left
+from src.web.polite import polite_get
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+_ATOM = {"a": "http://www.w3.org/2005/Atom"}
+
+
+def _clean(s: Optional[str]) -> str:
+    return " ".join(_TAG_RE.sub("", s or "").split())
+
+
+def sentence_quotes(text: str, max_quotes: int, max_len: int) -> List[str]:
+    """Short quotes from a structured summary: first sentences of at least 40 chars."""
+    quotes = []
+    for sent in _SENT_RE.split(_clean(text)):
+        if len(sent) < 40:
+            continue
+        quotes.append(sent[:max_len].strip())
+        if len(quotes) >= max_quotes:
+            break
+    return quotes
+
+
+class SourceAdapter:
+    """
+    Search a source through its structured API instead of `site:` search + HTML scraping.
+    `parse` is pure (payload -> results) so recorded responses can be replayed offline.
+    Results are the same WebResult records the search + fetch path produces.
+    """
+
+    source_id: str = ""
+
+    def search(self, query: str, limit: int, deadline: Optional[float]) -> List[WebResult]:
+        raise NotImplementedError
+
+    def _get(self, url: str, deadline: Optional[float], headers: Optional[Dict[str, str]] = None):
+        # each call gets what is left of the request's budget, not a fresh timeout
+        timeout = time_left(deadline, settings.FETCH_TIMEOUT_SECONDS)
+        # APIs, not pages: robots.txt doesn't apply, the per-domain rate limit does
+        r = polite_get(url, timeout=timeout, robots=False, headers=headers)
+        if r is None:
+            raise TimeoutError(f"{self.source_id}: rate limited past the time budget")
+        r.raise_for_status()
+        return r
+
+    def _quotes(self, text: str) -> List[str]:
+        return sentence_quotes(text, settings.MAX_QUOTES, settings.MAX_QUOTE_LEN)
+
+
+class WikipediaAdapter(SourceAdapter):
+    source_id = "wikipedia"
+    base = "https://en.wikipedia.org"
+
+    def search(self, query: str, limit: int, deadline: Optional[float]) -> List[WebResult]:
+        r = self._get(f"{self.base}/w/rest.php/v1/search/page?q={quote(query)}&limit={limit}", deadline)
+
+        results = []
+        out_of_time = False
+        for key, item in self.parse_search(r.json()):
+            if not out_of_time:
+                try:
+                    s = self._get(f"{self.base}/api/rest_v1/page/summary/{quote(key, safe='')}", deadline)
+                    item = self.with_summary(item, s.json())
+                except DeadlineExceeded:
+                    # the remaining pages keep their search excerpt only
+                    out_of_time = True
+                except Exception:
+                    pass
+            results.append(item)
+        return results
+
+    def with_summary(self, item: WebResult, payload: Dict[str, Any]) -> WebResult:
+        return replace(item, quotes=tuple(self._quotes(payload.get("extract") or "")))
+
+    def parse_search(self, payload: Dict[str, Any]) -> List[Tuple[str, WebResult]]:
+        """(page key, result without quotes) pairs; quotes come from the page summary."""
+        out = []
+        for p in payload.get("pages") or []:
+            key = p.get("key")
+            if not key:
+                continue
+            desc = _clean(p.get("description"))
+            excerpt = _clean(p.get("excerpt"))
+            out.append((key, WebResult.make(
+                _clean(p.get("title")) or key,
+                f"{self.base}/wiki/{quote(key, safe='')}",
+                f"{desc}: {excerpt}" if desc else excerpt,
+            )))
+        return out
+
+
+class ArxivAdapter(SourceAdapter):
+    source_id = "arxiv"
+
+    def search(self, query: str, limit: int, deadline: Optional[float]) -> List[WebResult]:
+        url = (
+            "https://export.arxiv.org/api/query"
+            f"?search_query=all:{quote(query)}&start=0&max_results={limit}&sortBy=relevance"
+        )
+        return self.parse(self._get(url, deadline).text)
+
+    def parse(self, atom_xml: str) -> List[WebResult]:
+        root = ET.fromstring(atom_xml)
+        out = []
+        for e in root.findall("a:entry", _ATOM):
+            url = (e.findtext("a:id", default="", namespaces=_ATOM) or "").strip()
+            if not url:
+                continue
+            summary = _clean(e.findtext("a:summary", default="", namespaces=_ATOM))
+            authors = [_clean(a.findtext("a:name", default="", namespaces=_ATOM)) for a in e.findall("a:author", _ATOM)]
+            out.append(WebResult.make(
+                _clean(e.findtext("a:title", default="", namespaces=_ATOM)),
+                url,
+                ", ".join(a for a in authors[:3] if a) + (" et al." if len(authors) > 3 else ""),
+                self._quotes(summary),
+            ))
+        return out
+
+
+class GitHubAdapter(SourceAdapter):
+    source_id = "github"
+
+    def search(self, query: str, limit: int, deadline: Optional[float]) -> List[WebResult]:
+        headers = {"Accept": "application/vnd.github+json"}
+        if settings.GITHUB_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.GITHUB_TOKEN}"
+        url = f"https://api.github.com/search/repositories?q={quote(query)}&per_page={limit}"
+        return self.parse(self._get(url, deadline, headers=headers).json())
+
+    def parse(self, payload: Dict[str, Any]) -> List[WebResult]:
+        out = []
+        for it in payload.get("items") or []:
+            url = it.get("html_url")
+            if not url:
+                continue
+            desc = _clean(it.get("description"))
+            lang = it.get("language") or "n/a"
+            out.append(WebResult.make(
+                it.get("full_name") or url,
+                url,
+                f"★ {it.get('stargazers_count', 0)} · {lang} · updated {(it.get('pushed_at') or '')[:10]}",
+                [desc[:settings.MAX_QUOTE_LEN]] if desc else [],
+            ))
+        return out
+
+
+class RedditAdapter(SourceAdapter):
+    source_id = "reddit"
+
+    def search(self, query: str, limit: int, deadline: Optional[float]) -> List[WebResult]:
+        url = f"https://www.reddit.com/search.json?q={quote(query)}&limit={limit}&sort=relevance&raw_json=1"
+        return self.parse(self._get(url, deadline).json())
+
+    def parse(self, payload: Dict[str, Any]) -> List[WebResult]:
+        out = []
+        for child in (payload.get("data") or {}).get("children") or []:
+            d = child.get("data") or {}
+            permalink = d.get("permalink")
+            if not permalink:
+                continue
+            out.append(WebResult.make(
+                _clean(d.get("title")),
+                f"https://www.reddit.com{permalink}",
+                f"r/{d.get('subreddit', '')} · {d.get('score', 0)} points · {d.get('num_comments', 0)} comments",
+                self._quotes(d.get("selftext") or ""),
+            ))
+        return out
+
+
+ADAPTERS: Dict[str, SourceAdapter] = {
+    a.source_id: a for a in (WikipediaAdapter(), ArxivAdapter(), GitHubAdapter(), RedditAdapter())
+}
+
+
+def adapter_search(
+    source_id: str,
+    query: str,
+    limit: int,
+    deadline: Optional[float] = None,
+) -> Optional[List[WebResult]]:
+    """
+    Results from the source's structured API, or None when there is no adapter,
+    adapters are disabled, or the API failed (callers fall back to search + fetch).
+    """
+    adapter = ADAPTERS.get(source_id)
+    if adapter is None or not settings.SOURCE_ADAPTERS_ENABLED:
+        return None
+
+    q = " ".join((query or "").split())
+    try:
+        return external(
+            "api", (source_id, q, limit),
+            breaker(f"api:{source_id}").call, adapter.search, q, limit, deadline,
+        )
+    except Exception:
+        return None
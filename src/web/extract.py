@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from config import settings
+
+Extract = Tuple[str, List[str]]  # (page text, short quotes)
+
+
+class ExtractQueueFull(TimeoutError):
+    pass
+
+
+# -----------------------------
+# Pure extraction (runs in pool workers, or inline when the pool is off)
+# -----------------------------
+
+def pick_short_quotes(text: str, max_quotes: int = 2, max_len: int = 220):
+    quotes = []
+    for line in text.splitlines():
+        if len(line) < 40:
+            continue
+        quotes.append(line[:max_len].strip())
+        if len(quotes) >= max_quotes:
+            break
+    return quotes
+
+
+def extract(
+    raw: bytes,
+    encoding: Optional[str],
+    max_chars: int,
+    max_quotes: int = 2,
+    max_len: int = 220,
+) -> Extract:
+    """Visible text of an HTML page (script/style dropped) and its first short quotes."""
+    from bs4 import BeautifulSoup
+
+    # bytes in: charset detection happens here too, not in the request thread
+    soup = BeautifulSoup(raw, "html.parser", from_encoding=encoding)
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text("\n")
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())[:max_chars]
+    return text, pick_short_quotes(text, max_quotes=max_quotes, max_len=max_len)
+
+
+def _warm() -> None:
+    # pool initializer: pay bs4's import and first-parse cost before the first real page
+    extract(b"<html><body><p>warm</p></body></html>", "utf-8", 100)
+
+
+def _ping() -> None:
+    return None
+
+
+# -----------------------------
+# Process pool with bounded admission
+# -----------------------------
+
+class ExtractPool:
+    """
+    HTML parsing in worker processes, off the GIL of the serving process.
+    At most `max_pending` pages are queued or parsing at once; callers beyond
+    that wait up to their timeout, then get ExtractQueueFull.
+    """
+
+    def __init__(self, size: int, max_pending: int):
+        self.size = max(1, size)
+        # forkserver/spawn: forking a process that already runs threads is unsafe
+        method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=mp.get_context(method),
+            initializer=_warm,
+        )
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def warm(self) -> None:
+        """Start every worker now (ProcessPoolExecutor spawns lazily)."""
+        for f in [self._pool.submit(_ping) for _ in range(self.size)]:
+            f.result()
+
+    def extract(self, raw: bytes, encoding: Optional[str], max_chars: int, timeout: Optional[float]) -> Extract:
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            raise ExtractQueueFull("extraction queue is full")
+        try:
+            fut = self._pool.submit(
+                extract, raw, encoding, max_chars, settings.MAX_QUOTES, settings.MAX_QUOTE_LEN
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        # the slot is held until the worker is done with the page, not until the caller gives up
+        fut.add_done_callback(lambda _f: self._slots.release())
+        try:
+            return fut.result(timeout=None if timeout is None else max(0.0, timeout - (time.monotonic() - start)))
+        except FuturesTimeout:
+            fut.cancel()  # still queued: frees the slot now
+            raise
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[ExtractPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_extract_pool() -> Optional[ExtractPool]:
+    """Per-process pool (created and warmed on first use); None when EXTRACT_POOL_SIZE is 0."""
+    global _pool
+    if settings.EXTRACT_POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ExtractPool(settings.EXTRACT_POOL_SIZE, settings.EXTRACT_MAX_PENDING)
+                pool.warm()
+                _pool = pool
+    return _pool
+
+
+def extract_page(raw: bytes, encoding: Optional[str], max_chars: int, timeout: Optional[float] = None) -> Extract:
+    global _pool
+    pool = get_extract_pool()
+    if pool is None:
+        return extract(raw, encoding, max_chars, settings.MAX_QUOTES, settings.MAX_QUOTE_LEN)
+    try:
+        return pool.extract(raw, encoding, max_chars, timeout)
+    except BrokenProcessPool:
+        # a worker died (OOM on a huge page, ...): drop the pool, next call builds a new one
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown()
+        raise
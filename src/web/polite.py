@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from config import settings
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    domain        TEXT PRIMARY KEY,
+    tokens        REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+def domain_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+# -----------------------------
+# Per-domain token bucket (SQLite: shared by all threads, workers and processes)
+# -----------------------------
+
+class DomainRateLimiter:
+    def __init__(self, db_path: str, rate: float, burst: float):
+        self.db_path = db_path
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _try_take(self, domain: str, rate: float, burst: float) -> float:
+        """Take one token if available; otherwise return seconds to wait."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM buckets WHERE domain = ?", (domain,)
+            ).fetchone()
+            tokens, updated, blocked = row if row else (burst, now, 0.0)
+
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if blocked > now:
+                wait = blocked - now
+            elif tokens >= 1.0:
+                tokens -= 1.0
+                wait = 0.0
+            else:
+                wait = (1.0 - tokens) / rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (domain, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                (domain, tokens, now, blocked),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, domain: str, timeout: Optional[float], min_interval: float = 0.0) -> bool:
+        """Block until `domain` may be hit again; False if that would take longer than `timeout`."""
+        rate, burst = self.rate, self.burst
+        if min_interval > 0:
+            # a crawl-delay is a spacing between requests: no bursts
+            rate, burst = min(rate, 1.0 / min_interval), 1.0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._try_take(domain, rate, burst)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def block(self, domain: str, seconds: float) -> None:
+        """Honour Retry-After: nobody hits `domain` for `seconds`."""
+        until = time.time() + seconds
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO buckets (domain, tokens, updated_at, blocked_until) VALUES (?, 0, ?, ?) "
+            "ON CONFLICT(domain) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until)",
+            (domain, time.time(), until),
+        )
+
+
+_limiter: Optional[DomainRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = DomainRateLimiter(
+                    settings.CRAWL_STATE_DB,
+                    rate=settings.CRAWL_RATE_PER_SECOND,
+                    burst=settings.CRAWL_BURST,
+                )
+    return _limiter
+
+
+_search_limiter: Optional[DomainRateLimiter] = None
+
+
+def get_search_limiter() -> DomainRateLimiter:
+    """Bucket for the search backend: same state file, so the budget is shared by all workers."""
+    global _search_limiter
+    if _search_limiter is None:
+        with _limiter_lock:
+            if _search_limiter is None:
+                _search_limiter = DomainRateLimiter(
+                    settings.CRAWL_STATE_DB,
+                    rate=settings.SEARCH_RATE_PER_SECOND,
+                    burst=settings.SEARCH_BURST,
+                )
+    return _search_limiter
+
+
+# -----------------------------
+# robots.txt (cached per host)
+# -----------------------------
+
+# origin -> (expires_at, parser); None allows everything
+_ROBOTS: "OrderedDict[str, Tuple[float, Optional[RobotFileParser]]]" = OrderedDict()
+_ROBOTS_LOCK = threading.Lock()
+_ROBOTS_MAX = 1024
+ROBOTS_TIMEOUT_SECONDS = 5.0
+
+
+def _robots_for(url: str, timeout: float) -> Optional[RobotFileParser]:
+    """
+    Parsed robots.txt for the origin of `url`, None if it has none (4xx). A
+    robots.txt that can't be read (5xx, 429, connection error) disallows the
+    whole origin until CRAWL_DEFAULT_BACKOFF_SECONDS have passed (RFC 9309).
+    A fetch that times out is not cached and raises requests.Timeout: the
+    caller skips the page.
+    """
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    now = time.time()
+
+    with _ROBOTS_LOCK:
+        item = _ROBOTS.get(origin)
+        if item and now < item[0]:
+            return item[1]
+
+    rp: Optional[RobotFileParser] = RobotFileParser(origin + "/robots.txt")
+    ttl = settings.CRAWL_ROBOTS_TTL_SECONDS
+    try:
+        r = requests.get(
+            origin + "/robots.txt",
+            timeout=min(ROBOTS_TIMEOUT_SECONDS, timeout),
+            headers={"User-Agent": settings.CRAWL_USER_AGENT},
+        )
+        if r.status_code >= 500 or r.status_code == 429:
+            rp.disallow_all = True  # server trouble: stay away for a while
+            ttl = settings.CRAWL_DEFAULT_BACKOFF_SECONDS
+        elif r.status_code >= 400:
+            rp = None  # no robots.txt: everything allowed
+        else:
+            rp.parse(r.text.splitlines())
+    except requests.Timeout:
+        raise
+    except requests.RequestException:
+        rp.disallow_all = True
+        ttl = settings.CRAWL_DEFAULT_BACKOFF_SECONDS
+
+    with _ROBOTS_LOCK:
+        _ROBOTS[origin] = (now + ttl, rp)
+        _ROBOTS.move_to_end(origin)
+        while len(_ROBOTS) > _ROBOTS_MAX:
+            _ROBOTS.popitem(last=False)
+    return rp
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def polite_get(
+    url: str,
+    timeout: float,
+    robots: bool = True,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[requests.Response]:
+    """
+    GET `url` as a well-behaved crawler: robots.txt allow-list and crawl-delay,
+    the shared per-domain token bucket, and Retry-After on 429/503 (one retry
+    if the wait fits in `timeout`). Returns None when the page must be skipped.
+    `robots=False` is for documented API endpoints, which still get the bucket.
+    """
+    ua = settings.CRAWL_USER_AGENT
+    headers = {**(headers or {}), "User-Agent": ua}
+    start = time.monotonic()
+    try:
+        # robots.txt comes out of the same time budget as the page
+        rp = _robots_for(url, timeout) if robots and settings.CRAWL_RESPECT_ROBOTS else None
+    except requests.Timeout:
+        return None
+    if rp is not None and not rp.can_fetch(ua, url):
+        return None
+    delay = float(rp.crawl_delay(ua) or 0) if rp is not None else 0.0
+
+    domain = domain_of(url)
+    limiter = get_rate_limiter()
+
+    for attempt in range(2):
+        left = timeout - (time.monotonic() - start)
+        if left <= 0 or not limiter.acquire(domain, timeout=left, min_interval=delay):
+            return None
+
+        r = requests.get(url, timeout=max(0.5, timeout - (time.monotonic() - start)), headers=headers)
+        if r.status_code not in (429, 503):
+            return r
+
+        wait = _retry_after_seconds(r.headers.get("Retry-After"))
+        limiter.block(domain, wait if wait is not None else settings.CRAWL_DEFAULT_BACKOFF_SECONDS)
+        if attempt == 0 and wait is not None and wait <= settings.CRAWL_MAX_RETRY_AFTER_SECONDS:
+            continue
+        return r
+    return None
+
+
+# -----------------------------
+# Fair scheduling across domains
+# -----------------------------
+
+def fair_order(urls: Sequence[str]) -> List[int]:
+    """Indices of `urls` interleaved round-robin by domain (stable within a domain)."""
+    queues: "OrderedDict[str, deque]" = OrderedDict()
+    for i, u in enumerate(urls):
+        queues.setdefault(domain_of(u), deque()).append(i)
+
+    order: List[int] = []
+    while queues:
+        for d in list(queues):
+            order.append(queues[d].popleft())
+            if not queues[d]:
+                del queues[d]
+    return order
+
+
+def fair_map(fn: Callable[[str], T], urls: Sequence[str], workers: Optional[int] = None) -> List[T]:
+    """
+    Run `fn` over `urls` concurrently, submitted round-robin by domain; results in input order.
+    Fairness is per call: concurrent requests each get their own pool and are only
+    held back from each other by the shared per-domain token bucket.
+    """
+    if not urls:
+        return []
+    workers = workers or settings.CRAWL_CONCURRENCY
+    results: Dict[int, T] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as pool:
+        # each task runs in a copy of the caller's context (request-scoped state such as an I/O trace)
+        futures = {i: pool.submit(contextvars.copy_context().run, fn, urls[i]) for i in fair_order(urls)}
+        for i, fut in futures.items():
+            results[i] = fut.result()
+    return [results[i] for i in range(len(urls))]
@@ -1,13 +1,65 @@
-import requests
-from bs4 import BeautifulSoup
+import contextvars
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import urlsplit
+
 from ddgs import DDGS
 
+from config import settings
+from src.web.extract import extract_page
+from src.web.polite import domain_of, fair_map, get_search_limiter, polite_get
+from src.web.urls import canonical_url
+from src.runtime.recording import external
+from src.runtime.resilience import DeadlineExceeded, breaker, time_left
+from src.runtime.singleflight import flight
+
+
+SEARCH_BUCKET = "search:ddg"
+
+
+class SearchRateLimited(TimeoutError):
+    """No search token in time. Not a backend failure, so it doesn't count against the breaker."""
+
+
+def web_search_allowed(
+    query: str,
+    domain: str,
+    max_results: int = 5,
+    deadline: Optional[float] = None,
+    wait: bool = True,
+):
+    """
+    DDG results for `query` on `domain`. Each real DDG request takes a token from
+    the search bucket; `wait=False` gives up at once (SearchRateLimited) instead
+    of waiting for one.
+    """
+    timeout = time_left(deadline, settings.DDG_TIMEOUT_SECONDS)
+    # Concurrent identical searches share one DDG request
+    key = (query, domain, max_results)
+    # A follower doesn't inherit the leader's budget: it waits at most its own
+    # timeout, and retries itself if the leader ran out of tokens or time
+    return external(
+        "search", key,
+        flight("search").do_bounded, key, timeout, (SearchRateLimited, DeadlineExceeded),
+        _rate_limited_search, query, domain, max_results, timeout, wait,
+    )
+
 
-def web_search_allowed(query: str, domain: str, max_results: int = 5):
+def _rate_limited_search(query: str, domain: str, max_results: int, timeout: float, wait: bool):
+    start = time.monotonic()
+    if not get_search_limiter().acquire(SEARCH_BUCKET, timeout=timeout if wait else 0.0):
+        raise SearchRateLimited(f"no search token for {query!r}")
+    timeout -= time.monotonic() - start
+    return breaker("ddg").call(_web_search, query, domain, max_results, timeout)
+
+
+def _web_search(query: str, domain: str, max_results: int, timeout: float):
     q = f"site:{domain} {query}"
     out = []
 
-    with DDGS() as ddgs:
+    with DDGS(timeout=max(1, int(timeout))) as ddgs:
         for r in ddgs.text(q, max_results=max_results):
             out.append({
                 "title": (r.get("title") or "").strip(),
@@ -18,22 +70,171 @@ def web_search_allowed(query: str, domain: str, max_results: int = 5):
     return [x for x in out if x["url"]]
 
 
-def fetch_page_text(url: str, timeout: int = 10, max_chars: int = 6000) -> str:
-    r = requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
-    soup = BeautifulSoup(r.text, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    text = soup.get_text("\n")
-    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
-    return text[:max_chars]
-
-
-def pick_short_quotes(text: str, max_quotes: int = 2, max_len: int = 220):
-    quotes = []
-    for line in text.splitlines():
-        if len(line) < 40:
-            continue
-        quotes.append(line[:max_len].strip())
-        if len(quotes) >= max_quotes:
-            break
-    return quotes
+def _on_domain(url: str, domain: str) -> bool:
+    host = domain_of(url)
+    domain = domain.lower().removeprefix("www.")
+    return not domain or host == domain or host.endswith("." + domain)
+
+
+def rrf_merge(ranked_lists: Sequence[Sequence[Dict[str, Any]]], k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Reciprocal-rank fusion: score(page) = sum over lists of 1 / (k + rank).
+    Pages are keyed by canonical URL but keep the URL of their best-ranked hit
+    (the one that gets fetched); the first non-empty title/snippet seen wins.
+    """
+    k = settings.RRF_K if k is None else k
+    scores: Dict[str, float] = {}
+    best_rank: Dict[str, int] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for results in ranked_lists:
+        for rank, r in enumerate(results, 1):
+            url = (r.get("url") or "").strip()
+            key = canonical_url(url)
+            if not key:
+                continue
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            cur = merged.setdefault(key, {**r, "url": url})
+            if rank < best_rank.get(key, rank + 1):
+                best_rank[key] = rank
+                cur["url"] = url
+            for field in ("title", "snippet"):
+                if not cur.get(field) and r.get(field):
+                    cur[field] = r[field]
+    order = sorted(scores, key=lambda u: -scores[u])  # stable: ties keep first-seen order
+    return [merged[u] for u in order]
+
+
+def web_search_multi(
+    queries: Sequence[str],
+    domain: str,
+    max_results: int = 5,
+    deadline: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run several queries for one request concurrently (each through the search
+    single-flight and breaker, restricted to `domain`) and fuse them with RRF.
+    A failing sub-query contributes nothing; hits off the allowlisted domain are dropped.
+
+    The first query waits for a search token; the others are extras and are
+    dropped if the bucket is empty, so fan-out never outruns SEARCH_RATE_PER_SECOND.
+    """
+    if not queries:
+        return []
+
+    def one(i: int) -> List[Dict[str, Any]]:
+        try:
+            found = web_search_allowed(queries[i], domain, max_results, deadline, wait=i == 0)
+        except Exception:
+            return []
+        return [r for r in found if _on_domain(r["url"], domain)]
+
+    if len(queries) == 1:
+        lists = [one(0)]
+    else:
+        workers = max(1, min(settings.SEARCH_MAX_PARALLEL, len(queries)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # copy_context: sub-queries belong to this request's I/O trace, if any
+            lists = list(pool.map(lambda i: contextvars.copy_context().run(one, i), range(len(queries))))
+    return rrf_merge(lists)
+
+
+class Page(NamedTuple):
+    """A fetched page plus the validators a later refresh revalidates it with."""
+
+    text: str
+    quotes: List[str]
+    etag: str = ""
+    last_modified: str = ""
+    digest: str = ""  # sha1 of the raw body
+
+
+class _Download(NamedTuple):
+    raw: bytes
+    encoding: Optional[str]
+    etag: str
+    last_modified: str
+    not_modified: bool
+
+
+def fetch_page(
+    url: str,
+    timeout: float = 10,
+    max_chars: int = 6000,
+    deadline: Optional[float] = None,
+    cached: Optional[Page] = None,
+) -> Page:
+    """
+    Text and quotes of `url`; an empty Page when it is skipped (robots.txt, rate limit).
+    With `cached` (a Page from an earlier fetch) the request is conditional, and a
+    304 or an unchanged body returns the cached quotes without parsing the page again.
+    """
+    timeout = time_left(deadline, timeout)
+    host = (urlsplit(url).hostname or "").lower()
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    # Concurrent fetches of one URL share the download; each caller extracts its copy
+    key = (url, tuple(sorted(headers.items())))
+    page = external(
+        "fetch", key,
+        flight("fetch").do, key,
+        breaker(f"fetch:{host}").call,
+        _download, url, timeout, headers,
+    )
+    if page is None:
+        return Page("", [])
+    if cached is not None and page.not_modified:
+        return cached
+    digest = hashlib.sha1(page.raw).hexdigest()
+    if cached is not None and digest == cached.digest:
+        return cached._replace(etag=page.etag, last_modified=page.last_modified)
+    # Parsing runs in the extraction pool; its failures are not the host's fault
+    text, quotes = extract_page(
+        page.raw, page.encoding, max_chars, timeout=time_left(deadline, settings.EXTRACT_TIMEOUT_SECONDS),
+    )
+    return Page(text, quotes, page.etag, page.last_modified, digest)
+
+
+def _download(url: str, timeout: float, headers: Optional[Dict[str, str]] = None) -> Optional[_Download]:
+    r = polite_get(url, timeout=timeout, headers=headers or None)
+    if r is None or r.status_code == 429:
+        # disallowed by robots.txt, or rate-limited past our time budget
+        return None
+    if r.status_code >= 500:
+        # server-side failures count against the host's breaker
+        r.raise_for_status()
+    etag = r.headers.get("ETag") or ""
+    last_modified = r.headers.get("Last-Modified") or ""
+    if r.status_code == 304:
+        return _Download(b"", None, etag or (headers or {}).get("If-None-Match", ""), last_modified, True)
+    # Only a declared charset; otherwise let the parser sniff <meta charset> / BOM
+    declared = "charset" in (r.headers.get("Content-Type") or "").lower()
+    return _Download(r.content, r.encoding if declared else None, etag, last_modified, False)
+
+
+def fetch_pages(
+    urls: List[str],
+    timeout: float = 10,
+    max_chars: int = 6000,
+    deadline: Optional[float] = None,
+    cached: Optional[Dict[str, Page]] = None,
+) -> List[Page]:
+    """
+    Fetch pages concurrently, fairly across domains. `cached` is keyed by URL
+    (matched canonically). A failed page yields its cached copy if there is one,
+    else an empty Page.
+    """
+    # by canonical URL: a refresh may get the same page back under another of its URLs
+    cached = {canonical_url(u): p for u, p in (cached or {}).items()}
+
+    def one(url: str) -> Page:
+        prev = cached.get(canonical_url(url))
+        try:
+            return fetch_page(url, timeout=timeout, max_chars=max_chars, deadline=deadline, cached=prev)
+        except Exception:
+            return prev or Page("", [])
+
+    return fair_map(one, urls)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Sequence
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the page content
+_TRACKING = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "source", "si", "spm", "share_id", "_ga", "_gl",
+}
+_TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+_ARXIV_ID_RE = re.compile(r"^/(?:abs|pdf|html|format)/(.+?)(?:v\d+)?(?:\.pdf)?/?$")
+_REDDIT_POST_RE = re.compile(r"^/r/([^/]+)/comments/([a-z0-9]+)", re.I)
+_REDDIT_HOSTS = {"reddit.com", "www.reddit.com", "old.reddit.com", "new.reddit.com", "np.reddit.com", "m.reddit.com"}
+
+
+def _clean_query(query: str) -> str:
+    pairs = [
+        (k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+        if k.lower() not in _TRACKING and not k.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    return urlencode(sorted(pairs))
+
+
+def _wikipedia(host: str, path: str, query: str):
+    # en.m.wikipedia.org -> en.wikipedia.org; /w/index.php?title=X -> /wiki/X
+    host = host.replace(".m.wikipedia.org", ".wikipedia.org")
+    if host == "wikipedia.org" or host == "www.wikipedia.org":
+        host = "en.wikipedia.org"
+    params = dict(parse_qsl(query))
+    if path == "/w/index.php" and "title" in params and set(params) <= {"title", "redirect"}:
+        path, query = "/wiki/" + params["title"], ""
+    if path.startswith("/wiki/"):
+        title = unquote(path[len("/wiki/"):]).replace(" ", "_")
+        path = "/wiki/" + quote(title, safe="/:_(),'!*-.~")
+    return host, path, query
+
+
+def _arxiv(host: str, path: str, query: str):
+    # abs/pdf/html, any version -> the abstract page of the latest version
+    m = _ARXIV_ID_RE.match(path)
+    if m:
+        return "arxiv.org", f"/abs/{m.group(1)}", ""
+    return "arxiv.org", path, query
+
+
+def _github(host: str, path: str, query: str):
+    parts = [p for p in path.split("/") if p]
+    if len(parts) >= 2:
+        # owner/repo are case-insensitive; "repo.git" is the same repository
+        parts[0], parts[1] = parts[0].lower(), parts[1].lower().removesuffix(".git")
+        path = "/" + "/".join(parts)
+    return "github.com", path, query
+
+
+def _reddit(host: str, path: str, query: str):
+    m = _REDDIT_POST_RE.match(path)
+    if m:
+        # the title slug and comment permalinks are cosmetic
+        return "www.reddit.com", f"/r/{m.group(1).lower()}/comments/{m.group(2).lower()}", ""
+    return "www.reddit.com", path, query
+
+
+def canonical_url(url: str) -> str:
+    """
+    One URL per page: https, lower-case host, no fragment, default port,
+    tracking parameters or trailing slash, sorted query, plus per-source rules
+    (Wikipedia mobile/index.php, arXiv abs/pdf/versions, GitHub case/.git,
+    Reddit hosts/slugs). Unparseable input is returned stripped.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    if not host or parts.scheme.lower() not in ("http", "https"):
+        return url
+
+    path = parts.path or "/"
+    query = _clean_query(parts.query)
+
+    if host == "wikipedia.org" or host.endswith(".wikipedia.org"):
+        host, path, query = _wikipedia(host, path, query)
+    elif host in ("arxiv.org", "www.arxiv.org", "export.arxiv.org"):
+        host, path, query = _arxiv(host, path, query)
+    elif host in ("github.com", "www.github.com"):
+        host, path, query = _github(host, path, query)
+    elif host in _REDDIT_HOSTS:
+        host, path, query = _reddit(host, path, query)
+
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    return urlunsplit(("https", netloc, path, query, ""))
+
+
+def dedup_results(results: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Search hits with duplicates (same canonical URL) collapsed into the best-ranked
+    one, which borrows a later duplicate's snippet if it has none. The kept hit
+    keeps its own URL: the canonical form is only the identity (it may not be
+    fetchable, e.g. https on an http-only site, or arXiv /abs for a /pdf link).
+    Order is kept, so slicing afterwards fills freed slots with the next distinct pages.
+    """
+    out: List[Dict[str, Any]] = []
+    seen: Dict[str, int] = {}
+    for r in results:
+        key = canonical_url(r.get("url") or "")
+        if not key:
+            continue
+        i = seen.get(key)
+        if i is None:
+            seen[key] = len(out)
+            out.append({**r, "url": (r.get("url") or "").strip()})
+        elif not out[i].get("snippet") and r.get("snippet"):
+            out[i]["snippet"] = r["snippet"]
+    return out
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.runtime.resilience import DeadlineExceeded  # noqa: E402
+from src.web import adapters  # noqa: E402
+from src.web.adapters import ArxivAdapter, GitHubAdapter, RedditAdapter, WikipediaAdapter  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "adapters")
+
+
+def _text(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _json(name: str):
+    return json.loads(_text(name))
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+def test_wikipedia_parse_search():
+    results = WikipediaAdapter().parse_search(_json("wikipedia_search.json"))
+
+    assert [key for key, _ in results] == ["Transformer_(deep_learning_architecture)", "Attention_(machine_learning)"]
+    first, second = results[0][1], results[1][1]
+    assert first.title == "Transformer (deep learning architecture)"
+    assert first.url == "https://en.wikipedia.org/wiki/Transformer_%28deep_learning_architecture%29"
+    assert first.snippet == (
+        "Machine learning model architecture: "
+        "A transformer is a deep learning architecture based on the multi-head attention mechanism"
+    )
+    assert first.quotes == ()
+    # no description: the excerpt alone, search-match markup stripped
+    assert second.snippet.startswith("Attention is a machine learning method")
+
+
+def test_wikipedia_summary_quotes():
+    item = WikipediaAdapter().parse_search(_json("wikipedia_search.json"))[0][1]
+    item = WikipediaAdapter().with_summary(item, _json("wikipedia_summary.json"))
+
+    # sentences under 40 chars are skipped; at most MAX_QUOTES
+    assert item.quotes == (
+        "A transformer is a deep learning architecture based on the multi-head attention mechanism.",
+        "Text is converted to numerical representations called tokens.",
+    )
+
+
+def test_wikipedia_search_stops_summaries_at_deadline(monkeypatch):
+    calls = []
+
+    def fake_get(url, timeout, robots, headers):
+        calls.append(timeout)
+        if "/search/page" in url:
+            return _Response(_json("wikipedia_search.json"))
+        # the summary call eats the rest of the budget
+        time.sleep(0.2)
+        return _Response(_json("wikipedia_summary.json"))
+
+    monkeypatch.setattr(adapters, "polite_get", fake_get)
+    deadline = time.time() + 0.15
+    results = WikipediaAdapter().search("transformer", 2, deadline)
+
+    assert len(results) == 2
+    assert results[0].quotes  # first summary fetched
+    assert results[1].quotes == ()  # second skipped: no time left
+    assert len(calls) == 2
+    assert all(t <= 0.15 for t in calls)
+
+
+def test_wikipedia_search_fails_when_out_of_time_before_first_call(monkeypatch):
+    monkeypatch.setattr(adapters, "polite_get", lambda *a, **k: pytest.fail("called past the deadline"))
+    with pytest.raises(DeadlineExceeded):
+        WikipediaAdapter().search("transformer", 2, time.time() - 1)
+
+
+def test_arxiv_parse():
+    results = ArxivAdapter().parse(_text("arxiv.atom"))
+
+    assert [r.url for r in results] == ["http://arxiv.org/abs/1706.03762v7", "http://arxiv.org/abs/1409.0473v7"]
+    first, second = results
+    assert first.title == "Attention Is All You Need"
+    assert first.snippet == "Ashish Vaswani, Noam Shazeer, Niki Parmar et al."
+    assert first.quotes == (
+        "The dominant sequence transduction models are based on complex recurrent or "
+        "convolutional neural networks in an encoder-decoder configuration.",
+        "We propose a new simple network architecture, the Transformer, based solely on attention mechanisms.",
+    )
+    assert second.snippet == "Dzmitry Bahdanau, Kyunghyun Cho"
+    assert second.quotes == ("Neural machine translation is a recently proposed approach to machine translation.",)
+
+
+def test_github_parse():
+    results = GitHubAdapter().parse(_json("github.json"))
+
+    assert [r.title for r in results] == ["huggingface/transformers", "someone/empty"]
+    first, second = results
+    assert first.url == "https://github.com/huggingface/transformers"
+    assert first.snippet == "★ 150000 · Python · updated 2024-05-01"
+    assert first.quotes[0].startswith("Transformers: the model-definition framework")
+    assert second.snippet == "★ 3 · n/a · updated 2021-01-02"
+    assert second.quotes == ()
+
+
+def test_reddit_parse():
+    results = RedditAdapter().parse(_json("reddit.json"))
+
+    assert len(results) == 2
+    first, second = results
+    assert first.title == "[D] How do transformers handle long context?"
+    assert first.url == (
+        "https://www.reddit.com/r/MachineLearning/comments/abc123/d_how_do_transformers_handle_long_context/"
+    )
+    assert first.snippet == "r/MachineLearning · 412 points · 57 comments"
+    assert first.quotes == (
+        "Most models use positional encodings that were trained on short sequences.",
+        "Is extrapolation beyond that length ever reliable?",
+    )
+    assert second.snippet == "r/learnmachinelearning · 5 points · 0 comments"
+    assert second.quotes == ()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from config import settings
+from src.rag import approvals
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "APPROVALS_DB", str(tmp_path / "approvals.sqlite"))
+    monkeypatch.setattr(settings, "APPROVAL_PRIOR_ENABLED", True)
+    monkeypatch.setattr(settings, "APPROVAL_PRIOR_MIN_SIM", 0.5)
+    monkeypatch.setattr(settings, "APPROVAL_PRIOR_REJECT_WEIGHT", 1.0)
+    # every question embeds to the same unit vector
+    monkeypatch.setattr(approvals, "encode", lambda texts: np.full((len(texts), 4), 0.5, dtype=np.float32))
+    return tmp_path
+
+
+def test_rejections_count_against_the_proposed_source(db):
+    approvals.record_approval("q", "wikipedia", "arxiv")
+    approvals.record_approval("q", "arxiv", "arxiv")
+
+    prior, n = approvals.approval_prior("q")
+
+    assert n == 2
+    assert prior["arxiv"] == pytest.approx(1.0)
+    assert prior["wikipedia"] == pytest.approx(-0.5)
+
+
+def test_given_query_vector_is_not_recomputed(db, monkeypatch):
+    approvals.record_approval("q", "arxiv", "arxiv")
+    monkeypatch.setattr(approvals, "encode", lambda texts: pytest.fail("query re-embedded"))
+
+    prior, n = approvals.approval_prior("q", qvec=np.full(4, 0.5, dtype=np.float32))
+
+    assert (prior, n) == ({"arxiv": pytest.approx(1.0)}, 1)
+
+
+def test_rows_are_read_incrementally_and_pruned(db, monkeypatch):
+    monkeypatch.setattr(settings, "APPROVALS_MAX_ROWS", 3)
+    monkeypatch.setattr(settings, "APPROVAL_PRIOR_K", 10)
+    for sid in ("wikipedia", "wikipedia", "arxiv"):
+        approvals.record_approval("q", sid, sid)
+    assert approvals.approval_prior("q")[1] == 3
+
+    for sid in ("github", "github"):
+        approvals.record_approval("q", sid, sid)
+    prior, n = approvals.approval_prior("q")
+
+    # the two oldest rows were pruned from the table and from the cache
+    assert n == 3
+    assert set(prior) == {"arxiv", "github"}
+    assert approvals._rows["ids"] == [3, 4, 5]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+from config import settings  # noqa: E402
+from src.rag.embeddings import OnnxEmbedder, SentenceTransformerEmbedder  # noqa: E402
+
+# ONNX vectors must stay interchangeable with a collection built by sentence-transformers
+MIN_COSINE = 0.99
+
+SENTENCES = [
+    "How do transformers work?",
+    "Find papers about rotary positional embeddings",
+    "best python library for parsing PDF tables",
+    "Почему небо голубое?",
+    "What did people on reddit say about the new GPU prices?",
+    "a",
+    "Explain the difference between BM25 and dense retrieval in one long paragraph " * 20,
+]
+
+
+@pytest.fixture(scope="module")
+def backends():
+    try:
+        st = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL)
+        onnx = OnnxEmbedder(
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_ONNX_FILE,
+            max_seq_len=settings.EMBEDDING_MAX_SEQ_LEN,
+            threads=settings.EMBEDDING_THREADS,
+        )
+    except Exception as e:  # model not cached and no network
+        pytest.skip(f"embedding model unavailable: {type(e).__name__}: {e}")
+    return st, onnx
+
+
+def test_onnx_matches_sentence_transformers(backends):
+    st, onnx = backends
+    ref = st.encode(SENTENCES)
+    got = onnx.encode(SENTENCES)
+
+    assert got.shape == ref.shape
+    assert got.dtype == np.float32
+    assert np.allclose(np.linalg.norm(got, axis=1), 1.0, atol=1e-4)
+    cos = (ref * got).sum(axis=1)
+    assert cos.min() >= MIN_COSINE, dict(zip(SENTENCES, cos.round(4).tolist()))
@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from src.web import extract as extract_mod  # noqa: E402
+from src.web.extract import ExtractPool, ExtractQueueFull  # noqa: E402
+
+
+def _slow_extract(raw, encoding, max_chars, max_quotes, max_len):
+    time.sleep(1.0)
+    return "slow", []
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # ExtractPool.extract submits the module-level `extract`, looked up per call
+    monkeypatch.setattr(extract_mod, "extract", _slow_extract)
+    p = ExtractPool(1, max_pending=1)
+    yield p
+    p.shutdown()
+
+
+def test_slot_held_while_worker_still_parses(pool):
+    with pytest.raises(FuturesTimeout):
+        pool.extract(b"<p>x</p>", "utf-8", 100, timeout=0.2)
+
+    # the caller gave up but the worker is still busy: no second page is admitted
+    with pytest.raises(ExtractQueueFull):
+        pool.extract(b"<p>y</p>", "utf-8", 100, timeout=0.2)
+
+    # once the first page is done its slot comes back
+    assert pool.extract(b"<p>z</p>", "utf-8", 100, timeout=5) == ("slow", [])
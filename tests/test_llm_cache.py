@@ -0,0 +1,60 @@
+import pytest
+
+from src.graph import llm_cache
+from src.graph.llm_cache import LLMCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time for the cache; advance with clock.now += seconds."""
+    class Clock:
+        now = 1_000_000.0
+
+    monkeypatch.setattr(llm_cache.time, "time", lambda: Clock.now)
+    return Clock
+
+
+def test_least_recently_used_is_evicted():
+    cache = LLMCache(max_items=2, ttl=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # "b" is now the oldest
+
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats()["size_mem"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LLMCache(max_items=10, ttl=60)
+    cache.put("k", "v")
+
+    clock.now += 60
+    assert cache.get("k") == "v"
+    clock.now += 1
+    assert cache.get("k") is None
+    assert cache.stats()["size_mem"] == 0
+
+
+def test_sqlite_tier_is_shared_and_expires(tmp_path, clock):
+    db = str(tmp_path / "llm.sqlite")
+    LLMCache(max_items=10, ttl=60, db_path=db).put("k", "from another worker")
+
+    # a fresh process: empty memory tier, same file
+    cache = LLMCache(max_items=10, ttl=60, db_path=db)
+    assert cache.get("k") == "from another worker"
+    assert cache.get("k") == "from another worker"
+    assert (cache.stats()["hits_disk"], cache.stats()["hits_mem"]) == (1, 1)
+
+    clock.now += 61
+    assert LLMCache(max_items=10, ttl=60, db_path=db).get("k") is None
+
+
+def test_key_covers_model_prompt_and_options():
+    base = cache_key("m", "p", {"temperature": 0, "seed": 1})
+    assert cache_key("m", "p", {"seed": 1, "temperature": 0}) == base
+    assert base not in {cache_key("m2", "p", {"temperature": 0, "seed": 1}),
+                        cache_key("m", "p2", {"temperature": 0, "seed": 1}),
+                        cache_key("m", "p", {"temperature": 0, "seed": 2})}
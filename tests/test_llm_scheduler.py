@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from src.graph.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_GUARD,
+    PRIORITY_REPORT,
+    LLMQueueCancelled,
+    LLMQueueTimeout,
+    LLMScheduler,
+    cancel_scope,
+)
+
+
+def _wait_for(cond):
+    end = time.monotonic() + 5
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def busy():
+    """A one-slot scheduler whose slot is held until `busy.release` is set."""
+    sched = LLMScheduler(max_inflight=1)
+    release = threading.Event()
+
+    def hold():
+        with sched.slot(PRIORITY_GUARD):
+            release.wait(5)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    _wait_for(lambda: sched.stats()["in_flight"] == 1)
+    yield sched, release
+    release.set()
+    t.join()
+
+
+def _queue(sched, waiters, admitted, **slot_kwargs):
+    """Enqueue (name, priority) waiters one after another; each records its name when admitted."""
+    threads = []
+    for name, priority in waiters:
+        def run(name=name, priority=priority):
+            with sched.slot(priority, **slot_kwargs):
+                admitted.append(name)
+
+        depth = sched.stats()["queue_depth"]
+        t = threading.Thread(target=run)
+        t.start()
+        _wait_for(lambda: sched.stats()["queue_depth"] == depth + 1)
+        threads.append(t)
+    return threads
+
+
+def test_admitted_by_priority_then_fifo(busy):
+    sched, release = busy
+    admitted = []
+    threads = _queue(sched, [
+        ("report-1", PRIORITY_REPORT),
+        ("background", PRIORITY_BACKGROUND),
+        ("guard-1", PRIORITY_GUARD),
+        ("report-2", PRIORITY_REPORT),
+        ("guard-2", PRIORITY_GUARD),
+    ], admitted)
+
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert admitted == ["guard-1", "guard-2", "report-1", "report-2", "background"]
+    assert sched.stats()["admitted"] == 6
+
+
+def test_timeout_leaves_the_queue(busy):
+    sched, release = busy
+    admitted = []
+    threads = _queue(sched, [("behind", PRIORITY_REPORT)], admitted)
+
+    with pytest.raises(LLMQueueTimeout):
+        with sched.slot(PRIORITY_GUARD, timeout=0.05):
+            pass
+
+    assert sched.stats()["queue_depth"] == 1
+    assert sched.stats()["timeouts"] == 1
+    # the timed-out waiter was ahead; the one behind it is not stuck
+    release.set()
+    threads[0].join()
+    assert admitted == ["behind"]
+
+
+def test_cancel_leaves_the_queue(busy):
+    sched, release = busy
+    cancel = threading.Event()
+    errors = []
+
+    def wait():
+        try:
+            with sched.slot(PRIORITY_BACKGROUND, cancel=cancel):
+                pass
+        except LLMQueueCancelled as e:
+            errors.append(e)
+
+    t = threading.Thread(target=wait)
+    t.start()
+    _wait_for(lambda: sched.stats()["queue_depth"] == 1)
+
+    cancel.set()
+    t.join(1)
+
+    assert not t.is_alive()
+    assert len(errors) == 1
+    assert (sched.stats()["queue_depth"], sched.stats()["cancelled"]) == (0, 1)
+
+
+def test_cancel_scope_applies_to_slots_inside_it():
+    sched = LLMScheduler(max_inflight=1)
+    stop = threading.Event()
+    stop.set()
+
+    # cancelled before it starts: not admitted even with a free slot
+    with cancel_scope(stop), pytest.raises(LLMQueueCancelled):
+        with sched.slot(PRIORITY_BACKGROUND):
+            pass
+
+    with sched.slot(PRIORITY_BACKGROUND):
+        assert sched.stats()["in_flight"] == 1
@@ -0,0 +1,69 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from config import settings  # noqa: E402
+from src.web import polite  # noqa: E402
+
+
+class _Response:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+
+@pytest.fixture
+def robots(tmp_path, monkeypatch):
+    """Serve robots.txt from `robots.reply` (a response or an exception); counts the fetches."""
+    monkeypatch.setattr(settings, "CRAWL_STATE_DB", str(tmp_path / "crawl.sqlite"))
+    monkeypatch.setattr(settings, "CRAWL_RESPECT_ROBOTS", True)
+    monkeypatch.setattr(polite, "_limiter", None)
+    monkeypatch.setattr(polite, "_ROBOTS", polite.OrderedDict())
+
+    class Server:
+        reply = _Response(404)
+        robots_fetches = 0
+        page_fetches = 0
+
+    def fake_get(url, timeout, headers=None):
+        if url.endswith("/robots.txt"):
+            Server.robots_fetches += 1
+            if isinstance(Server.reply, Exception):
+                raise Server.reply
+            return Server.reply
+        Server.page_fetches += 1
+        return _Response(200, "page")
+
+    monkeypatch.setattr(polite.requests, "get", fake_get)
+    return Server
+
+
+def test_missing_robots_allows_everything(robots):
+    robots.reply = _Response(404)
+    assert polite.polite_get("https://example.org/a", timeout=5).status_code == 200
+
+
+@pytest.mark.parametrize("reply", [_Response(503), _Response(500), _Response(429), requests.ConnectionError("refused")])
+def test_unreadable_robots_disallows_until_the_back_off_ends(robots, monkeypatch, reply):
+    robots.reply = reply
+    assert polite.polite_get("https://example.org/a", timeout=5) is None
+    assert polite.polite_get("https://example.org/b", timeout=5) is None
+    assert (robots.robots_fetches, robots.page_fetches) == (1, 0)
+
+    # back-off over: robots.txt is asked again, not remembered for the full TTL
+    now = polite.time.time()
+    monkeypatch.setattr(polite.time, "time", lambda: now + settings.CRAWL_DEFAULT_BACKOFF_SECONDS + 1)
+    robots.reply = _Response(200, "User-agent: *\nDisallow: /private\n")
+    assert polite.polite_get("https://example.org/a", timeout=5).status_code == 200
+    assert polite.polite_get("https://example.org/private/x", timeout=5) is None
+    assert robots.robots_fetches == 2
+
+
+def test_crawl_delay_allows_no_burst(tmp_path):
+    limiter = polite.DomainRateLimiter(str(tmp_path / "crawl.sqlite"), rate=10.0, burst=5.0)
+
+    assert limiter.acquire("example.org", timeout=0)
+    assert limiter.acquire("example.org", timeout=0)
+    assert limiter.acquire("slow.example", timeout=0, min_interval=2.0)
+    assert not limiter.acquire("slow.example", timeout=0.1, min_interval=2.0)
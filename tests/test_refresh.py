@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+import pytest
+
+RF = pytest.importorskip("src.reports.refresh")
+
+from src.graph import nodes  # noqa: E402
+from src.graph.results import WebResult  # noqa: E402
+from src.reports import index  # noqa: E402
+from src.reports.generate_report import MANIFEST_EXT, save_reports  # noqa: E402
+from src.reports.store import report_path  # noqa: E402
+
+
+def _records(stars=1, readme="A library of transformer models."):
+    # what the GitHub adapter returns: counters in the snippet, content in the quotes
+    return [
+        WebResult.make("huggingface/transformers", "https://github.com/huggingface/transformers",
+                       f"★ {stars} · Python", [readme]),
+        WebResult.make("karpathy/nanoGPT", "https://github.com/karpathy/nanoGPT", f"★ {stars} · Python",
+                       ["The simplest repository for training GPTs."]),
+    ]
+
+
+@pytest.fixture
+def report(tmp_path, monkeypatch):
+    """A saved v1 report built from adapter results; returns (out_dir, base)."""
+    monkeypatch.setattr(index, "encode", lambda texts: np.full((len(texts), 4), 0.5, dtype=np.float32))
+    monkeypatch.setattr(nodes, "get_sources", lambda: {"github": {"domain": "github.com"}})
+    monkeypatch.setattr(nodes, "adapter_search", lambda *a, **k: _records())
+
+    state = {"user_query": "transformer libraries", "source_id": "github", "source_domain": "github.com",
+             "deadline": None, "page_meta": None}
+    state.update(nodes.node_web_search(state))
+    state["report_answer"] = "first answer"
+    paths = save_reports(state, out_dir=str(tmp_path), base="0001__transformer-libraries")
+    index.add_report(str(tmp_path), rid=1, base=paths["base"], user_query=state["user_query"], source_id="github",
+                     md_path=paths["md"], html_path=paths["html"])
+    return str(tmp_path), paths["base"]
+
+
+def _manifest(out_dir, base):
+    with open(report_path(out_dir, base, MANIFEST_EXT), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _md(out_dir, base):
+    with open(report_path(out_dir, base, "md"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_unchanged_evidence_only_touches_the_manifest(report, monkeypatch):
+    out_dir, base = report
+    md = _md(out_dir, base)
+    # new star counts and a different order are not new evidence
+    monkeypatch.setattr(nodes, "adapter_search", lambda *a, **k: _records(stars=2)[::-1])
+    monkeypatch.setattr(RF, "node_generate_report_answer", lambda state: pytest.fail("LLM called"))
+
+    r = RF.refresh_report(base, out_dir=out_dir)
+
+    assert (r["changed"], r["version"], r["unchanged_pages"], r["pages"]) == (False, 1, 2, 2)
+    assert _md(out_dir, base) == md
+    assert _manifest(out_dir, base)["checked_at"]
+
+
+def test_changed_evidence_bumps_the_version_in_place(report, monkeypatch):
+    out_dir, base = report
+    monkeypatch.setattr(nodes, "adapter_search", lambda *a, **k: _records(readme="Now with more models."))
+    monkeypatch.setattr(RF, "node_generate_report_answer", lambda state: {"report_answer": "second answer"})
+
+    r = RF.refresh_report(base, out_dir=out_dir)
+
+    assert (r["changed"], r["version"], r["unchanged_pages"]) == (True, 2, 1)
+    assert "(v2)" in _md(out_dir, base) and "second answer" in _md(out_dir, base)
+    assert _manifest(out_dir, base)["version"] == 2
+    assert index.all_reports(out_dir) == [base]
+
+
+def test_empty_search_keeps_the_report(report, monkeypatch):
+    out_dir, base = report
+    md = _md(out_dir, base)
+    monkeypatch.setattr(RF, "node_web_search", lambda state: {"web_results": ()})
+
+    r = RF.refresh_report(base, out_dir=out_dir)
+
+    assert (r["changed"], r["aborted"], r["version"]) == (False, "no search results", 1)
+    assert _md(out_dir, base) == md
+
+
+def test_failed_answer_keeps_the_report(report, monkeypatch):
+    out_dir, base = report
+    md, manifest = _md(out_dir, base), _manifest(out_dir, base)
+    monkeypatch.setattr(nodes, "adapter_search", lambda *a, **k: _records(readme="Now with more models."))
+    monkeypatch.setattr(RF, "node_generate_report_answer",
+                        lambda state: {"report_answer": "(No answer generated)", "report_error": "ConnectionError"})
+
+    r = RF.refresh_report(base, out_dir=out_dir)
+
+    assert (r["changed"], r["aborted"], r["version"]) == (False, "LLM unavailable (ConnectionError)", 1)
+    assert _md(out_dir, base) == md
+    assert _manifest(out_dir, base) == manifest
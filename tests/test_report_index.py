@@ -0,0 +1,96 @@
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+from src.reports import index
+
+# the index file as written before the `pref` and `background` columns existed
+_V1_SCHEMA = """
+CREATE TABLE reports (
+    id          INTEGER PRIMARY KEY,
+    base        TEXT NOT NULL UNIQUE,
+    user_query  TEXT NOT NULL,
+    source_id   TEXT,
+    created_at  REAL NOT NULL,
+    md_path     TEXT,
+    html_path   TEXT,
+    embedding   BLOB NOT NULL
+);
+"""
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch):
+    # every query embeds to the same unit vector: similarity 1.0
+    monkeypatch.setattr(index, "encode", lambda texts: np.full((len(texts), 4), 0.5, dtype=np.float32))
+    for name in ("a.md", "a.html"):
+        (tmp_path / name).write_text("report")
+    return tmp_path
+
+
+def _add(out_dir, rid, pref=""):
+    index.add_report(
+        str(out_dir), rid=rid, base=f"{rid:04d}__q", user_query="how do transformers work",
+        source_id="wikipedia", md_path=str(out_dir / "a.md"), html_path=str(out_dir / "a.html"), pref=pref,
+    )
+
+
+def test_old_index_is_migrated(out_dir):
+    with sqlite3.connect(out_dir / index.INDEX_FILE) as conn:
+        conn.executescript(_V1_SCHEMA)
+        conn.execute(
+            "INSERT INTO reports VALUES (1, '0001__q', 'how do transformers work', 'wikipedia', ?, ?, ?, ?)",
+            (time.time(), str(out_dir / "a.md"), str(out_dir / "a.html"), np.full(4, 0.5, np.float32).tobytes()),
+        )
+    conn.close()
+
+    hit = index.find_reusable(str(out_dir), "how do transformers work", "wikipedia")
+    assert hit["base"] == "0001__q"
+    assert hit["pref"] == ""
+
+
+def test_reuse_requires_the_same_preference(out_dir):
+    preference_key = pytest.importorskip("src.graph.query_plan").preference_key
+    _add(out_dir, 1)
+    _add(out_dir, 2, pref=preference_key("how do transformers work\nUser preference: Short  summary"))
+
+    def found(pref):
+        hit = index.find_reusable(str(out_dir), "how do transformers work", "wikipedia", pref)
+        return hit and hit["base"]
+
+    assert found("") == "0001__q"
+    assert found(preference_key("how do transformers work\nPreferred format: short summary")) == "0002__q"
+    assert found("a table") is None
+
+
+def test_connections_are_closed(out_dir, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(index.sqlite3, "connect", tracking_connect)
+    _add(out_dir, 1)
+    index.search_reports(str(out_dir), "q")
+    index.all_reports(str(out_dir))
+
+    assert len(opened) == 3
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_popular_queries_skip_background_reports(out_dir):
+    for rid, (q, background) in enumerate([("warm", True), ("warm", True), ("warm", True), ("asked", False)], 1):
+        index.add_report(
+            str(out_dir), rid=rid, base=f"{rid:04d}__x", user_query=q, source_id="wikipedia",
+            md_path=str(out_dir / "a.md"), html_path=str(out_dir / "a.html"), background=background,
+        )
+
+    assert index.popular_queries(str(out_dir), 10) == ["asked"]
+    assert index.get_report(str(out_dir), "0001__x")["background"] is True
@@ -0,0 +1,54 @@
+import multiprocessing as mp
+import os
+
+from src.reports.store import allocate_report_id, atomic_open, report_path
+
+WORKERS = 8
+REPORTS_PER_WORKER = 25
+# big enough that a torn write would show up as a short file
+BODY_LINES = 2000
+
+
+def _body(rid: int) -> str:
+    return "".join(f"report {rid} line {i}\n" for i in range(BODY_LINES))
+
+
+def _worker(out_dir: str, start, queue) -> None:
+    start.wait()
+    ids = []
+    for _ in range(REPORTS_PER_WORKER):
+        rid = allocate_report_id(out_dir)
+        base = f"{rid:04d}__stress"
+        with atomic_open(report_path(out_dir, base, "md")) as f:
+            body = _body(rid)
+            # written in chunks so writers interleave
+            for i in range(0, len(body), 4096):
+                f.write(body[i:i + 4096])
+        ids.append(rid)
+    queue.put(ids)
+
+
+def test_concurrent_processes_get_unique_ids_and_whole_files(tmp_path):
+    out_dir = str(tmp_path)
+    ctx = mp.get_context("fork")
+    start = ctx.Event()
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(out_dir, start, queue)) for _ in range(WORKERS)]
+    for p in procs:
+        p.start()
+    start.set()
+    ids = [rid for _ in procs for rid in queue.get(timeout=60)]
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    total = WORKERS * REPORTS_PER_WORKER
+    assert len(ids) == total
+    assert len(set(ids)) == total
+    assert sorted(ids) == list(range(1, total + 1))
+
+    for rid in ids:
+        with open(report_path(out_dir, f"{rid:04d}__stress", "md"), encoding="utf-8") as f:
+            assert f.read() == _body(rid)
+    # no temp files left behind by atomic_open
+    assert not [n for n in os.listdir(out_dir) if n.startswith(".tmp-")]
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from src.runtime import resilience
+from src.runtime.resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, time_left
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.monotonic for the breaker; advance with clock.now += seconds."""
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+def _fail():
+    raise ConnectionError("backend down")
+
+
+def _open(b):
+    for _ in range(b.failure_threshold):
+        with pytest.raises(ConnectionError):
+            b.call(_fail)
+
+
+def test_opens_after_consecutive_failures(clock):
+    b = CircuitBreaker("t", failure_threshold=3, reset_seconds=10)
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+    b.call(lambda: "ok")  # a success resets the count
+    assert b.stats() == {"state": "closed", "failures": 0}
+
+    _open(b)
+
+    assert b.state == "open"
+    with pytest.raises(CircuitOpen):
+        b.call(pytest.fail, "called while open")
+
+
+def test_half_open_lets_one_trial_through_and_success_closes(clock):
+    b = CircuitBreaker("t", failure_threshold=2, reset_seconds=10)
+    _open(b)
+
+    clock.now += 10
+    assert b.state == "half_open"
+    assert b.allow()
+    assert not b.allow()  # only one trial at a time
+
+    b.record_success()
+    assert b.state == "closed"
+    assert b.call(lambda: "ok") == "ok"
+
+
+def test_failed_trial_reopens_for_a_full_period(clock):
+    b = CircuitBreaker("t", failure_threshold=2, reset_seconds=10)
+    _open(b)
+
+    clock.now += 10
+    with pytest.raises(ConnectionError):
+        b.call(_fail)
+
+    assert b.state == "open"
+    clock.now += 9
+    assert b.state == "open"
+    clock.now += 1
+    assert b.state == "half_open"
+
+
+def test_time_left():
+    assert time_left(None, 5) == 5
+    assert time_left(time.time() + 60, 5) == 5
+    assert time_left(time.time() + 1, 5) <= 1
+    with pytest.raises(DeadlineExceeded):
+        time_left(time.time() - 1, 5)
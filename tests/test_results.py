@@ -0,0 +1,50 @@
+import sys
+
+import pytest
+
+from src.graph.results import WebResult, pack_results, unpack_results
+from src.runtime.sessions import SqliteSessionStore
+
+_SHARED = "A passage quoted by more than one result."
+
+
+def _results():
+    return (
+        WebResult.make("Attention", "https://arxiv.org/abs/1706.03762", "Vaswani et al.", [_SHARED, "Only here. ü ∑"]),
+        WebResult.make("Transformer", "https://en.wikipedia.org/wiki/Transformer", "", [_SHARED]),
+        WebResult.make("", "https://example.org/empty"),
+    )
+
+
+def test_pack_round_trip_shares_interned_strings():
+    # built at run time: not the same object as the constants above
+    results = _results()
+    unpacked = unpack_results(pack_results(results))
+
+    assert tuple(unpacked) == results
+    shared = [r.quotes[0] for r in unpacked[:2]]
+    assert shared[0] is shared[1]
+    assert sys.intern("".join(["A passage quoted ", "by more than one result."])) is shared[0]
+    assert unpacked[0].url is sys.intern("https://arxiv.org/abs/1706.03762")
+
+
+def test_pack_round_trip_empty():
+    assert unpack_results(pack_results(())) == []
+
+
+def test_unpack_rejects_other_blobs():
+    with pytest.raises(ValueError):
+        unpack_results(b"not packed")
+
+
+def test_session_store_keeps_web_results(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.sqlite"))
+    data = {"created_at": 1.0, "log": [], "state": {"user_query": "q", "web_results": _results()}}
+
+    store.put("s", data)
+    loaded = store.get("s")
+
+    assert loaded["state"]["web_results"] == _results()
+    assert isinstance(loaded["state"]["web_results"], tuple)
+    # the caller's state is not replaced by the packed form
+    assert data["state"]["web_results"] == _results()
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("ddgs")
+
+from config import settings  # noqa: E402
+from src.runtime.resilience import breaker  # noqa: E402
+from src.web import polite, tools  # noqa: E402
+
+
+@pytest.fixture
+def search_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_STATE_DB", str(tmp_path / "crawl.sqlite"))
+    monkeypatch.setattr(settings, "SEARCH_BURST", 1.0)
+    monkeypatch.setattr(settings, "SEARCH_RATE_PER_SECOND", 0.001)
+    # one worker: the first query is dispatched before the extras
+    monkeypatch.setattr(settings, "SEARCH_MAX_PARALLEL", 1)
+    monkeypatch.setattr(polite, "_search_limiter", None)
+
+    calls = []
+
+    def fake_search(query, domain, max_results, timeout):
+        calls.append(query)
+        return [{"title": query, "url": f"https://{domain}/{query}", "snippet": ""}]
+
+    monkeypatch.setattr(tools, "_web_search", fake_search)
+    return calls
+
+
+def test_extra_subqueries_dropped_without_tokens(search_calls):
+    results = tools.web_search_multi(["first", "second", "third"], "example.org", deadline=time.time() + 1)
+
+    assert search_calls == ["first"]
+    assert [r["url"] for r in results] == ["https://example.org/first"]
+
+
+def test_rate_limit_does_not_trip_the_breaker(search_calls):
+    tools.web_search_multi(["first"], "example.org", deadline=time.time() + 1)
+    failures = breaker("ddg").stats()["failures"]
+
+    for i in range(settings.BREAKER_FAILURE_THRESHOLD + 1):
+        assert tools.web_search_multi([f"q{i}"], "example.org", deadline=time.time() + 0.05) == []
+
+    assert search_calls == ["first"]
+    assert breaker("ddg").stats()["failures"] == failures
+    assert breaker("ddg").allow()
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from src.runtime.resilience import DeadlineExceeded
+from src.runtime.singleflight import SingleFlight
+
+
+def _lead_in_background(sf, key, fn):
+    """Start a leader for `key` on a thread; returns (thread, holder of its outcome)."""
+    out = {}
+
+    def run():
+        try:
+            out["value"] = sf.do_bounded(key, None, (), fn)
+        except BaseException as e:
+            out["error"] = e
+
+    t = threading.Thread(target=run)
+    t.start()
+    while not sf.stats()["in_flight"]:
+        time.sleep(0.001)
+    return t, out
+
+
+def test_followers_share_the_leaders_result():
+    sf = SingleFlight("t")
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "shared"
+
+    t, out = _lead_in_background(sf, "k", slow)
+    threading.Timer(0.05, release.set).start()
+    assert sf.do_bounded("k", 5, (), lambda: "own") == "shared"
+    t.join()
+    assert out["value"] == "shared"
+    assert len(calls) == 1
+
+
+def test_follower_waits_only_its_own_budget():
+    sf = SingleFlight("t")
+    release = threading.Event()
+    t, _ = _lead_in_background(sf, "k", lambda: release.wait(5))
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        sf.do_bounded("k", 0.1, (), lambda: "own")
+    assert time.monotonic() - start < 1
+
+    release.set()
+    t.join()
+
+
+def test_leader_timeout_is_not_handed_to_followers():
+    sf = SingleFlight("t")
+    release = threading.Event()
+
+    def short_deadline():
+        release.wait(5)
+        raise DeadlineExceeded("leader's deadline")
+
+    t, out = _lead_in_background(sf, "k", short_deadline)
+    threading.Timer(0.05, release.set).start()
+    # the follower still has time: it runs the call itself
+    assert sf.do_bounded("k", 5, (DeadlineExceeded,), lambda: "own") == "own"
+    t.join()
+    assert isinstance(out["error"], DeadlineExceeded)
+    assert sf.stats()["retries"] == 1
+
+
+def test_other_leader_failures_are_shared():
+    sf = SingleFlight("t")
+    release = threading.Event()
+
+    def broken():
+        release.wait(5)
+        raise ValueError("backend said no")
+
+    t, _ = _lead_in_background(sf, "k", broken)
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(ValueError):
+        sf.do_bounded("k", 5, (DeadlineExceeded,), lambda: "own")
+    t.join()
+
+
+def test_interactive_call_does_not_join_a_background_flight(monkeypatch):
+    pytest.importorskip("requests")
+    from src.graph import ollama
+    from src.graph.llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_GUARD
+
+    release = threading.Event()
+    calls = []
+
+    def fake_generate(prompt, model, options, fmt, priority, deadline):
+        calls.append(priority)
+        if priority == PRIORITY_BACKGROUND:
+            release.wait(5)
+        return f"p{priority}"
+
+    monkeypatch.setattr(ollama, "_generate", fake_generate)
+    background = threading.Thread(target=ollama.call_ollama, args=("same prompt",), kwargs={"priority": PRIORITY_BACKGROUND})
+    background.start()
+    while not calls:
+        time.sleep(0.001)
+
+    # answered by its own generation while the background one is still running
+    assert ollama.call_ollama("same prompt", priority=PRIORITY_GUARD, deadline=time.time() + 2) == f"p{PRIORITY_GUARD}"
+    release.set()
+    background.join()
+    assert sorted(calls) == [PRIORITY_GUARD, PRIORITY_BACKGROUND]
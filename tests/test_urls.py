@@ -0,0 +1,64 @@
+import pytest
+
+from src.web.urls import canonical_url, dedup_results
+
+
+@pytest.mark.parametrize("url, canonical", [
+    # Wikipedia: mobile host, bare domain, index.php, spaces and fragments
+    ("https://en.m.wikipedia.org/wiki/Transformer", "https://en.wikipedia.org/wiki/Transformer"),
+    ("https://wikipedia.org/wiki/Transformer", "https://en.wikipedia.org/wiki/Transformer"),
+    ("https://en.wikipedia.org/w/index.php?title=Transformer", "https://en.wikipedia.org/wiki/Transformer"),
+    ("https://en.wikipedia.org/w/index.php?title=Transformer&redirect=no", "https://en.wikipedia.org/wiki/Transformer"),
+    ("https://en.wikipedia.org/w/index.php?title=Transformer&action=history",
+     "https://en.wikipedia.org/w/index.php?action=history&title=Transformer"),
+    ("http://en.wikipedia.org/wiki/Python (programming language)#History",
+     "https://en.wikipedia.org/wiki/Python_(programming_language)"),
+    # arXiv: versions, pdf links and mirrors all name the abstract page
+    ("https://arxiv.org/abs/1706.03762v7", "https://arxiv.org/abs/1706.03762"),
+    ("https://arxiv.org/pdf/1706.03762v7.pdf", "https://arxiv.org/abs/1706.03762"),
+    ("https://arxiv.org/pdf/1706.03762", "https://arxiv.org/abs/1706.03762"),
+    ("http://export.arxiv.org/abs/1706.03762v2", "https://arxiv.org/abs/1706.03762"),
+    ("https://arxiv.org/abs/hep-th/9901001v1", "https://arxiv.org/abs/hep-th/9901001"),
+    # GitHub: owner/repo case and .git; paths inside the repo keep their case
+    ("https://github.com/HuggingFace/Transformers", "https://github.com/huggingface/transformers"),
+    ("https://www.github.com/huggingface/transformers.git/", "https://github.com/huggingface/transformers"),
+    ("https://github.com/a/b/blob/Main/README.md", "https://github.com/a/b/blob/Main/README.md"),
+    # Reddit: hosts, title slugs and comment permalinks
+    ("https://old.reddit.com/r/Python/comments/ABC123/some_title/", "https://www.reddit.com/r/python/comments/abc123"),
+    ("https://www.reddit.com/r/python/comments/abc123/x/def456/", "https://www.reddit.com/r/python/comments/abc123"),
+    ("https://reddit.com/r/python/", "https://www.reddit.com/r/python"),
+    # generic: tracking parameters, sorted query, fragment, default port, host case, trailing slash
+    ("https://Example.com:443/a/?utm_source=x&b=2&a=1&fbclid=z#frag", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/?gclid=1&ref=hn", "https://example.com/"),
+    ("http://example.com:8080/page", "https://example.com:8080/page"),
+    # not web pages: left alone
+    ("ftp://example.com/file", "ftp://example.com/file"),
+    ("  ", ""),
+])
+def test_canonical_url(url, canonical):
+    assert canonical_url(url) == canonical
+
+
+def test_dedup_keeps_the_best_ranked_original_url():
+    results = dedup_results([
+        {"title": "pdf", "url": "http://arxiv.org/pdf/1706.03762v7.pdf", "snippet": ""},
+        {"title": "abs", "url": "https://arxiv.org/abs/1706.03762", "snippet": "Attention is all you need"},
+        {"title": "other", "url": "http://example.com/only-http", "snippet": "s"},
+    ])
+
+    assert [r["url"] for r in results] == ["http://arxiv.org/pdf/1706.03762v7.pdf", "http://example.com/only-http"]
+    # the duplicate's snippet fills the gap
+    assert results[0]["snippet"] == "Attention is all you need"
+
+
+def test_rrf_merge_keeps_a_fetchable_url():
+    pytest.importorskip("requests")
+    pytest.importorskip("ddgs")
+    from src.web.tools import rrf_merge
+
+    merged = rrf_merge([
+        [{"url": "https://example.org/a"}, {"url": "http://en.m.wikipedia.org/wiki/X"}],
+        [{"url": "https://en.wikipedia.org/wiki/X?utm_source=y"}],
+    ])
+
+    assert [r["url"] for r in merged] == ["https://en.wikipedia.org/wiki/X?utm_source=y", "https://example.org/a"]